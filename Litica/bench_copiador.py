@@ -0,0 +1,91 @@
+"""
+Benchmark: copiador.copiar_archivo contra shutil.copy2.
+
+Genera varias distribuciones de tamaños (fotos JPG pequeñas, TIFF
+medianos, exportaciones grandes de Agisoft) en una carpeta temporal y
+mide cuánto tarda cada método en copiarlas.
+
+    python bench_copiador.py
+    python bench_copiador.py --dir D:\\bench --escala 4
+
+Con --dir se puede medir sobre un disco concreto (USB, NAS...).
+"""
+import os
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+from copiador import copiar_archivo
+
+MB = 1024 * 1024
+
+# nombre -> lista de (cantidad de archivos, tamaño en bytes)
+DISTRIBUCIONES = {
+    "fotos_jpg": [(400, 300 * 1024), (200, 2 * MB)],
+    "tiff": [(20, 40 * MB), (5, 120 * MB)],
+    "agisoft": [(2, 512 * MB)],
+    "mixta": [(300, 500 * 1024), (10, 60 * MB), (1, 400 * MB)],
+}
+
+
+def crear_archivos(carpeta, distribucion, escala):
+    os.makedirs(carpeta, exist_ok=True)
+    bloque = os.urandom(MB)
+    rutas = []
+    for cantidad, tamano in distribucion:
+        for i in range(max(1, int(cantidad * escala))):
+            ruta = os.path.join(carpeta, f"{tamano}_{i}.bin")
+            with open(ruta, "wb") as f:
+                restante = tamano
+                while restante > 0:
+                    n = min(restante, MB)
+                    f.write(bloque[:n])
+                    restante -= n
+            rutas.append(ruta)
+    random.shuffle(rutas)
+    return rutas
+
+
+def medir(funcion, rutas, carpeta_destino):
+    shutil.rmtree(carpeta_destino, ignore_errors=True)
+    os.makedirs(carpeta_destino)
+    inicio = time.perf_counter()
+    for ruta in rutas:
+        funcion(ruta, os.path.join(carpeta_destino, os.path.basename(ruta)))
+    return time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Carpeta de trabajo (por defecto, una temporal)")
+    parser.add_argument("--escala", type=float, default=1.0, help="Multiplica la cantidad de archivos")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench_copiador_", dir=args.dir)
+    metodos = [("shutil.copy2", shutil.copy2), ("copiar_archivo", copiar_archivo)]
+
+    print(f"{'distribución':<12} {'MB':>8} {'método':<16} {'seg':>8} {'MB/s':>8}")
+    try:
+        for nombre, distribucion in DISTRIBUCIONES.items():
+            origen = os.path.join(base, nombre)
+            rutas = crear_archivos(origen, distribucion, args.escala)
+            total_mb = sum(os.path.getsize(r) for r in rutas) / MB
+
+            for nombre_metodo, funcion in metodos:
+                tiempos = [
+                    medir(funcion, rutas, os.path.join(base, "destino"))
+                    for _ in range(args.repeticiones)
+                ]
+                mejor = min(tiempos)
+                print(f"{nombre:<12} {total_mb:>8.0f} {nombre_metodo:<16} {mejor:>8.2f} {total_mb / mejor:>8.0f}")
+
+            shutil.rmtree(origen, ignore_errors=True)
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
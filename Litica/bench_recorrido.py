@@ -0,0 +1,100 @@
+"""
+Benchmark: recorrido.recorrer_paralelo contra os.walk.
+
+Genera un árbol sintético profundo (carpetas anidadas con pocos archivos
+cada una, como los respaldos de monumentos) y mide cuánto tarda cada
+método en listarlo completo. Antes de medir comprueba que todos
+entregan las mismas carpetas y archivos que os.walk.
+
+    python bench_recorrido.py
+    python bench_recorrido.py --dir Z:\\bench --profundidad 5 --ramas 5
+    python bench_recorrido.py --latencia 2
+
+Con --dir se puede medir sobre un recurso de red real. --latencia simula
+los milisegundos de ida y vuelta que cuesta listar una carpeta en un
+recurso compartido (se agregan a cada os.scandir, también al de os.walk).
+"""
+import os
+import time
+import shutil
+import argparse
+import tempfile
+
+from recorrido import recorrer, recorrer_paralelo
+
+
+def crear_arbol(base, profundidad, ramas, archivos):
+    """Árbol de `ramas` subcarpetas por nivel y `archivos` vacíos por carpeta."""
+    carpetas = 0
+    pendientes = [(base, 0)]
+    while pendientes:
+        carpeta, nivel = pendientes.pop()
+        os.makedirs(carpeta, exist_ok=True)
+        carpetas += 1
+        for i in range(archivos):
+            open(os.path.join(carpeta, f"T1_{i:05d}_000_0000001_1.jpg"), "wb").close()
+        if nivel < profundidad:
+            pendientes += [(os.path.join(carpeta, f"c{i}"), nivel + 1) for i in range(ramas)]
+    return carpetas
+
+
+def contenido(recorrido):
+    return {carpeta: (sorted(subcarpetas), sorted(archivos)) for carpeta, subcarpetas, archivos in recorrido}
+
+
+def medir(funcion, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for _ in funcion():
+            pass
+        tiempos.append(time.perf_counter() - inicio)
+    return min(tiempos)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", help="Carpeta de trabajo (por defecto, una temporal)")
+    parser.add_argument("--profundidad", type=int, default=4)
+    parser.add_argument("--ramas", type=int, default=6)
+    parser.add_argument("--archivos", type=int, default=5, help="Archivos por carpeta")
+    parser.add_argument("--latencia", type=float, default=0.0, help="ms extra por listado de carpeta")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    base = tempfile.mkdtemp(prefix="bench_recorrido_", dir=args.dir)
+    try:
+        carpetas = crear_arbol(os.path.join(base, "arbol"), args.profundidad, args.ramas, args.archivos)
+        raiz = os.path.join(base, "arbol")
+
+        if args.latencia:
+            scandir_original = os.scandir
+
+            def scandir_lento(ruta="."):
+                time.sleep(args.latencia / 1000)
+                return scandir_original(ruta)
+
+            os.scandir = scandir_lento
+
+        metodos = [("os.walk", lambda: os.walk(raiz)), ("recorrer", lambda: recorrer(raiz))]
+        metodos += [
+            (f"paralelo x{n}", lambda n=n: recorrer_paralelo(raiz, hilos=n))
+            for n in (2, 4, 8, 16)
+        ]
+
+        esperado = contenido(os.walk(raiz))
+        for nombre, funcion in metodos[1:]:
+            if contenido(funcion()) != esperado:
+                raise SystemExit(f"{nombre} no entrega lo mismo que os.walk")
+
+        print(f"{carpetas} carpetas, {carpetas * args.archivos} archivos, latencia {args.latencia} ms")
+        print(f"{'método':<14} {'seg':>8} {'carpetas/s':>12}")
+        for nombre, funcion in metodos:
+            segundos = medir(funcion, args.repeticiones)
+            print(f"{nombre:<14} {segundos:>8.3f} {carpetas / segundos:>12.0f}")
+    finally:
+        shutil.rmtree(base, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import os
+import json
+import time
+import datetime
+
+from resultados import Estado, Registro
+
+
+# Archivo dentro de `reportes_<fecha>/`
+NOMBRE_BITACORA = "bitacora.jsonl"
+
+
+def _termina_en_salto(ruta):
+    with open(ruta, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+class Bitacora:
+    """
+    Bitácora de sólo-agregar (JSON lines) con cada resultado terminado.
+
+    Se escribe conforme avanza la ejecución y se sincroniza a disco
+    (`fsync`) por lotes: cada `lote` registros o cada `intervalo` segundos.
+    Si el proceso muere (disco desconectado, laptop suspendida), a lo sumo
+    se pierde el último lote y la ejecución se puede reanudar.
+
+    Sólo al reanudar (`continuar`) se agrega a una bitácora existente;
+    una ejecución nueva que encuentra una falla con FileExistsError en vez
+    de mezclar sus registros con los de otra.
+    """
+
+    def __init__(self, report_dir, root_dir, output_dir, lote=200, intervalo=2.0, distribucion=None,
+                 continuar=False):
+        self.ruta = os.path.join(report_dir, NOMBRE_BITACORA)
+        self._lote = lote
+        self._intervalo = intervalo
+        self._pendientes = 0
+        self._ultimo_sync = time.monotonic()
+
+        self._f = open(self.ruta, "a" if continuar else "x", encoding="utf8")
+        if self._f.tell() > 0 and not _termina_en_salto(self.ruta):
+            # Línea cortada por un corte anterior: no pegarle la siguiente
+            self._f.write("\n")
+        self._escribir_linea({
+            "inicio": datetime.datetime.now().isoformat(timespec="seconds"),
+            "origen": root_dir,
+            "destino": output_dir,
+            "distribucion": distribucion,
+        })
+        self.sincronizar()
+
+    def _escribir_linea(self, dato):
+        self._f.write(json.dumps(dato, ensure_ascii=False) + "\n")
+
+    def escribir(self, reg):
+        self._escribir_linea({"r": [reg.nombre, reg.origen, reg.destino, reg.id_monumento,
+                                    reg.id_excavacion, reg.estado.name, reg.detalle]})
+        self._pendientes += 1
+        if self._pendientes >= self._lote or time.monotonic() - self._ultimo_sync >= self._intervalo:
+            self.sincronizar()
+
+    def sincronizar(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._pendientes = 0
+        self._ultimo_sync = time.monotonic()
+
+    def cerrar(self, completo):
+        if completo:
+            self._escribir_linea({"fin": datetime.datetime.now().isoformat(timespec="seconds")})
+        self.sincronizar()
+        self._f.close()
+
+
+def encabezado_bitacora(report_dir):
+    """Primer encabezado (inicio, origen, destino, distribución) de la bitácora; {} si no hay."""
+    ruta = os.path.join(report_dir, NOMBRE_BITACORA)
+    try:
+        with open(ruta, encoding="utf8") as f:
+            for linea in f:
+                try:
+                    dato = json.loads(linea)
+                except ValueError:
+                    continue
+                if "inicio" in dato:
+                    return dato
+    except OSError:
+        pass
+    return {}
+
+
+def leer_bitacora(report_dir):
+    """
+    Registros guardados en la bitácora de `report_dir`, en orden. Una
+    última línea cortada por un corte de luz se ignora.
+    """
+    ruta = os.path.join(report_dir, NOMBRE_BITACORA)
+    if not os.path.exists(ruta):
+        return
+
+    with open(ruta, encoding="utf8") as f:
+        for linea in f:
+            try:
+                dato = json.loads(linea)
+            except ValueError:
+                continue
+            if "r" not in dato:
+                continue
+            nombre, origen, destino, id_m, id_exc, estado, detalle = dato["r"]
+            yield Registro(nombre, origen, destino, id_m, Estado[estado],
+                           detalle=detalle, id_excavacion=id_exc)
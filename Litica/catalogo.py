@@ -0,0 +1,216 @@
+"""
+Catálogo de imágenes por ID de monumento y de excavación.
+
+Consulta el índice de los orígenes (ver `indice.py`), que guarda los IDs
+de cada imagen al escanear: las búsquedas usan los índices de la base y
+no tocan el disco, así que responden en milisegundos aunque haya
+millones de archivos.
+
+    python catalogo.py T3_01234
+    python catalogo.py T3_01234 --rutas
+    python catalogo.py --prefijo T3_
+    python catalogo.py --desde T1_00100 --hasta T1_00200
+    python catalogo.py --excavacion 001_0000001
+    python catalogo.py --escanear E:\\Respaldo --prefijo T1_
+
+Con --escanear primero se pone al día el índice de esas carpetas (sólo
+se vuelven a listar las que cambiaron). Sin --base se usa el mismo
+índice que la aplicación.
+"""
+import os
+import argparse
+
+from indice import IndiceArbol, ruta_por_defecto
+from procesador import ids_de_imagen
+
+# Columna del índice para cada tipo de ID
+CAMPOS = {"monumento": "id_monumento", "excavacion": "id_excavacion"}
+
+# Mayor que cualquier carácter de un ID: [prefijo, prefijo + FIN) es el
+# rango de los IDs que empiezan con `prefijo`
+FIN = "\U0010ffff"
+
+
+def _columna(campo):
+    if campo not in CAMPOS:
+        raise ValueError(f"Campo desconocido: {campo} (usar {', '.join(CAMPOS)})")
+    return CAMPOS[campo]
+
+
+def normalizar(id_):
+    """Los IDs se guardan como aparecen en los nombres ("T3_01234"); se acepta "t3_01234"."""
+    return id_.strip().upper()
+
+
+class Catalogo:
+    """Consultas por ID sobre un `IndiceArbol` armado con `ids_de_imagen`."""
+
+    def __init__(self, indice):
+        self.indice = indice
+
+    def resumen(self, id_, campo="monumento"):
+        """
+        Totales de un ID: {"id", "imagenes", "bytes", "carpetas"}, con
+        carpetas = [(ruta, imágenes, bytes)]. Con campo "monumento" trae
+        también "excavaciones" (cantidad distinta); con "excavacion",
+        "monumentos" (los IDs de monumento en que aparece).
+        """
+        col = _columna(campo)
+        id_ = normalizar(id_)
+        imagenes, total = self.indice.consultar(
+            f"SELECT count(*), coalesce(sum(tamano), 0) FROM archivos WHERE {col} = ?", (id_,))[0]
+        carpetas = self.indice.consultar(
+            f"""
+            SELECT c.ruta, count(*), sum(a.tamano)
+            FROM archivos a JOIN carpetas c ON c.id = a.carpeta
+            WHERE a.{col} = ?
+            GROUP BY a.carpeta ORDER BY c.ruta
+            """, (id_,))
+        datos = {"id": id_, "imagenes": imagenes, "bytes": total, "carpetas": carpetas}
+        if campo == "monumento":
+            datos["excavaciones"] = self.indice.consultar(
+                "SELECT count(DISTINCT id_excavacion) FROM archivos WHERE id_monumento = ?", (id_,))[0][0]
+        else:
+            datos["monumentos"] = [m for (m,) in self.indice.consultar(
+                "SELECT DISTINCT id_monumento FROM archivos WHERE id_excavacion = ? ORDER BY 1", (id_,))]
+        return datos
+
+    def rango(self, desde=None, hasta=None, campo="monumento"):
+        """[(id, imágenes, bytes)] de los IDs entre `desde` y `hasta` (ambos incluidos)."""
+        col = _columna(campo)
+        condiciones, parametros = [f"{col} IS NOT NULL"], []
+        if desde:
+            condiciones.append(f"{col} >= ?")
+            parametros.append(normalizar(desde))
+        if hasta:
+            condiciones.append(f"{col} <= ?")
+            parametros.append(normalizar(hasta))
+        return self.indice.consultar(
+            f"""
+            SELECT {col}, count(*), sum(tamano) FROM archivos
+            WHERE {" AND ".join(condiciones)}
+            GROUP BY {col} ORDER BY {col}
+            """, parametros)
+
+    def prefijo(self, prefijo, campo="monumento"):
+        """[(id, imágenes, bytes)] de los IDs que empiezan con `prefijo` ("T3_", "T3_012")."""
+        col = _columna(campo)
+        prefijo = normalizar(prefijo)
+        return self.indice.consultar(
+            f"""
+            SELECT {col}, count(*), sum(tamano) FROM archivos
+            WHERE {col} >= ? AND {col} < ?
+            GROUP BY {col} ORDER BY {col}
+            """, (prefijo, prefijo + FIN))
+
+    def rutas(self, id_, campo="monumento"):
+        """Rutas completas de las imágenes de un ID."""
+        col = _columna(campo)
+        return [os.path.join(carpeta, nombre) for carpeta, nombre in self.indice.consultar(
+            f"""
+            SELECT c.ruta, a.nombre
+            FROM archivos a JOIN carpetas c ON c.id = a.carpeta
+            WHERE a.{col} = ?
+            ORDER BY c.ruta, a.nombre
+            """, (normalizar(id_),))]
+
+    def totales(self):
+        """(monumentos, excavaciones, imágenes, bytes) de todo el catálogo."""
+        return self.indice.consultar(
+            """
+            SELECT count(DISTINCT id_monumento), count(DISTINCT id_excavacion),
+                   count(*), coalesce(sum(tamano), 0)
+            FROM archivos WHERE id_monumento IS NOT NULL
+            """)[0]
+
+
+# =================================================
+# Texto para la consola y la UI
+# =================================================
+def formato_bytes(n):
+    return f"{n / 2**30:.2f} GB" if n >= 2**30 else f"{n / 2**20:.1f} MB"
+
+
+def lineas_resumen(datos, campo="monumento"):
+    lineas = [f"{datos['id']}: {datos['imagenes']} imágenes, {formato_bytes(datos['bytes'])}"]
+    if not datos["imagenes"]:
+        return lineas
+    if campo == "monumento":
+        lineas.append(f"  Excavaciones: {datos['excavaciones']}")
+    else:
+        lineas.append(f"  Monumentos: {', '.join(datos['monumentos'])}")
+    lineas.append(f"  Carpetas ({len(datos['carpetas'])}):")
+    for ruta, imagenes, total in datos["carpetas"]:
+        lineas.append(f"    {ruta}  —  {imagenes} imágenes, {formato_bytes(total)}")
+    return lineas
+
+
+def lineas_lista(filas):
+    lineas = [f"{id_}: {imagenes} imágenes, {formato_bytes(total)}" for id_, imagenes, total in filas]
+    lineas.append(f"{len(filas)} IDs, {sum(f[1] for f in filas)} imágenes, "
+                  f"{formato_bytes(sum(f[2] for f in filas))}")
+    return lineas
+
+
+def consultar(catalogo, texto, campo="monumento"):
+    """
+    Consulta de una línea, como la escribe el usuario en la UI:
+    "T3_01234" (un ID), "T3_" o "T3_*" (prefijo) y "T1_00100..T1_00200"
+    (rango). Devuelve las líneas a mostrar.
+    """
+    texto = texto.strip()
+    if ".." in texto:
+        desde, hasta = texto.split("..", 1)
+        return lineas_lista(catalogo.rango(desde or None, hasta or None, campo))
+    if texto.endswith("*"):
+        return lineas_lista(catalogo.prefijo(texto[:-1], campo))
+    datos = catalogo.resumen(texto, campo)
+    if datos["imagenes"]:
+        return lineas_resumen(datos, campo)
+    # No es un ID completo: se busca como prefijo
+    filas = catalogo.prefijo(texto, campo)
+    return lineas_lista(filas) if filas else [f"{normalizar(texto)}: sin imágenes en el catálogo"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("id", nargs="?", help="ID de monumento (o de excavación con --excavacion)")
+    parser.add_argument("--excavacion", metavar="ID", help="Buscar por ID de excavación")
+    parser.add_argument("--prefijo", help="IDs que empiezan con este texto")
+    parser.add_argument("--desde", help="Primer ID del rango")
+    parser.add_argument("--hasta", help="Último ID del rango")
+    parser.add_argument("--rutas", action="store_true", help="Listar las rutas de las imágenes del ID")
+    parser.add_argument("--escanear", nargs="+", metavar="ORIGEN", help="Actualizar antes el índice de estas carpetas")
+    parser.add_argument("--base", help="Base del índice (por defecto, la de la aplicación)")
+    args = parser.parse_args()
+
+    indice = IndiceArbol(args.base or ruta_por_defecto("litica"), ids_de_imagen)
+    try:
+        for origen in args.escanear or ():
+            stats = indice.actualizar(origen)
+            print(f"Índice de {origen}: {stats['relistadas']} de {stats['carpetas']} carpetas "
+                  f"relistadas ({stats['segundos']:.2f} s)")
+
+        catalogo = Catalogo(indice)
+        campo = "excavacion" if args.excavacion else "monumento"
+        id_ = args.excavacion or args.id
+        if id_ and args.rutas:
+            lineas = catalogo.rutas(id_, campo)
+        elif id_:
+            lineas = lineas_resumen(catalogo.resumen(id_, campo), campo)
+        elif args.prefijo is not None:
+            lineas = lineas_lista(catalogo.prefijo(args.prefijo))
+        elif args.desde or args.hasta:
+            lineas = lineas_lista(catalogo.rango(args.desde, args.hasta))
+        else:
+            monumentos, excavaciones, imagenes, total = catalogo.totales()
+            lineas = [f"Catálogo: {monumentos} monumentos, {excavaciones} excavaciones, "
+                      f"{imagenes} imágenes, {formato_bytes(total)}"]
+        for linea in lineas:
+            print(linea)
+    finally:
+        indice.cerrar()
+
+
+if __name__ == "__main__":
+    main()
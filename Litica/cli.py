@@ -0,0 +1,257 @@
+"""
+Reorganización de imágenes sin interfaz gráfica, para correrla en el
+servidor de archivos junto a los discos en vez de por SMB desde otra
+máquina.
+
+    python cli.py /srv/respaldo/litica --destino /srv/litica
+    python cli.py /mnt/disco1 /mnt/disco2 --destino /srv/litica --hilos 8
+    python cli.py /srv/respaldo/litica --destino /srv/litica --simular
+    python cli.py /srv/respaldo/litica --destino /mnt/usb --empaquetar zip --reporte csv
+    python cli.py /srv/respaldo/litica --destino /srv/litica --reanudar /srv/litica/reportes_2025-11-16_18-22-40
+
+La salida estándar es JSON-lines: una línea por evento con el campo
+"evento":
+
+    inicio     opciones de la ejecución
+    progreso   encontradas, procesadas, bytes, por_estado, hilos, segundos
+               (a lo sumo una vez por --intervalo)
+    mensaje    texto de `ejecutar_proceso` (con --mensajes)
+    previsto   una imagen de la simulación: origen, destino, id_monumento
+    fin        resumen final y rutas de los reportes
+    error      error fatal
+
+Códigos de salida:
+
+    0    terminó sin errores
+    1    terminó, pero hubo imágenes con ERROR (ver el reporte)
+    2    argumentos inválidos
+    3    error fatal (no se pudo procesar)
+    130  cancelado (Ctrl+C o SIGTERM): los reportes tienen lo ya procesado
+         y la ejecución se puede reanudar con --reanudar
+"""
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import threading
+import collections
+
+from procesador import ejecutar_proceso, simular_proceso, ids_de_imagen, REPORTES, REPORTE
+from distribucion import DISTRIBUCIONES, DISTRIBUCION, MAX_POR_CARPETA
+from empaquetado import FORMATOS
+from indice import IndiceArbol, ruta_por_defecto
+
+# Códigos de salida (argumentos inválidos: 2, el de argparse)
+SALIDA_OK = 0
+SALIDA_CON_ERRORES = 1
+SALIDA_FATAL = 3
+SALIDA_CANCELADO = 130
+
+# Segundos entre dos líneas de progreso
+INTERVALO = 1.0
+
+
+class SalidaJSON:
+    """
+    Escribe los eventos como JSON-lines en `salida`. Los eventos de
+    `ejecutar_proceso` llegan desde varios hilos y se acumulan; la línea de
+    progreso sale como mucho una vez por `intervalo` segundos.
+    """
+
+    def __init__(self, salida=None, intervalo=INTERVALO, mensajes=False):
+        self.salida = salida or sys.stdout
+        self.intervalo = intervalo
+        self.mensajes = mensajes
+        self._lock = threading.Lock()
+        self.inicio = time.monotonic()
+        self._ultimo = 0.0
+        self.encontradas = 0
+        self.escaneo_terminado = False
+        self.procesadas = 0
+        self.bytes = 0
+        self.hilos = {}
+        self.por_estado = collections.Counter()
+
+    def emitir(self, evento, **datos):
+        linea = json.dumps({"evento": evento, **datos}, ensure_ascii=False, default=str)
+        with self._lock:
+            self.salida.write(linea + "\n")
+            self.salida.flush()
+
+    def segundos(self):
+        return round(time.monotonic() - self.inicio, 3)
+
+    def _datos_progreso(self):
+        return dict(encontradas=self.encontradas, escaneo_terminado=self.escaneo_terminado,
+                    procesadas=self.procesadas, bytes=self.bytes, por_estado=dict(self.por_estado),
+                    hilos=dict(self.hilos), segundos=self.segundos())
+
+    def progreso(self):
+        with self._lock:
+            datos = self._datos_progreso()
+        self.emitir("progreso", **datos)
+
+    def evento(self, evento):
+        """`eventos` de `ejecutar_proceso`."""
+        tipo, dato = evento
+        with self._lock:
+            if tipo == "procesada":
+                self.procesadas += 1
+                self.por_estado[dato] += 1
+            elif tipo == "bytes":
+                self.bytes += dato
+            elif tipo == "hilos":
+                dev, n = dato
+                self.hilos[str(dev)] = n
+            elif tipo == "encontradas":
+                self.encontradas = max(self.encontradas, dato)
+            elif tipo == "escaneo_fin":
+                self.encontradas = dato
+                self.escaneo_terminado = True
+            ahora = time.monotonic()
+            if ahora - self._ultimo < self.intervalo:
+                return
+            self._ultimo = ahora
+            datos = self._datos_progreso()
+        self.emitir("progreso", **datos)
+
+    def mensaje(self, texto):
+        """`callback` de `ejecutar_proceso`."""
+        if self.mensajes:
+            self.emitir("mensaje", texto=texto)
+
+
+def crear_parser():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("origen", nargs="+", help="Carpeta(s) origen; en discos distintos se recorren a la vez")
+    parser.add_argument("--destino", required=True, help="Carpeta destino (organizada por monumento)")
+    parser.add_argument("--hilos", type=int, default=0,
+                        help="Hilos de copia por disco (0 = automático, según el tipo de disco)")
+    parser.add_argument("--simular", action="store_true",
+                        help="Sólo mostrar el destino previsto de cada imagen, sin escribir nada")
+    parser.add_argument("--reporte", choices=REPORTES, default=REPORTE,
+                        help="excel = CSV y Excel; csv = sólo el CSV (por defecto: %(default)s)")
+    parser.add_argument("--distribucion", choices=list(DISTRIBUCIONES), default=DISTRIBUCION,
+                        help="Subcarpetas dentro de cada monumento (por defecto: %(default)s)")
+    parser.add_argument("--max-por-carpeta", type=int, default=MAX_POR_CARPETA,
+                        help="Imágenes por cubeta con --distribucion hash (por defecto: %(default)s)")
+    parser.add_argument("--empaquetar", choices=list(FORMATOS), help="Un paquete por monumento en este formato")
+    parser.add_argument("--incremental", action="store_true", help="Omitir imágenes ya copiadas sin cambios")
+    parser.add_argument("--enlazar", action="store_true", help="Reorganizar sin duplicar (reflink / enlace duro)")
+    parser.add_argument("--deduplicar", action="store_true", help="Una sola copia por contenido")
+    parser.add_argument("--verificar", action="store_true", help="Verificar cada copia con una suma de control")
+    parser.add_argument("--reanudar", metavar="CARPETA_REPORTES", help="Reanudar una ejecución cortada")
+    parser.add_argument("--indice", action="store_true",
+                        help="Usar el índice persistente de los orígenes (sólo relista lo que cambió)")
+    parser.add_argument("--base", help="Base del índice (por defecto, la de la aplicación)")
+    parser.add_argument("--intervalo", type=float, default=INTERVALO,
+                        help="Segundos entre líneas de progreso (por defecto: %(default)s)")
+    parser.add_argument("--mensajes", action="store_true", help="Emitir también los mensajes de texto")
+    return parser
+
+
+def simular(args, salida, indice):
+    """Destino previsto de cada imagen, sin escribir nada en el destino."""
+    por_estado = collections.Counter()
+    monumentos = set()
+    for r in simular_proceso(args.origen, args.destino, indice=indice, distribucion=args.distribucion,
+                             max_por_carpeta=args.max_por_carpeta, empaquetar=args.empaquetar):
+        por_estado[r.estado.name] += 1
+        if r.id_monumento:
+            monumentos.add(r.id_monumento)
+        salida.emitir("previsto", origen=r.origen, destino=r.destino, id_monumento=r.id_monumento,
+                      estado=r.estado.name)
+    salida.emitir("fin", simulacion=True, imagenes=sum(por_estado.values()), monumentos=len(monumentos),
+                  por_estado=dict(por_estado), segundos=salida.segundos(), codigo=SALIDA_OK)
+    return SALIDA_OK
+
+
+def ejecutar(args, salida, indice):
+    cancelar = threading.Event()
+
+    def al_cancelar(signum, frame):
+        # La primera señal termina ordenadamente; la segunda corta ya
+        if cancelar.is_set():
+            raise KeyboardInterrupt
+        cancelar.set()
+
+    anteriores = {s: signal.signal(s, al_cancelar) for s in (signal.SIGINT, signal.SIGTERM)}
+    try:
+        csv_path, excel_path = ejecutar_proceso(
+            args.origen,
+            args.destino,
+            callback=salida.mensaje,
+            eventos=salida.evento,
+            cancelar=cancelar,
+            incremental=args.incremental,
+            enlazar=args.enlazar,
+            deduplicar=args.deduplicar,
+            verificar=args.verificar,
+            reanudar=args.reanudar,
+            hilos=args.hilos or None,
+            indice=indice,
+            distribucion=args.distribucion,
+            max_por_carpeta=args.max_por_carpeta,
+            empaquetar=args.empaquetar,
+            reporte=args.reporte,
+        )
+    finally:
+        for s, anterior in anteriores.items():
+            signal.signal(s, anterior)
+
+    salida.progreso()
+    errores = salida.por_estado.get("ERROR", 0)
+    if cancelar.is_set():
+        codigo = SALIDA_CANCELADO
+    elif errores:
+        codigo = SALIDA_CON_ERRORES
+    else:
+        codigo = SALIDA_OK
+    salida.emitir("fin", simulacion=False, cancelado=cancelar.is_set(), procesadas=salida.procesadas,
+                  errores=errores, por_estado=dict(salida.por_estado), bytes=salida.bytes,
+                  reportes=os.path.dirname(csv_path), csv=csv_path, excel=excel_path,
+                  segundos=salida.segundos(), codigo=codigo)
+    return codigo
+
+
+def main(argv=None):
+    parser = crear_parser()
+    args = parser.parse_args(argv)
+    for origen in args.origen:
+        if not os.path.isdir(origen):
+            parser.error(f"la carpeta origen no existe: {origen}")
+    if args.reanudar and not os.path.isdir(args.reanudar):
+        parser.error(f"la carpeta de reportes no existe: {args.reanudar}")
+    if args.hilos < 0:
+        parser.error("--hilos no puede ser negativo")
+
+    salida = SalidaJSON(intervalo=args.intervalo, mensajes=args.mensajes)
+    salida.emitir("inicio", origen=args.origen, destino=args.destino, simulacion=args.simular,
+                  hilos=args.hilos or "auto", distribucion=args.distribucion, empaquetar=args.empaquetar,
+                  reporte=args.reporte, reanudar=args.reanudar)
+    indice = None
+    try:
+        if args.indice or args.base:
+            indice = IndiceArbol(args.base or ruta_por_defecto("litica"), ids_de_imagen)
+        if args.simular:
+            return simular(args, salida, indice)
+        return ejecutar(args, salida, indice)
+    except BrokenPipeError:
+        # Quien lee la salida la cerró (p. ej. `| head`): no hay a quién avisar
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return SALIDA_FATAL
+    except KeyboardInterrupt:
+        salida.emitir("error", texto="Interrumpido", codigo=SALIDA_CANCELADO)
+        return SALIDA_CANCELADO
+    except Exception as e:
+        salida.emitir("error", texto=str(e), tipo=type(e).__name__, codigo=SALIDA_FATAL)
+        return SALIDA_FATAL
+    finally:
+        if indice is not None:
+            indice.cerrar()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
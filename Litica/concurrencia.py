@@ -0,0 +1,128 @@
+import time
+import threading
+import contextlib
+
+
+MB = 1024 * 1024
+
+
+class ControlConcurrencia:
+    """
+    Ajusta en caliente cuántos hilos copian a la vez.
+
+    No hay un número de hilos bueno para todos los discos: en un HDD USB
+    ocho lecturas simultáneas hacen saltar el cabezal de un lado a otro,
+    y de NVMe a un NAS ocho se quedan cortos. Los hilos piden un turno con
+    `turno()`; sólo `nivel` de ellos pueden estar trabajando a la vez.
+
+    Cada `ventana` segundos se mide el rendimiento (MB/s, o archivos/s si
+    en la ventana no se copiaron bytes) y se sube o baja `nivel` por
+    escalada: mientras el rendimiento mejore se sigue en la misma
+    dirección; si empeora, se da la vuelta.
+
+    `al_ajustar(nivel)` se llama (desde un hilo de trabajo) cada vez que
+    cambia el nivel.
+    """
+
+    def __init__(self, minimo=1, maximo=32, inicial=4, ventana=2.0, tolerancia=0.05,
+                 al_ajustar=None):
+        self.minimo = minimo
+        self.maximo = maximo
+        self.nivel = max(minimo, min(maximo, inicial))
+        self.ventana = ventana
+        self.tolerancia = tolerancia
+        self.al_ajustar = al_ajustar
+
+        self._cond = threading.Condition()
+        self._activos = 0
+
+        self._direccion = 1
+        self._anterior = None
+        self._inicio_ventana = time.monotonic()
+        self._archivos = 0
+        self._bytes = 0
+
+        # (segundo de la ejecución, hilos, archivos/s, MB/s) por ventana
+        self.historial = []
+        # métrica ("mb" o "archivos") -> (mejor valor, hilos con que se logró)
+        self.mejor = {}
+        self._inicio = self._inicio_ventana
+
+    @contextlib.contextmanager
+    def turno(self):
+        with self._cond:
+            while self._activos >= self.nivel:
+                self._cond.wait()
+            self._activos += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._activos -= 1
+                self._cond.notify()
+
+    def registrar(self, archivos=0, n_bytes=0):
+        """Suma trabajo terminado; al cerrar una ventana, reajusta el nivel."""
+        with self._cond:
+            self._archivos += archivos
+            self._bytes += n_bytes
+
+            ahora = time.monotonic()
+            transcurrido = ahora - self._inicio_ventana
+            # Ventanas con muy pocos archivos son puro ruido
+            if transcurrido < self.ventana or self._archivos < self.nivel:
+                return
+            nivel_anterior = self.nivel
+            self._ajustar(ahora, transcurrido)
+            nivel = self.nivel
+            if nivel != nivel_anterior:
+                self._cond.notify_all()
+
+        if nivel != nivel_anterior and self.al_ajustar:
+            self.al_ajustar(nivel)
+
+    def _ajustar(self, ahora, transcurrido):
+        archivos_s = self._archivos / transcurrido
+        mb_s = self._bytes / MB / transcurrido
+        self.historial.append((round(ahora - self._inicio, 1), self.nivel,
+                               round(archivos_s, 1), round(mb_s, 1)))
+
+        # Se compara siempre con la misma métrica que la ventana anterior
+        metrica = (mb_s, "mb") if self._bytes else (archivos_s, "archivos")
+        if metrica[0] > self.mejor.get(metrica[1], (0.0, 0))[0]:
+            self.mejor[metrica[1]] = (metrica[0], self.nivel)
+
+        if self._anterior is not None and self._anterior[1] == metrica[1]:
+            if metrica[0] < self._anterior[0] * (1 - self.tolerancia):
+                self._direccion = -self._direccion
+
+        paso = max(1, self.nivel // 4)
+        nuevo = max(self.minimo, min(self.maximo, self.nivel + self._direccion * paso))
+        if nuevo == self.nivel:
+            # Tope alcanzado: probar hacia el otro lado en la siguiente ventana
+            self._direccion = -self._direccion
+        self.nivel = nuevo
+
+        self._anterior = metrica
+        self._inicio_ventana = ahora
+        self._archivos = 0
+        self._bytes = 0
+
+    def informe(self):
+        """Datos para el reporte: nivel final, mejor nivel medido e historial."""
+        with self._cond:
+            if "mb" in self.mejor:
+                valor, nivel = self.mejor["mb"]
+                rendimiento = f"{valor:.1f} MB/s"
+            elif "archivos" in self.mejor:
+                valor, nivel = self.mejor["archivos"]
+                rendimiento = f"{valor:.1f} archivos/s"
+            else:
+                # La ejecución no llegó a cerrar ni una ventana
+                nivel, rendimiento = self.nivel, "sin medir"
+            return {
+                "nivel_final": self.nivel,
+                "mejor_nivel": nivel,
+                "mejor_rendimiento": rendimiento,
+                "historial": list(self.historial),
+            }
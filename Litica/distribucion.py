@@ -0,0 +1,180 @@
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+
+# Cómo se reparten las imágenes dentro de `output_dir`
+DISTRIBUCIONES = {
+    "monumento": "<ID monumento>/imagen",
+    "excavacion": "<ID monumento>/<ID excavación>/imagen",
+    "fecha": "<ID monumento>/<AAAA-MM-DD>/imagen (fecha de modificación del origen)",
+    "hash": "<ID monumento>/<xx>/[<yy>/...]imagen (cubetas por hash del nombre)",
+}
+DISTRIBUCION = "monumento"
+
+# Carpeta de las imágenes sin ID de excavación (distribución "excavacion")
+SIN_EXCAVACION = "sin_excavacion"
+# Imágenes por cubeta en la distribución "hash"; una cubeta llena se
+# reparte en un nivel más de 256 subcubetas
+MAX_POR_CARPETA = 1000
+
+# Descripción de la distribución, en la raíz de `output_dir`
+NOMBRE_DESCRIPCION = "distribucion.json"
+
+
+def _cifra(file_name):
+    return hashlib.blake2b(file_name.encode("utf8"), digest_size=8).hexdigest()
+
+
+class Distribucion:
+    """
+    Ubicación de cada imagen dentro de `output_dir`.
+
+    "monumento" es la distribución plana de siempre. En carpetas con
+    decenas de miles de imágenes los listados y las búsquedas por nombre
+    se vuelven lentos; las demás las reparten en subcarpetas:
+    por excavación, por fecha o en cubetas de a lo sumo `max_por_carpeta`
+    imágenes según el hash del nombre (siempre la misma cubeta para el
+    mismo nombre mientras no se llene).
+
+    Cada destino pertenece a un solo origen. El dueño se decide por la
+    ruta del origen: en esta ejecución, por quién reservó el nombre; entre
+    ejecuciones, por el manifiesto de `output_dir`. Nunca por tamaño y
+    fecha, que dos imágenes distintas pueden compartir.
+    """
+
+    def __init__(self, tipo=DISTRIBUCION, max_por_carpeta=MAX_POR_CARPETA):
+        if tipo not in DISTRIBUCIONES:
+            raise ValueError(f"Distribución desconocida: {tipo} (usar {', '.join(DISTRIBUCIONES)})")
+        self.tipo = tipo
+        self.max_por_carpeta = max_por_carpeta
+        # Imágenes por cubeta ("hash"): se cuentan al tocar cada una por
+        # primera vez y luego se llevan en memoria
+        self._ocupadas = {}
+        # Destinos reservados en esta ejecución: {destino: origen} y
+        # {(output_dir, origen): destino}
+        self._reservados = {}
+        self._asignados = {}
+        self._lock = threading.Lock()
+
+    def descripcion(self):
+        datos = {"distribucion": self.tipo, "patron": DISTRIBUCIONES[self.tipo]}
+        if self.tipo == "hash":
+            datos.update(max_por_carpeta=self.max_por_carpeta, hash="blake2b de 8 bytes del nombre en hexadecimal, 2 caracteres por nivel")
+        return datos
+
+    def carpeta(self, output_dir, file_name, id_monumento, id_excavacion="", st=None):
+        """Carpeta prevista de la imagen (para "hash", su cubeta del primer nivel)."""
+        carpeta = os.path.join(output_dir, id_monumento)
+        if self.tipo == "excavacion":
+            return os.path.join(carpeta, id_excavacion or SIN_EXCAVACION)
+        if self.tipo == "fecha":
+            return os.path.join(carpeta, datetime.date.fromtimestamp(st.st_mtime).isoformat())
+        if self.tipo == "hash":
+            return os.path.join(carpeta, _cifra(file_name)[:2])
+        return carpeta
+
+    def colocar(self, output_dir, file_path, file_name, id_monumento, id_excavacion, st, manifiesto=None):
+        """
+        Crea la carpeta y reserva el destino de la imagen. Devuelve
+        (destino, existia): `existia` es False si el destino es un nombre
+        nuevo (hay que borrarlo si la copia falla).
+
+        Con `manifiesto`, el origen vuelve al destino que ya tenía (si la
+        distribución no cambió), aunque la imagen se haya editado: la copia
+        nueva reemplaza a la anterior. Un nombre de otro origen nunca se
+        pisa: se usa "nombre_2.jpg", "nombre_3.jpg", ... Un archivo que ya
+        estaba en el destino sin dueño registrado (p. ej. de una versión
+        sin manifiesto) se reemplaza, como siempre.
+
+        Dentro de una ejecución, el mismo origen siempre recibe el mismo
+        destino (así un duplicado puede informar dónde quedó su original).
+        """
+        with self._lock:
+            asignado = self._asignados.get((output_dir, file_path))
+        if asignado is not None:
+            return asignado, os.path.exists(asignado)
+        carpeta = self.carpeta(output_dir, file_name, id_monumento, id_excavacion, st)
+        previo = manifiesto.destino_de(file_path) if manifiesto is not None else None
+        if previo and self._dentro(previo, carpeta):
+            with self._lock:
+                if self._duenio(previo, manifiesto) in (None, file_path):
+                    self._reservados[previo] = file_path
+                    self._asignados[output_dir, file_path] = previo
+                    os.makedirs(os.path.dirname(previo), exist_ok=True)
+                    return previo, os.path.exists(previo)
+        if self.tipo == "hash":
+            carpeta = self._cubeta(carpeta, file_name)
+        os.makedirs(carpeta, exist_ok=True)
+        destino, existia = self._reservar(carpeta, file_name, file_path, manifiesto)
+        with self._lock:
+            self._asignados[output_dir, file_path] = destino
+        return destino, existia
+
+    def _dentro(self, destino, carpeta):
+        """True si `destino` corresponde a `carpeta` (en "hash", a ella o a una subcubeta)."""
+        padre = os.path.dirname(destino)
+        if self.tipo == "hash":
+            return padre == carpeta or padre.startswith(carpeta + os.sep)
+        return padre == carpeta
+
+    def _duenio(self, destino, manifiesto):
+        """Origen dueño de `destino` (None si no tiene); se llama con el lock tomado."""
+        duenio = self._reservados.get(destino)
+        if duenio is None and manifiesto is not None:
+            duenio = manifiesto.origen_de(destino)
+        return duenio
+
+    def _reservar(self, carpeta, file_name, origen, manifiesto):
+        """Primer nombre de `carpeta` libre o ya de `origen`: "nombre.jpg", "nombre_2.jpg", ..."""
+        base, ext = os.path.splitext(file_name)
+        n = 1
+        with self._lock:
+            while True:
+                nombre = file_name if n == 1 else f"{base}_{n}{ext}"
+                destino = os.path.join(carpeta, nombre)
+                if self._duenio(destino, manifiesto) in (None, origen):
+                    self._reservados[destino] = origen
+                    return destino, os.path.exists(destino)
+                n += 1
+
+    def _cubeta(self, carpeta, file_name):
+        """
+        Primera cubeta con lugar bajando por los niveles del hash del
+        nombre. Una imagen que ya estaba en una cubeta vuelve a ella por
+        el manifiesto (ver `colocar`).
+        """
+        cifra = _cifra(file_name)
+        for nivel in range(2, len(cifra) + 1, 2):
+            os.makedirs(carpeta, exist_ok=True)
+            with self._lock:
+                if self._contar(carpeta) < self.max_por_carpeta:
+                    self._ocupadas[carpeta] += 1
+                    return carpeta
+            carpeta = os.path.join(carpeta, cifra[nivel:nivel + 2])
+        return carpeta
+
+    def _contar(self, carpeta):
+        if carpeta not in self._ocupadas:
+            with os.scandir(carpeta) as it:
+                self._ocupadas[carpeta] = sum(1 for e in it if not e.is_dir(follow_symlinks=False))
+        return self._ocupadas[carpeta]
+
+    def registrar(self, output_dir):
+        """
+        Escribe la distribución en `output_dir/distribucion.json`, para que
+        otras herramientas sepan dónde buscar. Devuelve la distribución que
+        había antes si era otra (None si no había o es la misma).
+        """
+        ruta = os.path.join(output_dir, NOMBRE_DESCRIPCION)
+        anterior = None
+        try:
+            with open(ruta, encoding="utf8") as f:
+                anterior = json.load(f)
+        except (OSError, ValueError):
+            pass
+        with open(ruta, "w", encoding="utf8") as f:
+            json.dump(self.descripcion(), f, ensure_ascii=False, indent=2)
+        return anterior if anterior and anterior != self.descripcion() else None
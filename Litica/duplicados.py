@@ -0,0 +1,86 @@
+import os
+import hashlib
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from manifiesto import hash_archivo
+
+
+# Bytes que se leen del inicio y del final para el hash parcial
+TAM_PARCIAL = 64 * 1024
+
+
+def hash_parcial(ruta, tamano):
+    """
+    Hash rápido de los primeros y últimos `TAM_PARCIAL` bytes. Si el archivo
+    no pasa de 2 × `TAM_PARCIAL` se lee entero y el resultado coincide con
+    `hash_archivo`.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        if tamano <= 2 * TAM_PARCIAL:
+            h.update(f.read())
+        else:
+            h.update(f.read(TAM_PARCIAL))
+            f.seek(-TAM_PARCIAL, os.SEEK_END)
+            h.update(f.read(TAM_PARCIAL))
+    return h.hexdigest()
+
+
+def _agrupar(rutas, clave, executor):
+    """
+    Agrupa `rutas` por `clave(ruta)` (en paralelo) y devuelve los pares
+    (clave, rutas) con más de un miembro. Las rutas ilegibles se descartan.
+    """
+    def calcular(ruta):
+        try:
+            return ruta, clave(ruta)
+        except OSError:
+            return ruta, None
+
+    grupos = collections.defaultdict(list)
+    for ruta, valor in executor.map(calcular, rutas):
+        if valor is not None:
+            grupos[valor].append(ruta)
+    return [(valor, g) for valor, g in grupos.items() if len(g) > 1]
+
+
+def detectar_duplicados(rutas, hilos=8):
+    """
+    Encuentra imágenes con contenido idéntico.
+
+    Etapas, de la más barata a la más cara:
+      1. agrupar por tamaño (sólo `stat`),
+      2. hash parcial (inicio y final) dentro de cada tamaño repetido,
+      3. hash completo sólo donde el parcial coincide y no cubre el archivo.
+
+    Devuelve una lista de (hash, tamaño, [rutas ordenadas]) con un grupo por
+    contenido repetido.
+    """
+    por_tamano = collections.defaultdict(list)
+    for ruta in rutas:
+        try:
+            tamano = os.path.getsize(ruta)
+        except OSError:
+            continue
+        if tamano > 0:
+            por_tamano[tamano].append(ruta)
+
+    resultado = []
+    with ThreadPoolExecutor(max_workers=hilos) as executor:
+        for tamano, mismas in por_tamano.items():
+            if len(mismas) < 2:
+                continue
+
+            for parcial, grupo in _agrupar(mismas, lambda r: hash_parcial(r, tamano), executor):
+                if tamano <= 2 * TAM_PARCIAL:
+                    # El hash parcial ya leyó el archivo entero
+                    subgrupos = [(parcial, grupo)]
+                else:
+                    subgrupos = _agrupar(grupo, hash_archivo, executor)
+
+                for hash_contenido, subgrupo in subgrupos:
+                    resultado.append((hash_contenido, tamano, sorted(subgrupo)))
+
+    resultado.sort(key=lambda g: g[2][0])
+    return resultado
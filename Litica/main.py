@@ -5,6 +5,9 @@ import shutil
 import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from procesador import Resumen, identificar
+from concurrencia import ControlConcurrencia
+
 # =========================
 # CONFIGURACIÓN
 # =========================
@@ -15,15 +18,6 @@ EXTS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".JPG", ".JPEG")
 
 ID_REGEX = re.compile(r"(T[1-7]_\d{5})")
 
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-fecha_hoy = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-REPORT_DIR = os.path.join(OUTPUT_DIR, f"reportes_{fecha_hoy}")
-os.makedirs(REPORT_DIR, exist_ok=True)
-
-CSV_PATH = os.path.join(REPORT_DIR, "reporte_copiado.csv")
-
 
 # =========================
 # FUNCIÓN: detectar basura de Mac
@@ -63,6 +57,17 @@ def procesar_imagen(file_path):
         return (file_name, file_path, "", id_monumento, f"ERROR: {str(e)}")
 
 
+# =========================
+# FUNCIÓN: procesar respetando el control de hilos
+# =========================
+def procesar_con_control(control, file_path):
+    with control.turno():
+        resultado = procesar_imagen(file_path)
+    copiados = os.path.getsize(file_path) if resultado[4] == "COPIADO" else 0
+    control.registrar(archivos=1, n_bytes=copiados)
+    return resultado
+
+
 # =========================
 # FUNCIÓN: recolectar imágenes
 # =========================
@@ -83,6 +88,13 @@ def recolectar_imagenes():
 # PROCESO PRINCIPAL
 # =========================
 def main():
+    # Las carpetas se crean al ejecutar, no al importar el módulo
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    fecha_hoy = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+    report_dir = os.path.join(OUTPUT_DIR, f"reportes_{fecha_hoy}")
+    os.makedirs(report_dir, exist_ok=True)
+    csv_path = os.path.join(report_dir, "reporte_copiado.csv")
+
     print("\n========== INICIANDO PROCESO ==========\n")
 
     todas_las_imagenes = recolectar_imagenes()
@@ -92,21 +104,25 @@ def main():
     print("Procesando con múltiples hilos...\n")
 
     resultados = []
+    resumen = Resumen()
 
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futuros = {executor.submit(procesar_imagen, ruta): ruta for ruta in todas_las_imagenes}
+    # Los hilos se ajustan solos según el rendimiento medido del disco
+    control = ControlConcurrencia()
+    with ThreadPoolExecutor(max_workers=control.maximo) as executor:
+        futuros = {executor.submit(procesar_con_control, control, ruta): ruta for ruta in todas_las_imagenes}
 
         for future in as_completed(futuros):
             resultado = future.result()
             resultados.append(resultado)
 
             nombre, origen, destino, id_m, estado = resultado
+            resumen.registrar(estado, id_m, identificar(nombre)[1])
             print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] {estado} → {nombre}")
 
     # =========================
     # GENERAR CSV
     # =========================
-    with open(CSV_PATH, mode="w", newline="", encoding="utf-8") as f:
+    with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Archivo", "Ruta Origen", "Ruta Destino", "ID Monumento", "Estado"])
         writer.writerows(resultados)
@@ -117,7 +133,6 @@ def main():
     # GENERAR EXCEL DE RESUMEN (NUEVO)
     # =======================================================
     from openpyxl import Workbook
-    import collections
 
     print("📘 Generando archivo Excel con resumen...")
 
@@ -138,49 +153,47 @@ def main():
     # ------------------------------
     ws2 = wb.create_sheet("resumen_ids")
 
-    # Regex excavación
-    regex_exc = re.compile(r"T[1-7]_\d{5}_(\d{3}_\d{7})")
-
-    # Totales
-    total_imagenes = len([r for r in resultados if r[4] == "COPIADO"])
-    ids_monumento = [r[3] for r in resultados if r[3] != ""]
-    contador_monumento = collections.Counter(ids_monumento)
-
-    # Conteo por excavación
-    ids_excav = []
-    for nombre, origen, destino, id_m, estado in resultados:
-        match = regex_exc.search(nombre)
-        if match:
-            ids_excav.append((id_m, match.group(1)))
-
-    contador_excav = collections.Counter(ids_excav)
-
     # ------------------------------
-    # Escribir resumen
+    # Escribir resumen (los conteos ya se acumularon en `resumen`)
     # ------------------------------
     ws2.append(["Resumen general"])
-    ws2.append(["Total de imágenes procesadas", total_imagenes])
-    ws2.append(["Total de IDs de monumento únicos", len(contador_monumento)])
+    ws2.append(["Total de imágenes procesadas", resumen.total_imagenes])
+    ws2.append(["Total de IDs de monumento únicos", len(resumen.por_monumento)])
     ws2.append([])
     ws2.append(["ID Monumento", "Cantidad de Imágenes"])
 
-    for id_m, count in contador_monumento.items():
+    for id_m, count in resumen.por_monumento.items():
         ws2.append([id_m, count])
 
     ws2.append([])
     ws2.append(["ID Monumento", "ID Excavación", "Cantidad de Imágenes"])
 
-    for (id_m, id_exc), count in contador_excav.items():
+    for (id_m, id_exc), count in resumen.por_excavacion.items():
         ws2.append([id_m, id_exc, count])
 
+    # ------------------------------
+    # Hoja 3: Hilos usados (para comparar entre discos)
+    # ------------------------------
+    rendimiento = control.informe()
+    ws3 = wb.create_sheet("rendimiento")
+    ws3.append(["Hilos de copia (final)", rendimiento["nivel_final"]])
+    ws3.append(["Hilos con mejor rendimiento", rendimiento["mejor_nivel"]])
+    ws3.append(["Mejor rendimiento", rendimiento["mejor_rendimiento"]])
+    ws3.append([])
+    ws3.append(["Segundo", "Hilos", "Archivos/s", "MB/s"])
+    for fila in rendimiento["historial"]:
+        ws3.append(list(fila))
+
     # Guardar Excel
-    excel_path = os.path.join(REPORT_DIR, "reporte_resumen.xlsx")
+    excel_path = os.path.join(report_dir, "reporte_resumen.xlsx")
     wb.save(excel_path)
 
     print(f"📘 Archivo Excel generado en: {excel_path}")
+    print(f"🧵 Hilos de copia: {rendimiento['nivel_final']} "
+          f"(mejor: {rendimiento['mejor_nivel']}, {rendimiento['mejor_rendimiento']})")
 
     print("\n========== PROCESO FINALIZADO ==========")
-    print(f"📄 Reporte CSV: {CSV_PATH}")
+    print(f"📄 Reporte CSV: {csv_path}")
     print(f"📘 Excel: {excel_path}")
     print(f"📂 Carpeta reorganizada en: {OUTPUT_DIR}\n")
 
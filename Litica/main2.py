@@ -5,6 +5,8 @@ import shutil
 import datetime
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from concurrencia import ControlConcurrencia
+
 # =========================
 # CONFIGURACIÓN
 # =========================
@@ -18,19 +20,6 @@ EXTS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".JPG", ".JPEG")
 # Regex para ID de monumento
 ID_REGEX = re.compile(r"(T[1-7]_\d{5})")
 
-# Crear carpeta de salida
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-# Fecha para reportes
-fecha_hoy = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-
-# Carpeta para reportes
-REPORT_DIR = os.path.join(OUTPUT_DIR, f"reportes_{fecha_hoy}")
-os.makedirs(REPORT_DIR, exist_ok=True)
-
-# Archivo CSV del reporte
-CSV_PATH = os.path.join(REPORT_DIR, "reporte_copiado.csv")
-
 # =========================
 # FUNCIÓN PARA PROCESAR UNA SOLA IMAGEN
 # =========================
@@ -66,6 +55,16 @@ def procesar_imagen(file_path):
     except Exception as e:
         return (file_name, file_path, "", id_monumento, f"ERROR: {str(e)}")
 
+# =========================
+# PROCESAR RESPETANDO EL CONTROL DE HILOS
+# =========================
+def procesar_con_control(control, file_path):
+    with control.turno():
+        resultado = procesar_imagen(file_path)
+    copiados = os.path.getsize(file_path) if resultado[4] == "COPIADO" else 0
+    control.registrar(archivos=1, n_bytes=copiados)
+    return resultado
+
 # =========================
 # DETECTOR DE ARCHIVOS MACOS
 # =========================
@@ -96,6 +95,19 @@ def recolectar_imagenes():
 # PROCESO PRINCIPAL
 # =========================
 def main():
+    # Crear carpeta de salida (al ejecutar, no al importar el módulo)
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+
+    # Fecha para reportes
+    fecha_hoy = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+
+    # Carpeta para reportes
+    report_dir = os.path.join(OUTPUT_DIR, f"reportes_{fecha_hoy}")
+    os.makedirs(report_dir, exist_ok=True)
+
+    # Archivo CSV del reporte
+    csv_path = os.path.join(report_dir, "reporte_copiado.csv")
+
     print("\n========== INICIANDO PROCESO ==========\n")
 
     todas_las_imagenes = recolectar_imagenes()
@@ -106,9 +118,10 @@ def main():
 
     resultados = []
 
-    # Pool de hilos
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futuros = {executor.submit(procesar_imagen, ruta): ruta for ruta in todas_las_imagenes}
+    # Pool de hilos: se ajusta solo según el rendimiento medido del disco
+    control = ControlConcurrencia()
+    with ThreadPoolExecutor(max_workers=control.maximo) as executor:
+        futuros = {executor.submit(procesar_con_control, control, ruta): ruta for ruta in todas_las_imagenes}
 
         for future in as_completed(futuros):
             resultado = future.result()
@@ -122,13 +135,29 @@ def main():
     # =========================
     # GENERAR CSV
     # =========================
-    with open(CSV_PATH, mode="w", newline="", encoding="utf-8") as f:
+    with open(csv_path, mode="w", newline="", encoding="utf-8") as f:
         writer = csv.writer(f)
         writer.writerow(["Archivo", "Ruta Origen", "Ruta Destino", "ID Monumento", "Estado"])
         writer.writerows(resultados)
 
+    # =========================
+    # HILOS USADOS (para comparar entre discos)
+    # =========================
+    rendimiento = control.informe()
+    with open(os.path.join(report_dir, "rendimiento.csv"), mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Hilos de copia (final)", rendimiento["nivel_final"]])
+        writer.writerow(["Hilos con mejor rendimiento", rendimiento["mejor_nivel"]])
+        writer.writerow(["Mejor rendimiento", rendimiento["mejor_rendimiento"]])
+        writer.writerow([])
+        writer.writerow(["Segundo", "Hilos", "Archivos/s", "MB/s"])
+        writer.writerows(rendimiento["historial"])
+
+    print(f"🧵 Hilos de copia: {rendimiento['nivel_final']} "
+          f"(mejor: {rendimiento['mejor_nivel']}, {rendimiento['mejor_rendimiento']})")
+
     print("\n========== PROCESO FINALIZADO ==========")
-    print(f"📄 Reporte generado en: {CSV_PATH}")
+    print(f"📄 Reporte generado en: {csv_path}")
     print(f"📂 Carpeta reorganizada en: {OUTPUT_DIR}\n")
 
 
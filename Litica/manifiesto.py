@@ -0,0 +1,111 @@
+import os
+import sqlite3
+import hashlib
+import threading
+
+
+# Archivo SQLite que vive dentro de la carpeta destino
+NOMBRE_MANIFIESTO = ".manifiesto_litica.sqlite"
+
+
+def hash_archivo(ruta, tam_bloque=1024 * 1024):
+    """BLAKE2b (128 bits) del contenido completo de un archivo."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(tam_bloque), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+class Manifiesto:
+    """
+    Registro persistente de las imágenes ya copiadas a un `output_dir`.
+
+    Por cada origen guarda tamaño, mtime (ns), destino y, opcionalmente,
+    un hash del contenido. En una re-ejecución basta con un `os.stat` del
+    origen y una búsqueda por clave primaria para saber si el archivo
+    cambió; el destino no se toca.
+    """
+
+    def __init__(self, output_dir, usar_hash=False, lote=500):
+        self.ruta = os.path.join(output_dir, NOMBRE_MANIFIESTO)
+        self.usar_hash = usar_hash
+        self._lote = lote
+        self._pendientes = 0
+        self._lock = threading.Lock()
+
+        self._con = sqlite3.connect(self.ruta, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        self._con.execute(
+            """
+            CREATE TABLE IF NOT EXISTS archivos (
+                origen   TEXT PRIMARY KEY,
+                tamano   INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                destino  TEXT NOT NULL,
+                hash     TEXT
+            )
+            """
+        )
+        # Dueño de cada destino (ver `distribucion.Distribucion.colocar`)
+        self._con.execute("CREATE INDEX IF NOT EXISTS archivos_destino ON archivos(destino)")
+        self._con.commit()
+
+    def destino_de(self, origen):
+        """Destino registrado de `origen` (None si nunca se copió)."""
+        with self._lock:
+            fila = self._con.execute("SELECT destino FROM archivos WHERE origen = ?", (origen,)).fetchone()
+        return fila[0] if fila else None
+
+    def origen_de(self, destino):
+        """Origen dueño de `destino` (None si no es de nadie)."""
+        with self._lock:
+            fila = self._con.execute("SELECT origen FROM archivos WHERE destino = ?", (destino,)).fetchone()
+        return fila[0] if fila else None
+
+    def sin_cambios(self, origen, st, destino):
+        """True si `origen` ya se copió a `destino` y no ha cambiado desde entonces."""
+        with self._lock:
+            fila = self._con.execute(
+                "SELECT tamano, mtime_ns, destino, hash FROM archivos WHERE origen = ?",
+                (origen,),
+            ).fetchone()
+
+        if fila is None:
+            return False
+
+        tamano, mtime_ns, destino_previo, hash_previo = fila
+        if destino_previo != destino or tamano != st.st_size:
+            return False
+        if mtime_ns == st.st_mtime_ns:
+            return True
+
+        # Mismo tamaño pero otra fecha (p. ej. el origen se restauró de otro
+        # disco): si hay hash guardado, decide el contenido.
+        if self.usar_hash and hash_previo:
+            if hash_archivo(origen) == hash_previo:
+                self.registrar(origen, st, destino, hash_previo)
+                return True
+        return False
+
+    def registrar(self, origen, st, destino, hash_contenido=None):
+        if hash_contenido is None and self.usar_hash:
+            hash_contenido = hash_archivo(origen)
+
+        with self._lock:
+            # Un destino tiene un solo dueño: el último origen copiado ahí
+            self._con.execute("DELETE FROM archivos WHERE destino = ? AND origen != ?", (destino, origen))
+            self._con.execute(
+                "INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?)",
+                (origen, st.st_size, st.st_mtime_ns, destino, hash_contenido),
+            )
+            self._pendientes += 1
+            if self._pendientes >= self._lote:
+                self._con.commit()
+                self._pendientes = 0
+
+    def cerrar(self):
+        with self._lock:
+            self._con.commit()
+            self._con.close()
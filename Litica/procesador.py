@@ -1,87 +1,359 @@
 import os
 import re
 import csv
-import shutil
 import datetime
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Border, Side, Alignment
-from openpyxl.worksheet.table import Table, TableStyleInfo
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.table import Table, TableColumn, TableStyleInfo
 import collections
 
+from copiador import copiar_archivo, clonar_enlazar_o_copiar
+from duplicados import detectar_duplicados
+from manifiesto import Manifiesto
+from verificacion import ManifiestoSumas
+from distribucion import Distribucion, DISTRIBUCION, MAX_POR_CARPETA
+from empaquetado import Paquete, FORMATOS
+from bitacora import Bitacora, leer_bitacora, encabezado_bitacora
+from concurrencia import ControlConcurrencia
+from planificador import (ejecutar_por_dispositivo, registrar_bytes,
+                          agrupar_por_dispositivo)
+from recorrido import recorrer_paralelo
+from resultados import Estado, Registro, Resumen, ResultadosCompactos, ESTADOS_EN_DESTINO
+
 
 EXTS = (".jpg", ".jpeg", ".png", ".tif", ".tiff", ".JPG", ".JPEG")
 ID_REGEX = re.compile(r"(T[1-7]_\d{5})")
 REGEX_EXC = re.compile(r"T[1-7]_\d{5}_(\d{3}_\d{7})")
+# ID de monumento y, si viene a continuación, ID de excavación en una sola búsqueda
+REGEX_IDS = re.compile(r"(T[1-7]_\d{5})(?:_(\d{3}_\d{7}))?")
+
+ENCABEZADOS = ["Archivo", "Ruta Origen", "Ruta Destino", "ID Monumento", "Estado"]
+
+# Reportes de una ejecución: "excel" = CSV + Excel; "csv" = sólo el CSV
+# (con millones de imágenes el Excel tarda y puede superar el límite de filas)
+REPORTES = ("excel", "csv")
+REPORTE = "excel"
+
+# Tamaño máximo de las colas del pipeline (rutas pendientes por disco y
+# resultados). Acota la memoria sin importar cuántas imágenes tenga el árbol.
+TAM_COLA = 256
 
 
 def es_archivo_macos(nombre_archivo):
     return nombre_archivo.startswith("._")
 
 
-def recolectar_imagenes(root_dir):
-    rutas = []
-    for current_path, dirs, files in os.walk(root_dir):
-        for file in files:
-            if es_archivo_macos(file):
-                continue
+def raices(root_dir):
+    """`root_dir` puede ser una carpeta o una lista de carpetas origen."""
+    return [root_dir] if isinstance(root_dir, (str, os.PathLike)) else list(root_dir)
 
-            if file.endswith(EXTS):
-                rutas.append(os.path.join(current_path, file))
-    return rutas
 
+def iterar_imagenes(root_dir, indice=None):
+    """
+    Genera las rutas de imágenes válidas a medida que se recorre el árbol
+    (o los árboles), carpeta por carpeta y en orden de inodo. Las carpetas
+    se listan en paralelo salvo en discos de platos (ver `recorrido`).
 
-def procesar_imagen(file_path, output_dir):
-    file_name = os.path.basename(file_path)
+    Con `indice` (un `IndiceArbol`) primero se pone al día el índice, que
+    sólo vuelve a listar las carpetas que cambiaron, y las rutas salen de él.
+    """
+    for raiz in raices(root_dir):
+        if indice is not None:
+            indice.actualizar(raiz)
+            recorrido = indice.recorrer(raiz)
+        else:
+            recorrido = recorrer_paralelo(raiz)
+        for current_path, dirs, files in recorrido:
+            for file in files:
+                if es_archivo_macos(file):
+                    continue
 
-    if es_archivo_macos(file_name):
-        return (file_name, file_path, "", "", "IGNORADO_MACOS")
+                if file.endswith(EXTS):
+                    yield os.path.join(current_path, file)
+
+
+def recolectar_imagenes(root_dir, indice=None):
+    return list(iterar_imagenes(root_dir, indice))
 
-    if not file_name.endswith(EXTS):
-        return (file_name, file_path, "", "", "EXT_NO_VALIDO")
 
-    match = ID_REGEX.search(file_name)
+def identificar(file_name):
+    """(id_monumento, id_excavacion) de un nombre de archivo; "" si no aparecen."""
+    match = REGEX_IDS.search(file_name)
     if not match:
-        return (file_name, file_path, "", "", "ID_NO_ENCONTRADO")
+        return "", ""
+    return match.group(1), match.group(2) or ""
+
+
+def ids_de_imagen(file_name):
+    """Como `identificar`, pero sólo para imágenes válidas (lo que se copia)."""
+    if es_archivo_macos(file_name) or not file_name.endswith(EXTS):
+        return "", ""
+    return identificar(file_name)
+
+
+def ruta_destino(file_name, output_dir, id_monumento=None, distribucion=None, st=None):
+    """
+    (carpeta_destino, destino) previstos de una imagen con ID de monumento.
+    El destino real puede llevar un sufijo si el nombre ya estaba ocupado
+    por otra imagen, o estar en una cubeta más profunda (ver `distribucion`).
+    """
+    id_encontrado, id_excavacion = identificar(file_name)
+    if id_monumento is None:
+        id_monumento = id_encontrado
+    if distribucion is None:
+        carpeta_destino = os.path.join(output_dir, id_monumento)
+    else:
+        carpeta_destino = distribucion.carpeta(output_dir, file_name, id_monumento, id_excavacion, st)
+    return carpeta_destino, os.path.join(carpeta_destino, file_name)
+
+
+def original_de_grupo(rutas):
+    """De un grupo de duplicados se copia la primera ruta cuyo nombre tenga ID."""
+    return next((r for r in rutas if identificar(os.path.basename(r))[0]), None)
+
+
+def mapa_duplicados(grupos):
+    """{ruta duplicada: ruta que se copia} a partir de `detectar_duplicados`."""
+    duplicado_de = {}
+    for hash_contenido, tamano, rutas in grupos:
+        original = original_de_grupo(rutas)
+        if original is None:
+            continue
+        for ruta in rutas:
+            if ruta != original:
+                duplicado_de[ruta] = original
+    return duplicado_de
+
+
+class _Duplicados:
+    """
+    Decide qué informar de cada duplicado una vez conocido el resultado de
+    la imagen que se copia por él (su "original"): DUPLICADO con el destino
+    real de esa copia. Si la copia del original falla, se copia en su lugar
+    el siguiente duplicado del grupo, y así hasta que uno quede bien.
+
+    `anteriores` ({origen: Registro}) son los resultados de la ejecución
+    que se reanuda: si el original ya quedó copiado, sus duplicados se
+    resuelven con ese destino.
+    """
+
+    def __init__(self, duplicado_de, anteriores, copiar):
+        self.duplicado_de = duplicado_de
+        self._copiar = copiar
+        # Sólo se guarda algo de los originales, no de todas las imágenes:
+        # {original: Registro de la copia física del grupo},
+        # {original: duplicados que esperan} y originales que fallaron
+        self._originales = set(duplicado_de.values())
+        self._copias = {}
+        self._esperando = collections.defaultdict(list)
+        self._fallidos = set()
+        for ruta, r in (anteriores or {}).items():
+            original = self.duplicado_de.get(ruta, ruta)
+            if original in self._originales and r.estado.name in ESTADOS_EN_DESTINO:
+                self._copias.setdefault(original, r)
+
+    def resultado(self, r):
+        """Registros a entregar por el resultado `r` de una imagen del flujo."""
+        original = self.duplicado_de.get(r.origen)
+        if original is not None:
+            # Un duplicado no se procesa en los hilos: espera a su original
+            return self._resolver(original, [r.origen])
+        if r.origen not in self._originales:
+            return [r]
+        if r.estado.name in ESTADOS_EN_DESTINO:
+            self._copias.setdefault(r.origen, r)
+        else:
+            self._fallidos.add(r.origen)
+        return [r] + self._resolver(r.origen, [])
+
+    def pendientes(self):
+        """Al terminar el flujo: los duplicados cuyo original no apareció se copian."""
+        registros = []
+        for original in list(self._esperando):
+            self._fallidos.add(original)
+            registros += self._resolver(original, [])
+        return registros
+
+    def _resolver(self, original, nuevos):
+        esperando = self._esperando[original]
+        esperando += nuevos
+        registros = []
+        while esperando:
+            copia = self._copias.get(original)
+            if copia is not None:
+                registros += [self._duplicado(ruta, copia) for ruta in esperando]
+                esperando.clear()
+            elif original in self._fallidos:
+                # El original no quedó copiado: el siguiente ocupa su lugar
+                r = self._copiar(esperando.pop(0))
+                if r.estado.name in ESTADOS_EN_DESTINO:
+                    self._copias[original] = r
+                registros.append(r)
+            else:
+                break
+        if not esperando:
+            del self._esperando[original]
+        return registros
+
+    @staticmethod
+    def _duplicado(ruta, copia):
+        nombre = os.path.basename(ruta)
+        id_monumento, id_excavacion = identificar(nombre)
+        return Registro(nombre, ruta, copia.destino, id_monumento, Estado.DUPLICADO,
+                        id_excavacion=id_excavacion)
+
+
+# Distribución por defecto: output_dir/<ID>/imagen
+_PLANA = Distribucion()
+
+
+def procesar_imagen(file_path, output_dir, manifiesto=None, progreso=None, enlazar=False,
+                    resumen=None, sumas=None, distribucion=None, incremental=True):
+    """
+    Coloca una imagen en `output_dir` según la `distribucion` (por defecto
+    `output_dir/<ID>/`) y devuelve su `Registro`.
+    Con `manifiesto` cada origen vuelve a su destino anterior; con
+    `incremental`, además, lo que no cambió no se vuelve a copiar.
+    Si se pasa un `Resumen`, se alimenta con este archivo.
+    Con `sumas` (un `ManifiestoSumas`) cada copia se verifica y su suma se
+    anota; si no coincide, el estado es ERROR.
+    """
+    file_name = os.path.basename(file_path)
+    id_monumento, id_excavacion = identificar(file_name)
 
-    id_monumento = match.group(1)
-    carpeta_destino = os.path.join(output_dir, id_monumento)
-    os.makedirs(carpeta_destino, exist_ok=True)
+    r = _colocar_imagen(file_path, file_name, id_monumento, id_excavacion, output_dir,
+                        manifiesto, progreso, enlazar, sumas,
+                        distribucion or _PLANA, incremental)
+    r.id_excavacion = id_excavacion
+    if resumen is not None:
+        resumen.registrar(r.texto_estado, r.id_monumento, id_excavacion)
+    return r
 
-    destino = os.path.join(carpeta_destino, file_name)
 
-    try:
-        shutil.copy2(file_path, destino)
-        return (file_name, file_path, destino, id_monumento, "COPIADO")
-    except Exception as e:
-        return (file_name, file_path, "", id_monumento, f"ERROR: {str(e)}")
+def _colocar_imagen(file_path, file_name, id_monumento, id_excavacion, output_dir,
+                    manifiesto, progreso, enlazar, sumas, distribucion, incremental):
+    if es_archivo_macos(file_name):
+        return Registro(file_name, file_path, "", "", Estado.IGNORADO_MACOS)
 
+    if not file_name.endswith(EXTS):
+        return Registro(file_name, file_path, "", "", Estado.EXT_NO_VALIDO)
 
-def generar_excel(resultados, report_dir):
+    if not id_monumento:
+        return Registro(file_name, file_path, "", "", Estado.ID_NO_ENCONTRADO)
+
+    destino, nuevo = "", False
+    try:
+        st = os.stat(file_path)
+        # El origen vuelve a su destino anterior; un nombre de otra imagen
+        # nunca se pisa: se usa "nombre_2.jpg"
+        destino, existia = distribucion.colocar(output_dir, file_path, file_name,
+                                                id_monumento, id_excavacion, st, manifiesto)
+        nuevo = not existia
+        if incremental and manifiesto is not None and existia and manifiesto.sin_cambios(file_path, st, destino):
+            return Registro(file_name, file_path, destino, id_monumento, Estado.SIN_CAMBIOS)
+
+        if enlazar:
+            # Mismo disco: reflink o enlace duro en vez de duplicar los datos
+            estado = Estado[clonar_enlazar_o_copiar(file_path, destino, progreso=progreso)]
+        elif sumas is not None:
+            sumas.copiar(file_path, destino, progreso=progreso)
+            estado = Estado.COPIADO
+        else:
+            copiar_archivo(file_path, destino, progreso=progreso)
+            estado = Estado.COPIADO
+
+        if manifiesto is not None:
+            manifiesto.registrar(file_path, st, destino)
+        return Registro(file_name, file_path, destino, id_monumento, estado)
+    except Exception as e:
+        if nuevo:
+            # No dejar el nombre reservado (vacío o a medio copiar)
+            try:
+                os.remove(destino)
+            except OSError:
+                pass
+        return Registro(file_name, file_path, "", id_monumento, Estado.ERROR, detalle=str(e))
+
+
+class AnchosColumnas:
+    """
+    Ancho máximo de texto por columna, acumulado mientras se producen las
+    filas. En modo `write_only` los anchos deben fijarse antes de escribir
+    la primera fila, así que se calculan durante la ejecución y no con una
+    segunda pasada sobre la hoja.
+    """
+
+    def __init__(self, encabezados):
+        self.maximos = [len(str(h)) for h in encabezados]
+
+    def observar(self, fila):
+        for i, valor in enumerate(fila):
+            n = len(str(valor)) if valor else 0
+            if n > self.maximos[i]:
+                self.maximos[i] = n
+
+    def aplicar(self, ws):
+        for i, max_len in enumerate(self.maximos, start=1):
+            ws.column_dimensions[get_column_letter(i)].width = max_len + 2
+
+
+def _encabezado(ws, valores, font, fill):
+    celdas = []
+    for valor in valores:
+        cell = WriteOnlyCell(ws, value=valor)
+        cell.font = font
+        cell.fill = fill
+        celdas.append(cell)
+    return celdas
+
+
+def generar_excel(resultados, report_dir, duplicados=None, anchos=None, resumen=None,
+                  rendimiento=None, distribucion=None):
+    """
+    Escribe `reporte_resumen.xlsx` en modo `write_only`: las filas van
+    directo a disco sin armar el libro en memoria.
+
+    `resultados` se recorre una sola vez: `ResultadosCompactos.filas()` o
+    cualquier iterable de filas (p. ej. `leer_reporte_csv`).
+    `anchos` y `resumen` se alimentan durante la ejecución; si no se pasa
+    `resumen`, se calcula en la misma pasada sobre `resultados`.
+    `rendimiento`, lista de (carpetas origen de un disco, informe de
+    `ControlConcurrencia.informe`), agrega la hoja "rendimiento" con los
+    hilos usados en cada disco.
+    `distribucion` (`Distribucion.descripcion()`) se anota en "resumen_ids".
+    """
     excel_path = os.path.join(report_dir, "reporte_resumen.xlsx")
-    wb = Workbook()
+    wb = Workbook(write_only=True)
+
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill("solid", fgColor="4F81BD")
 
     # =================================================
     # Hoja 1
     # =================================================
-    ws1 = wb.active
-    ws1.title = "reporte_copiado"
+    ws1 = wb.create_sheet("reporte_copiado")
+    if anchos is not None:
+        anchos.aplicar(ws1)
+
+    ws1.append(_encabezado(ws1, ENCABEZADOS, header_font, header_fill))
 
-    headers = ["Archivo", "Ruta Origen", "Ruta Destino", "ID Monumento", "Estado"]
-    ws1.append(headers)
+    calcular_resumen = resumen is None
+    if calcular_resumen:
+        resumen = Resumen()
 
+    filas = 0
     for row in resultados:
         ws1.append(list(row))
+        filas += 1
 
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4F81BD")
-
-    for col in range(1, len(headers) + 1):
-        cell = ws1.cell(row=1, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
+        if calcular_resumen:
+            nombre, origen, destino, id_m, estado = row
+            resumen.registrar(estado, id_m, identificar(nombre)[1] if id_m else "")
 
-    tabla = Table(displayName="ReporteCopiado", ref=f"A1:E{len(resultados)+1}")
+    # La tabla se escribe al cerrar la hoja, cuando ya se conoce el rango
+    tabla = Table(displayName="ReporteCopiado", ref=f"A1:E{filas+1}")
     estilo_tabla = TableStyleInfo(
         name="TableStyleMedium9",
         showFirstColumn=False,
@@ -90,78 +362,475 @@ def generar_excel(resultados, report_dir):
         showColumnStripes=False,
     )
     tabla.tableStyleInfo = estilo_tabla
+    # En write_only openpyxl no lee los encabezados de la hoja: las columnas
+    # de la tabla se declaran a mano
+    tabla.tableColumns = [TableColumn(id=i, name=nombre) for i, nombre in enumerate(ENCABEZADOS, 1)]
     ws1.add_table(tabla)
 
-    for col in ws1.columns:
-        max_len = max(len(str(c.value)) for c in col if c.value)
-        ws1.column_dimensions[col[0].column_letter].width = max_len + 2
-
     # =================================================
     # Resumen (Hoja 2)
     # =================================================
     ws2 = wb.create_sheet("resumen_ids")
 
-    total_imagenes = len([r for r in resultados if r[4] == "COPIADO"])
-    ids_monumento = [r[3] for r in resultados if r[3] != ""]
-    contador_monumento = collections.Counter(ids_monumento)
-
-    ids_excav = []
-    for nombre, origen, destino, id_m, estado in resultados:
-        match = REGEX_EXC.search(nombre)
-        if match:
-            ids_excav.append((id_m, match.group(1)))
-
-    contador_excav = collections.Counter(ids_excav)
-
     ws2.append(["Resumen"])
-    ws2.append(["Total imágenes procesadas", total_imagenes])
-    ws2.append(["Total IDs monumento", len(contador_monumento)])
+    ws2.append(["Total imágenes procesadas", resumen.total_imagenes])
+    ws2.append(["Total IDs monumento", len(resumen.por_monumento)])
+    if distribucion:
+        ws2.append(["Distribución de salida", distribucion["distribucion"], distribucion["patron"]])
+        if "max_por_carpeta" in distribucion:
+            ws2.append(["Máximo de imágenes por carpeta", distribucion["max_por_carpeta"]])
     ws2.append([])
 
     ws2.append(["ID Monumento", "Cantidad"])
-    for id_m, count in contador_monumento.items():
+    for id_m, count in resumen.por_monumento.items():
         ws2.append([id_m, count])
 
     ws2.append([])
     ws2.append(["ID Monumento", "ID Excavación", "Cantidad"])
-    for (id_m, id_exc), count in contador_excav.items():
+    for (id_m, id_exc), count in resumen.por_excavacion.items():
         ws2.append([id_m, id_exc, count])
 
+    # =================================================
+    # Duplicados (Hoja 3)
+    # =================================================
+    if duplicados:
+        ws3 = wb.create_sheet("duplicados")
+        encabezados_dup = ["Grupo", "Hash", "Tamaño (bytes)", "Ruta Origen", "Copia física"]
+
+        anchos_dup = AnchosColumnas(encabezados_dup)
+        for hash_contenido, tamano, rutas in duplicados:
+            for ruta in rutas:
+                anchos_dup.observar(["", hash_contenido, tamano, ruta, ""])
+        anchos_dup.aplicar(ws3)
+
+        ws3.append(_encabezado(ws3, encabezados_dup, header_font, header_fill))
+        for grupo, (hash_contenido, tamano, rutas) in enumerate(duplicados, start=1):
+            copiada = original_de_grupo(rutas)
+            for ruta in rutas:
+                ws3.append([grupo, hash_contenido, tamano, ruta, "Sí" if ruta == copiada else ""])
+
+    # =================================================
+    # Rendimiento
+    # =================================================
+    if rendimiento:
+        ws4 = wb.create_sheet("rendimiento")
+        for disco, informe in rendimiento:
+            ws4.append(_encabezado(ws4, ["Disco", disco], header_font, header_fill))
+            ws4.append(["Hilos de copia (final)", informe["nivel_final"]])
+            if "mejor_nivel" in informe:
+                ws4.append(["Hilos con mejor rendimiento", informe["mejor_nivel"]])
+                ws4.append(["Mejor rendimiento", informe["mejor_rendimiento"]])
+                ws4.append(["Segundo", "Hilos", "Archivos/s", "MB/s"])
+                for fila in informe["historial"]:
+                    ws4.append(list(fila))
+            ws4.append([])
+
     wb.save(excel_path)
     return excel_path
 
 
-def ejecutar_proceso(root_dir, output_dir, callback=None):
-    """Callback = función para mandar mensajes a la UI."""
+def leer_reporte_csv(csv_path):
+    """Relee un `reporte_copiado.csv` fila por fila (sin encabezado)."""
+    with open(csv_path, newline="", encoding="utf8") as f:
+        lector = csv.reader(f)
+        next(lector, None)
+        for fila in lector:
+            yield tuple(fila)
+
+
+def procesar_en_flujo(root_dir, output_dir, max_workers=None, tam_cola=TAM_COLA, eventos=None,
+                      omitir=None, crear_control=None, indice=None, duplicado_de=None, **opciones):
+    """
+    Pipeline escaneo → copia en streaming.
+
+    Cada carpeta origen se recorre en su propio hilo y va llenando la cola
+    acotada de su disco físico; cada disco tiene sus propios hilos de copia
+    (`max_workers` por disco, o según el tipo de disco si es None), que
+    trabajan mientras el recorrido sigue (ver `planificador`). Los
+    resultados se entregan uno a uno conforme terminan, por lo que la
+    memoria no crece con el tamaño del árbol.
+
+    `eventos(evento)` recibe ("encontradas", n) durante el recorrido y
+    ("escaneo_fin", n) al terminarlo. Las rutas en `omitir` ({ruta:
+    Registro} ya terminados en una ejecución anterior) no se encolan ni se
+    cuentan.
+    `crear_control(dev, hilos)` puede dar un `ControlConcurrencia` por disco.
+    Con `indice` las rutas salen del índice (ver `iterar_imagenes`).
+    `duplicado_de` ({duplicado: original}, ver `mapa_duplicados`): los
+    duplicados no se copian y se entregan después del resultado de su
+    original (ver `_Duplicados`).
+    `opciones` se pasan tal cual a `procesar_imagen`.
+    """
+    def imagenes(raiz):
+        for ruta in iterar_imagenes(raiz, indice):
+            if not (omitir and ruta in omitir):
+                yield ruta
+
+    def copiar(ruta):
+        try:
+            return procesar_imagen(ruta, output_dir, **opciones)
+        except Exception as e:
+            return Registro(os.path.basename(ruta), ruta, "", "", Estado.ERROR, detalle=str(e))
+
+    duplicados = _Duplicados(duplicado_de or {}, omitir, copiar)
+
+    def trabajar(ruta):
+        if ruta in duplicados.duplicado_de:
+            # Se resuelve al conocer el resultado de su original
+            return Registro(os.path.basename(ruta), ruta, "", "", Estado.DUPLICADO)
+        return copiar(ruta)
+
+    fuentes = [(raiz, imagenes(raiz)) for raiz in raices(root_dir)]
+    for r in ejecutar_por_dispositivo(fuentes, trabajar, hilos=max_workers, tam_cola=tam_cola,
+                                      crear_control=crear_control, eventos=eventos):
+        yield from duplicados.resultado(r)
+    yield from duplicados.pendientes()
+
+
+def empaquetar_en_flujo(root_dir, output_dir, formato, max_workers=None, eventos=None,
+                        omitir=None, crear_control=None, indice=None, progreso=None):
+    """
+    Pipeline de empaquetado: un paquete por monumento
+    (`output_dir/<ID>.zip`, `.tar` o `.tar.zst`, ver `empaquetado`) en vez
+    de un archivo suelto por imagen.
+
+    Hay que conocer todas las imágenes de un monumento antes de cerrar su
+    paquete, así que primero se recorre el árbol completo (con `indice`,
+    casi sin tocar el disco). Cada monumento lo escribe de principio a fin
+    un solo hilo de copia, leyendo cada imagen directo al paquete; los
+    monumentos se reparten entre los hilos del disco destino, del más
+    grande al más chico. Los registros de un monumento se entregan cuando
+    su paquete quedó completo, así que al reanudar un monumento con
+    registros en `omitir` ya está empaquetado y se omite entero
+    (`ejecutar_proceso` no pone en `omitir` los de un monumento con errores).
+    """
+    por_monumento = collections.defaultdict(list)
+    hechos = set()
+    encontradas = 0
+    for ruta in iterar_imagenes(root_dir, indice):
+        file_name = os.path.basename(ruta)
+        id_monumento = identificar(file_name)[0]
+        if omitir and ruta in omitir:
+            hechos.add(id_monumento)
+            continue
+        encontradas += 1
+        if eventos and encontradas % 256 == 0:
+            eventos(("encontradas", encontradas))
+        if not id_monumento:
+            yield Registro(file_name, ruta, "", "", Estado.ID_NO_ENCONTRADO)
+        else:
+            por_monumento[id_monumento].append(ruta)
+    for id_monumento in hechos:
+        encontradas -= len(por_monumento.pop(id_monumento, ()))
+    if eventos:
+        eventos(("escaneo_fin", encontradas))
+
+    def empaquetar(id_monumento):
+        rutas = por_monumento.pop(id_monumento)
+        ruta_paquete = os.path.join(output_dir, id_monumento + FORMATOS[formato])
+        try:
+            paquete = Paquete(ruta_paquete, formato)
+        except Exception as e:
+            return [Registro(os.path.basename(r), r, "", id_monumento, Estado.ERROR, detalle=str(e))
+                    for r in rutas]
+
+        registros = []
+        usados = set()
+        for ruta in rutas:
+            file_name = os.path.basename(ruta)
+            # Dentro del paquete tampoco se pisa un nombre repetido
+            base, ext = os.path.splitext(file_name)
+            nombre, n = file_name, 1
+            while nombre in usados:
+                n += 1
+                nombre = f"{base}_{n}{ext}"
+            try:
+                paquete.agregar(ruta, f"{id_monumento}/{nombre}", progreso=progreso)
+                usados.add(nombre)
+                registros.append(Registro(file_name, ruta, os.path.join(ruta_paquete, id_monumento, nombre),
+                                          id_monumento, Estado.EMPAQUETADO))
+            except Exception as e:
+                registros.append(Registro(file_name, ruta, "", id_monumento, Estado.ERROR, detalle=str(e)))
+        if not paquete.cerrar():
+            detalle = f"paquete {ruta_paquete} descartado por un error de escritura"
+            registros = [r if r.estado is Estado.ERROR else
+                         Registro(r.nombre, r.origen, "", id_monumento, Estado.ERROR, detalle=detalle)
+                         for r in registros]
+        for r in registros:
+            r.id_excavacion = identificar(r.nombre)[1]
+        return registros
+
+    monumentos = sorted(por_monumento, key=lambda m: len(por_monumento[m]), reverse=True)
+    for registros in ejecutar_por_dispositivo([(output_dir, monumentos)], empaquetar, hilos=max_workers,
+                                              crear_control=crear_control):
+        yield from registros
+
+
+def nueva_carpeta_reportes(output_dir):
+    """
+    Crea `output_dir/reportes_<fecha>` para esta ejecución. Si otra
+    ejecución empezó en el mismo segundo, se usa `reportes_<fecha>_2`,
+    `_3`, ...: dos ejecuciones nunca comparten bitácora.
+    """
+    os.makedirs(output_dir, exist_ok=True)
     fecha_hoy = datetime.datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-    report_dir = os.path.join(output_dir, f"reportes_{fecha_hoy}")
-    os.makedirs(report_dir, exist_ok=True)
+    n = 1
+    while True:
+        report_dir = os.path.join(output_dir, f"reportes_{fecha_hoy}" + (f"_{n}" if n > 1 else ""))
+        try:
+            os.mkdir(report_dir)
+            return report_dir
+        except FileExistsError:
+            n += 1
+
+
+def simular_proceso(root_dir, output_dir, indice=None, distribucion=DISTRIBUCION,
+                    max_por_carpeta=MAX_POR_CARPETA, empaquetar=None):
+    """
+    Simulación de `ejecutar_proceso`: recorre el origen y entrega el
+    `Registro` de cada imagen con su destino previsto (estado PREVISTO),
+    sin crear ni escribir nada en `output_dir`. El destino real puede
+    llevar un sufijo si el nombre ya está ocupado (ver `ruta_destino`).
+    """
+    if empaquetar and empaquetar not in FORMATOS:
+        raise ValueError(f"Formato de paquete desconocido: {empaquetar} (usar {', '.join(FORMATOS)})")
+    distribucion = Distribucion(distribucion, max_por_carpeta)
+    for ruta in iterar_imagenes(root_dir, indice):
+        file_name = os.path.basename(ruta)
+        id_monumento, id_excavacion = identificar(file_name)
+        if not id_monumento:
+            yield Registro(file_name, ruta, "", "", Estado.ID_NO_ENCONTRADO)
+            continue
+        if empaquetar:
+            destino = os.path.join(output_dir, id_monumento + FORMATOS[empaquetar], id_monumento, file_name)
+        else:
+            # Sólo la distribución por fecha necesita la fecha del origen
+            st = os.stat(ruta) if distribucion.tipo == "fecha" else None
+            destino = ruta_destino(file_name, output_dir, id_monumento, distribucion, st)[1]
+        yield Registro(file_name, ruta, destino, id_monumento, Estado.PREVISTO, id_excavacion=id_excavacion)
+
+
+def ejecutar_proceso(root_dir, output_dir, callback=None, incremental=False, verificar_hash=False,
+                     enlazar=False, deduplicar=False, resumen=None, eventos=None, cancelar=None,
+                     reanudar=None, hilos=None, verificar=False, indice=None,
+                     distribucion=DISTRIBUCION, max_por_carpeta=MAX_POR_CARPETA, empaquetar=None,
+                     reporte=REPORTE):
+    """
+    Callback = función para mandar mensajes a la UI.
+
+    root_dir: carpeta origen o lista de carpetas; las que están en discos
+    distintos se recorren y copian a la vez, cada disco con sus hilos.
+
+    incremental: consulta el manifiesto de `output_dir` y omite (estado
+    SIN_CAMBIOS) las imágenes que ya se copiaron y no han cambiado. El
+    manifiesto se actualiza siempre: con él cada origen vuelve a su
+    destino anterior (una imagen editada reemplaza su copia vieja).
+    verificar_hash: guarda además el hash del contenido, para reconocer
+    archivos idénticos aunque su fecha de modificación haya cambiado.
+    enlazar: reorganizar sin duplicar datos (reflink, luego enlace duro y,
+    si no se puede, copia). El Estado del CSV indica el método usado.
+    deduplicar: antes de copiar busca imágenes con contenido idéntico
+    (tamaño → hash parcial → hash completo); sólo se escribe una copia y
+    las demás quedan como DUPLICADO, listadas en la hoja "duplicados".
+    Requiere recorrer el árbol completo antes de empezar a copiar.
+    resumen: `Resumen` a alimentar; pasar uno propio permite leer los
+    conteos en vivo desde otro hilo mientras corre el proceso.
+    eventos: función que recibe eventos de progreso estructurados, pensada
+    para alimentar una cola de la UI: ("encontradas", n), ("escaneo_fin", n),
+    ("bytes", n) y ("procesada", estado) por cada imagen terminada.
+    cancelar: `threading.Event`; al activarse deja de tomar imágenes nuevas,
+    espera las que están en curso y escribe los reportes con lo hecho.
+    reanudar: carpeta `reportes_<fecha>` de una ejecución interrumpida. Se
+    cargan los resultados de su bitácora, se omiten las imágenes ya
+    terminadas (los errores se reintentan; al empaquetar, volviendo a
+    empaquetar su monumento entero) y los reportes de esa carpeta se
+    reescriben con lo anterior más lo nuevo.
+    hilos: cantidad fija de hilos de copia por disco. Con None (por
+    defecto) se ajusta sola en cada disco según el rendimiento medido (ver
+    `ControlConcurrencia`) y el resultado queda en la hoja "rendimiento".
+    verificar: cada copia calcula la suma del origen mientras copia y
+    luego relee el destino sin caché para compararla (ver `verificacion`).
+    Las sumas quedan en `output_dir/sumas_<fecha>.b2sum` y una copia que
+    no coincide queda como ERROR. Con `enlazar`, los archivos clonados o
+    enlazados comparten los datos del origen y no se verifican.
+    indice: `IndiceArbol` del origen; el recorrido sólo vuelve a listar
+    las carpetas que cambiaron desde el último escaneo (ver `indice`).
+    distribucion: cómo se reparten las imágenes en `output_dir`:
+    "monumento" (`<ID>/`), "excavacion" (`<ID>/<excavación>/`), "fecha"
+    (`<ID>/<AAAA-MM-DD>/`) o "hash" (cubetas de a lo sumo
+    `max_por_carpeta` imágenes). Un nombre ya ocupado por otra imagen no se
+    pisa: la nueva se guarda como "nombre_2.jpg". La distribución queda en
+    `output_dir/distribucion.json`, en la bitácora y en el Excel; al
+    reanudar se usa la de la ejecución original.
+    empaquetar: "zip", "tar" o "tar.zst": cada monumento se escribe en un
+    solo archivo `output_dir/<ID>.zip` (con su índice `.indice.csv`) en
+    vez de miles de archivos sueltos, que en un recurso de red o un USB
+    cuestan más por metadatos que por datos (ver `empaquetar_en_flujo`).
+    Cada imagen se lee una sola vez, directo al paquete. En este modo no
+    se usan `incremental`, `enlazar`, `deduplicar`, `verificar` ni la
+    distribución: cada ejecución reescribe los paquetes completos.
+    reporte: "excel" (CSV y Excel) o "csv" (sólo el CSV; `excel_path`
+    es None).
+
+    Cada resultado se anota en la bitácora (`bitacora.jsonl`) de la carpeta
+    de reportes conforme termina, así que una ejecución cortada siempre se
+    puede reanudar.
+    """
+    if reporte not in REPORTES:
+        raise ValueError(f"Reporte desconocido: {reporte} (usar {', '.join(REPORTES)})")
+    if reanudar:
+        report_dir = reanudar
+        anterior = encabezado_bitacora(reanudar).get("distribucion")
+        if anterior and "formato" in anterior:
+            empaquetar = anterior["formato"]
+        elif anterior:
+            distribucion = anterior["distribucion"]
+            max_por_carpeta = anterior.get("max_por_carpeta", max_por_carpeta)
+            empaquetar = None
+        os.makedirs(report_dir, exist_ok=True)
+    else:
+        report_dir = nueva_carpeta_reportes(output_dir)
+
+    distribucion = Distribucion(distribucion, max_por_carpeta)
+    if empaquetar:
+        if empaquetar not in FORMATOS:
+            raise ValueError(f"Formato de paquete desconocido: {empaquetar} (usar {', '.join(FORMATOS)})")
+        descripcion = {"distribucion": "paquete", "formato": empaquetar,
+                       "patron": f"<ID monumento>{FORMATOS[empaquetar]} (índice en <ID monumento>{FORMATOS[empaquetar]}.indice.csv)"}
+    else:
+        descripcion = distribucion.descripcion()
+        distribucion_previa = distribucion.registrar(output_dir)
+        if distribucion_previa and callback:
+            callback(f"Atención: {output_dir} tenía la distribución "
+                     f"\"{distribucion_previa.get('distribucion')}\"; ahora se usa \"{distribucion.tipo}\".")
+
+    duplicados = []
+    if deduplicar and not empaquetar:
+        if callback:
+            callback("Buscando imágenes duplicadas...")
+        duplicados = detectar_duplicados(iterar_imagenes(root_dir, indice))
+        if callback:
+            repetidas = sum(len(rutas) - 1 for _, _, rutas in duplicados)
+            callback(f"{len(duplicados)} grupos de duplicados ({repetidas} copias evitadas).")
 
     if callback:
-        callback("Escaneando imágenes...")
+        callback("Escaneando y copiando imágenes...")
 
-    imagenes = recolectar_imagenes(root_dir)
+    # Cada resultado va al almacén compacto (fuente del Excel y del resumen)
+    # y, en el mismo momento, al CSV
+    csv_path = os.path.join(report_dir, "reporte_copiado.csv")
+    # El manifiesto se lleva siempre: dice qué destino es de qué origen
+    # (ver `distribucion`); `incremental` sólo decide si se omite lo que no cambió
+    manifiesto = Manifiesto(output_dir, usar_hash=verificar_hash) if not empaquetar else None
+    anchos = AnchosColumnas(ENCABEZADOS)
+    if resumen is None:
+        resumen = Resumen()
+    resultados = ResultadosCompactos(resumen)
+
+    terminadas = {}
+    if reanudar:
+        # Un paquete se escribe entero: el monumento con alguna imagen en
+        # ERROR se vuelve a empaquetar completo (y sus registros se rehacen)
+        reempaquetar = set()
+        if empaquetar:
+            reempaquetar = {r.id_monumento for r in leer_bitacora(report_dir) if r.estado is Estado.ERROR}
+        for r in leer_bitacora(report_dir):
+            if r.estado is not Estado.ERROR and r.id_monumento not in reempaquetar:
+                resultados.agregar(r)
+                terminadas[r.origen] = r
+        if callback:
+            callback(f"Reanudando: {len(terminadas)} imágenes ya procesadas se omiten.")
+
+    # Un control de hilos por disco físico que trabaja: el de cada origen
+    # o, al empaquetar, el del destino. {dev: control o None si `hilos`}
+    controles = {}
+
+    def crear_control(dev, sugeridos):
+        if hilos is not None:
+            controles[dev] = None
+            return None
+        controles[dev] = ControlConcurrencia(
+            inicial=sugeridos,
+            al_ajustar=(lambda n: eventos(("hilos", (dev, n)))) if eventos else None)
+        return controles[dev]
+
+    def progreso(n):
+        registrar_bytes(n)
+        if eventos:
+            eventos(("bytes", n))
+
+    sumas = ManifiestoSumas(output_dir) if verificar and not empaquetar else None
+    bitacora = Bitacora(report_dir, root_dir, output_dir, distribucion=descripcion, continuar=bool(reanudar))
+    completo = False
+    try:
+        with open(csv_path, "w", newline="", encoding="utf8") as f:
+            w = csv.writer(f)
+            w.writerow(ENCABEZADOS)
+            for fila in resultados.filas():
+                w.writerow(fila)
+                anchos.observar(fila)
+            if empaquetar:
+                flujo = empaquetar_en_flujo(root_dir, output_dir, empaquetar, max_workers=hilos,
+                                            eventos=eventos, omitir=terminadas, crear_control=crear_control,
+                                            indice=indice, progreso=progreso)
+            else:
+                flujo = procesar_en_flujo(root_dir, output_dir, max_workers=hilos,
+                                          eventos=eventos, omitir=terminadas, crear_control=crear_control,
+                                          indice=indice,
+                                          manifiesto=manifiesto, incremental=incremental, enlazar=enlazar,
+                                          duplicado_de=mapa_duplicados(duplicados), progreso=progreso,
+                                          sumas=sumas, distribucion=distribucion)
+            for r in flujo:
+                resultados.agregar(r)
+                bitacora.escribir(r)
+                fila = r.fila()
+                w.writerow(fila)
+                anchos.observar(fila)
+                if eventos:
+                    eventos(("procesada", r.estado.name))
+                if callback:
+                    callback(f"{r.texto_estado} → {r.nombre}")
+                if cancelar is not None and cancelar.is_set():
+                    if callback:
+                        callback("Proceso cancelado: se generan los reportes con lo ya procesado.")
+                    break
+            else:
+                completo = True
+    finally:
+        bitacora.cerrar(completo)
+        if manifiesto is not None:
+            manifiesto.cerrar()
+        if sumas is not None:
+            sumas.cerrar()
+
+    if sumas is not None and callback:
+        callback(f"{sumas.total} copias verificadas; sumas en {sumas.ruta}")
 
     if callback:
-        callback(f"{len(imagenes)} imágenes encontradas.")
-
-    resultados = []
-
-    with ThreadPoolExecutor(max_workers=8) as executor:
-        futuros = {executor.submit(procesar_imagen, ruta, output_dir): ruta for ruta in imagenes}
-        for future in as_completed(futuros):
-            r = future.result()
-            resultados.append(r)
+        callback(f"{resumen.total_archivos} imágenes procesadas.")
+        for estado, cantidad in sorted(resumen.por_estado.items()):
+            callback(f"  {estado}: {cantidad}")
+
+    rendimiento = []
+    if empaquetar:
+        carpetas = {dev: [f"{c} (destino)" for c in cs]
+                    for dev, cs in agrupar_por_dispositivo([output_dir]).items()}
+    else:
+        carpetas = agrupar_por_dispositivo(raices(root_dir))
+    for dev, control in controles.items():
+        disco = "; ".join(carpetas.get(dev, [str(dev)]))
+        if control is not None:
+            informe = control.informe()
             if callback:
-                callback(f"{r[4]} → {r[0]}")
-
-    # CSV
-    csv_path = os.path.join(report_dir, "reporte_copiado.csv")
-    with open(csv_path, "w", newline="", encoding="utf8") as f:
-        w = csv.writer(f)
-        w.writerow(["Archivo", "Ruta Origen", "Ruta Destino", "ID Monumento", "Estado"])
-        w.writerows(resultados)
-
-    excel_path = generar_excel(resultados, report_dir)
+                callback(f"Hilos de copia en {disco}: {informe['nivel_final']} (mejor rendimiento "
+                         f"con {informe['mejor_nivel']}: {informe['mejor_rendimiento']})")
+        else:
+            informe = {"nivel_final": hilos}
+        rendimiento.append((disco, informe))
+
+    excel_path = None
+    if reporte == "excel":
+        excel_path = generar_excel(resultados.filas(), report_dir, duplicados, anchos, resumen,
+                                   rendimiento, descripcion)
 
     return csv_path, excel_path
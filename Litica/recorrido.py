@@ -0,0 +1,179 @@
+import os
+import queue
+import threading
+import collections
+
+from planificador import dispositivo_de, es_rotacional
+
+
+# Hilos del recorrido paralelo. En un recurso de red cada listado de
+# carpeta cuesta un viaje de ida y vuelta, así que conviene tener varios
+# en vuelo; en un HDD se recorre en serie para no mover el cabezal.
+HILOS_RECORRIDO = 8
+# Carpetas listadas en espera de ser entregadas
+TAM_COLA = 256
+
+_FIN = object()
+
+
+def _por_inodo(entradas):
+    # En POSIX el número de inodo sigue de cerca la posición en disco;
+    # en Windows `inode()` costaría un stat por archivo y NTFS ya devuelve
+    # las entradas en el orden de su índice.
+    if os.name == "nt":
+        return entradas
+    return sorted(entradas, key=lambda e: e.inode())
+
+
+def _listar(carpeta, podar, filtrar, al_error=None):
+    """
+    Lista `carpeta` con `os.scandir`. Devuelve (subcarpetas, archivos)
+    como `DirEntry` ordenados por inodo, ya podados y filtrados. El tipo
+    de cada entrada sale del propio listado: no se hace ningún `stat`
+    (salvo que lo pidan `podar`/`filtrar`, y queda guardado en la entrada).
+    Los enlaces simbólicos a carpetas se omiten: no se siguen (podrían
+    salir del árbol o formar un ciclo) y tampoco son archivos a copiar.
+    Si no se puede listar devuelve None y, salvo que la carpeta ya no
+    exista, pasa el `OSError` a `al_error` (como `onerror` de `os.walk`).
+    """
+    archivos, subcarpetas = [], []
+    try:
+        with os.scandir(carpeta) as it:
+            for entrada in it:
+                try:
+                    es_carpeta = entrada.is_dir(follow_symlinks=False)
+                    if not es_carpeta and entrada.is_symlink() and entrada.is_dir():
+                        continue
+                except OSError:
+                    es_carpeta = False
+                if es_carpeta:
+                    if podar is None or not podar(entrada):
+                        subcarpetas.append(entrada)
+                elif filtrar is None or filtrar(entrada):
+                    archivos.append(entrada)
+    except OSError as e:
+        if al_error is not None and not isinstance(e, FileNotFoundError):
+            al_error(e)
+        return None
+    return _por_inodo(subcarpetas), _por_inodo(archivos)
+
+
+def _resultado(carpeta, subcarpetas, archivos, entradas):
+    if entradas:
+        return carpeta, subcarpetas, archivos
+    return carpeta, [e.name for e in subcarpetas], [e.name for e in archivos]
+
+
+def recorrer(raiz, podar=None, filtrar=None, entradas=False, al_error=None):
+    """
+    Como `os.walk(raiz)` (en profundidad, de arriba hacia abajo), con los
+    archivos y subcarpetas de cada carpeta ordenados por inodo para que
+    las lecturas de una misma carpeta caigan cerca en el disco.
+
+    Genera (carpeta, subcarpetas, archivos). `podar(entrada)` puede
+    devolver True para no entrar en una subcarpeta (tampoco se lista) y
+    `filtrar(entrada)` False para omitir un archivo; ambos reciben el
+    `os.DirEntry`. Con `entradas=True` se entregan los `DirEntry` en vez
+    de los nombres (su `stat()` se guarda en la propia entrada).
+    Una carpeta que no se puede listar se salta; `al_error(OSError)` se
+    entera (p. ej. para no borrar en el destino lo que no se pudo ver).
+    """
+    pendientes = [raiz]
+    while pendientes:
+        carpeta = pendientes.pop()
+        listado = _listar(carpeta, podar, filtrar, al_error)
+        if listado is None:
+            continue
+        subcarpetas, archivos = listado
+
+        yield _resultado(carpeta, subcarpetas, archivos, entradas)
+
+        # Se apilan al revés para visitarlas en orden de inodo
+        for e in reversed(subcarpetas):
+            pendientes.append(e.path)
+
+
+def recorrer_paralelo(raiz, hilos=None, podar=None, filtrar=None, entradas=False,
+                      tam_cola=TAM_COLA, al_error=None):
+    """
+    Igual que `recorrer`, pero listando varias carpetas a la vez.
+
+    Cada hilo tiene su propia pila de carpetas pendientes: toma de su
+    extremo (en profundidad, con localidad) y, cuando se le acaba, roba la
+    carpeta más antigua de la pila de otro hilo (las más cercanas a la
+    raíz, que suelen tener más trabajo debajo). Entrega lo mismo que
+    `os.walk` con los filtros aplicados, pero el orden entre carpetas
+    depende de qué hilo termine primero.
+
+    `hilos=None` elige según el disco de `raiz`: en serie si es un HDD,
+    `HILOS_RECORRIDO` si no. Con `hilos=1` es exactamente `recorrer`.
+    `al_error` se llama desde los hilos del recorrido.
+    """
+    if hilos is None:
+        hilos = 1 if es_rotacional(dispositivo_de(raiz)) else HILOS_RECORRIDO
+    if hilos <= 1:
+        yield from recorrer(raiz, podar, filtrar, entradas, al_error)
+        return
+
+    pilas = [collections.deque() for _ in range(hilos)]
+    pilas[0].append(raiz)
+    cond = threading.Condition()
+    estado = {"pendientes": 1}
+    detener = threading.Event()
+    salida = queue.Queue(maxsize=tam_cola)
+
+    def tomar(i):
+        """Siguiente carpeta para el hilo `i`; None cuando no queda nada."""
+        with cond:
+            while True:
+                if detener.is_set() or estado["pendientes"] == 0:
+                    return None
+                if pilas[i]:
+                    return pilas[i].pop()
+                for j in range(1, hilos):
+                    victima = pilas[(i + j) % hilos]
+                    if victima:
+                        return victima.popleft()
+                # Hay carpetas en curso que pueden agregar más: esperar
+                cond.wait()
+
+    def trabajar(i):
+        try:
+            while True:
+                carpeta = tomar(i)
+                if carpeta is None:
+                    break
+                listado = _listar(carpeta, podar, filtrar, al_error)
+                if listado is not None:
+                    subcarpetas, archivos = listado
+                    salida.put(_resultado(carpeta, subcarpetas, archivos, entradas))
+                    nuevas = [e.path for e in reversed(subcarpetas)]
+                else:
+                    nuevas = []
+                with cond:
+                    pilas[i].extend(nuevas)
+                    estado["pendientes"] += len(nuevas) - 1
+                    cond.notify_all()
+        finally:
+            salida.put(_FIN)
+
+    trabajadores = [threading.Thread(target=trabajar, args=(i,), daemon=True) for i in range(hilos)]
+    for t in trabajadores:
+        t.start()
+
+    activos = hilos
+    try:
+        while activos:
+            r = salida.get()
+            if r is _FIN:
+                activos -= 1
+                continue
+            yield r
+    finally:
+        # Corte anticipado: despertar a los hilos y vaciar la salida
+        detener.set()
+        with cond:
+            cond.notify_all()
+        while activos:
+            if salida.get() is _FIN:
+                activos -= 1
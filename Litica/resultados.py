@@ -0,0 +1,229 @@
+import enum
+import array
+import threading
+import collections
+
+
+class Estado(enum.IntEnum):
+    """Estado final de cada imagen; en el CSV se escribe su nombre."""
+    COPIADO = 0
+    CLONADO = 1
+    ENLAZADO = 2
+    SIN_CAMBIOS = 3
+    DUPLICADO = 4
+    IGNORADO_MACOS = 5
+    EXT_NO_VALIDO = 6
+    ID_NO_ENCONTRADO = 7
+    ERROR = 8
+    EMPAQUETADO = 9
+    # Sólo en una simulación (`simular_proceso`): no se escribió nada
+    PREVISTO = 10
+
+
+# Estados que significan "la imagen está en su carpeta destino"
+ESTADOS_EN_DESTINO = ("COPIADO", "CLONADO", "ENLAZADO", "SIN_CAMBIOS", "EMPAQUETADO")
+
+
+class Registro:
+    """
+    Resultado de una imagen. Se itera como la fila del reporte
+    (Archivo, Ruta Origen, Ruta Destino, ID Monumento, Estado), así que
+    sirve tal cual para `csv.writer.writerow` o `list(registro)`.
+    """
+
+    __slots__ = ("nombre", "origen", "destino", "id_monumento", "id_excavacion", "estado", "detalle")
+
+    def __init__(self, nombre, origen, destino, id_monumento, estado,
+                 detalle="", id_excavacion=""):
+        self.nombre = nombre
+        self.origen = origen
+        self.destino = destino
+        self.id_monumento = id_monumento
+        self.id_excavacion = id_excavacion
+        self.estado = estado
+        self.detalle = detalle
+
+    @property
+    def texto_estado(self):
+        if self.estado is Estado.ERROR:
+            return f"ERROR: {self.detalle}"
+        return self.estado.name
+
+    def fila(self):
+        return (self.nombre, self.origen, self.destino, self.id_monumento, self.texto_estado)
+
+    def __iter__(self):
+        return iter(self.fila())
+
+    def __getitem__(self, i):
+        return self.fila()[i]
+
+    def __len__(self):
+        return 5
+
+    def __repr__(self):
+        return f"Registro{self.fila()!r}"
+
+
+class Resumen:
+    """
+    Conteos de la hoja `resumen_ids`, acumulados una vez por archivo
+    mientras se procesa. Al terminar el resumen ya está listo, y durante la
+    ejecución `instantanea()` permite mostrarlo en vivo. Es seguro llamarlo
+    desde varios hilos.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.total_archivos = 0
+        self.total_imagenes = 0
+        self.por_estado = collections.Counter()
+        self.por_monumento = collections.Counter()
+        self.por_excavacion = collections.Counter()
+
+    def registrar(self, estado, id_monumento, id_excavacion):
+        # Los errores se agrupan en un solo estado; el detalle va en el CSV
+        clave_estado = "ERROR" if estado.startswith("ERROR") else estado
+        with self._lock:
+            self.total_archivos += 1
+            self.por_estado[clave_estado] += 1
+            if estado in ESTADOS_EN_DESTINO:
+                self.total_imagenes += 1
+            if id_monumento:
+                self.por_monumento[id_monumento] += 1
+                if id_excavacion:
+                    self.por_excavacion[(id_monumento, id_excavacion)] += 1
+
+    def instantanea(self):
+        """Copia consistente de los conteos, para leer a mitad de ejecución."""
+        with self._lock:
+            return {
+                "total_archivos": self.total_archivos,
+                "total_imagenes": self.total_imagenes,
+                "por_estado": dict(self.por_estado),
+                "por_monumento": dict(self.por_monumento),
+                "por_excavacion": dict(self.por_excavacion),
+            }
+
+
+class _Tabla:
+    """Internado de cadenas repetidas: cada valor distinto se guarda una vez."""
+
+    __slots__ = ("valores", "_indice")
+
+    def __init__(self):
+        self.valores = [""]
+        self._indice = {"": 0}
+
+    def indice(self, valor):
+        i = self._indice.get(valor)
+        if i is None:
+            i = len(self.valores)
+            self.valores.append(valor)
+            self._indice[valor] = i
+        return i
+
+
+class ResultadosCompactos:
+    """
+    Almacén columnar de los resultados de una ejecución.
+
+    En vez de una tupla de cinco cadenas por imagen, guarda el nombre del
+    archivo y, en arreglos de enteros, índices a tablas de carpetas e IDs
+    internados (las rutas largas se repiten miles de veces) y el `Estado`
+    como un byte. Los mensajes de error y los nombres de destino que
+    difieren del original se guardan aparte, sólo cuando existen.
+
+    Es la fuente única del CSV, del Excel y del resumen: al iterarlo se
+    obtienen `Registro`s, y si se pasa un `Resumen` se alimenta al agregar.
+    """
+
+    def __init__(self, resumen=None):
+        self.resumen = resumen
+        self._lock = threading.Lock()
+
+        self._carpetas = _Tabla()
+        self._ids = _Tabla()
+
+        self._nombres = []
+        self._origen = array.array("I")
+        self._destino = array.array("I")
+        self._monumento = array.array("I")
+        self._excavacion = array.array("I")
+        self._estado = array.array("B")
+
+        self._nombre_destino = {}
+        self._detalle = {}
+
+    def agregar(self, reg):
+        # Prefijo = ruta sin el nombre, con su separador tal cual venía
+        prefijo_origen = reg.origen[:len(reg.origen) - len(reg.nombre)]
+
+        if reg.destino:
+            corte = max(reg.destino.rfind("/"), reg.destino.rfind("\\")) + 1
+            prefijo_destino, nombre_destino = reg.destino[:corte], reg.destino[corte:]
+        else:
+            prefijo_destino, nombre_destino = None, reg.nombre
+
+        with self._lock:
+            i = len(self._nombres)
+            self._nombres.append(reg.nombre)
+            self._origen.append(self._carpetas.indice(prefijo_origen))
+            # 0 = sin destino; las carpetas de destino nunca son ""
+            self._destino.append(self._carpetas.indice(prefijo_destino) if prefijo_destino else 0)
+            self._monumento.append(self._ids.indice(reg.id_monumento))
+            self._excavacion.append(self._ids.indice(reg.id_excavacion))
+            self._estado.append(reg.estado)
+            if nombre_destino != reg.nombre:
+                self._nombre_destino[i] = nombre_destino
+            if reg.detalle:
+                self._detalle[i] = reg.detalle
+
+        if self.resumen is not None:
+            self.resumen.registrar(reg.texto_estado, reg.id_monumento, reg.id_excavacion)
+
+    def __len__(self):
+        return len(self._nombres)
+
+    def registro(self, i):
+        carpetas = self._carpetas.valores
+        ids = self._ids.valores
+        nombre = self._nombres[i]
+
+        destino = ""
+        if self._destino[i]:
+            destino = carpetas[self._destino[i]] + self._nombre_destino.get(i, nombre)
+
+        return Registro(
+            nombre,
+            carpetas[self._origen[i]] + nombre,
+            destino,
+            ids[self._monumento[i]],
+            Estado(self._estado[i]),
+            detalle=self._detalle.get(i, ""),
+            id_excavacion=ids[self._excavacion[i]],
+        )
+
+    def __iter__(self):
+        # Se recorre lo que había al empezar; lo que llegue después no se ve
+        for i in range(len(self)):
+            yield self.registro(i)
+
+    def filas(self):
+        """Filas del reporte como tuplas, sin armar un `Registro` por imagen."""
+        carpetas = self._carpetas.valores
+        ids = self._ids.valores
+        nombres = self._nombres
+        for i in range(len(self)):
+            nombre = nombres[i]
+            estado = Estado(self._estado[i])
+            destino = ""
+            if self._destino[i]:
+                destino = carpetas[self._destino[i]] + self._nombre_destino.get(i, nombre)
+            yield (
+                nombre,
+                carpetas[self._origen[i]] + nombre,
+                destino,
+                ids[self._monumento[i]],
+                f"ERROR: {self._detalle.get(i, '')}" if estado is Estado.ERROR else estado.name,
+            )
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de Litica se importan como scripts (`import procesador`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,43 @@
+import pytest
+
+from bitacora import Bitacora, NOMBRE_BITACORA, encabezado_bitacora, leer_bitacora
+from resultados import Estado, Registro
+
+
+def _registro(n):
+    return Registro(f"T1_0000{n}.jpg", f"/origen/T1_0000{n}.jpg", f"/destino/T1_0000{n}.jpg", "T1_00001",
+                    Estado.COPIADO)
+
+
+def test_ejecucion_nueva_no_se_mezcla_con_otra(tmp_path):
+    Bitacora(tmp_path, "/origen", "/destino").cerrar(True)
+    with pytest.raises(FileExistsError):
+        Bitacora(tmp_path, "/origen", "/destino")
+
+
+def test_reanudar_agrega_a_la_existente(tmp_path):
+    b = Bitacora(tmp_path, "/origen", "/destino", distribucion={"distribucion": "hash"})
+    b.escribir(_registro(1))
+    b.cerrar(False)
+
+    b = Bitacora(tmp_path, "/origen", "/destino", continuar=True)
+    b.escribir(_registro(2))
+    b.cerrar(True)
+
+    assert [r.nombre for r in leer_bitacora(tmp_path)] == ["T1_00001.jpg", "T1_00002.jpg"]
+    # El encabezado que vale es el de la ejecución original
+    assert encabezado_bitacora(tmp_path)["distribucion"] == {"distribucion": "hash"}
+
+
+def test_linea_cortada_se_ignora(tmp_path):
+    b = Bitacora(tmp_path, "/origen", "/destino")
+    b.escribir(_registro(1))
+    b.cerrar(False)
+    with open(tmp_path / NOMBRE_BITACORA, "a", encoding="utf8") as f:
+        f.write('{"r": ["T1_00002.jpg", "/orig')
+
+    b = Bitacora(tmp_path, "/origen", "/destino", continuar=True)
+    b.escribir(_registro(3))
+    b.cerrar(True)
+
+    assert [r.nombre for r in leer_bitacora(tmp_path)] == ["T1_00001.jpg", "T1_00003.jpg"]
@@ -0,0 +1,96 @@
+import os
+
+import pytest
+
+from catalogo import Catalogo, consultar
+from indice import IndiceArbol
+from procesador import ids_de_imagen
+
+IMAGENES = {
+    "A/T1_00001_001_0000001_1.jpg": 10,
+    "A/T1_00001_001_0000002_2.jpg": 20,
+    "B/T1_00001_001_0000001_3.jpg": 30,
+    "B/T1_00002_4.jpg": 40,
+    "C/T3_01234_001_0000001_5.jpg": 50,
+    # No son imágenes: no entran al catálogo
+    "C/T3_01234_notas.txt": 60,
+    "C/._T3_01234_6.jpg": 70,
+}
+
+
+@pytest.fixture
+def origen(tmp_path):
+    raiz = tmp_path / "origen"
+    for rel, tamano in IMAGENES.items():
+        ruta = raiz / rel
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(b"x" * tamano)
+    return raiz
+
+
+@pytest.fixture
+def catalogo(tmp_path, origen):
+    indice = IndiceArbol(str(tmp_path / "indice.sqlite"), ids_de_imagen)
+    indice.actualizar(origen)
+    yield Catalogo(indice)
+    indice.cerrar()
+
+
+def test_resumen_de_un_monumento(catalogo, origen):
+    datos = catalogo.resumen("t1_00001")
+
+    assert datos["id"] == "T1_00001"
+    assert (datos["imagenes"], datos["bytes"], datos["excavaciones"]) == (3, 60, 2)
+    assert datos["carpetas"] == [(str(origen / "A"), 2, 30), (str(origen / "B"), 1, 30)]
+
+
+def test_resumen_de_una_excavacion(catalogo):
+    datos = catalogo.resumen("001_0000001", campo="excavacion")
+
+    assert (datos["imagenes"], datos["bytes"]) == (3, 90)
+    assert datos["monumentos"] == ["T1_00001", "T3_01234"]
+
+
+def test_resumen_sin_imagenes(catalogo):
+    datos = catalogo.resumen("T7_99999")
+
+    assert (datos["imagenes"], datos["bytes"], datos["carpetas"]) == (0, 0, [])
+
+
+def test_prefijo_y_rango(catalogo):
+    assert catalogo.prefijo("t1_") == [("T1_00001", 3, 60), ("T1_00002", 1, 40)]
+    assert catalogo.prefijo("T1_00002") == [("T1_00002", 1, 40)]
+    # Ambos extremos incluidos; sin uno de ellos el rango queda abierto
+    assert catalogo.rango("T1_00002", "T3_01234") == [("T1_00002", 1, 40), ("T3_01234", 1, 50)]
+    assert [f[0] for f in catalogo.rango(hasta="T1_00002")] == ["T1_00001", "T1_00002"]
+    assert [f[0] for f in catalogo.rango()] == ["T1_00001", "T1_00002", "T3_01234"]
+
+
+def test_rutas_y_totales(catalogo, origen):
+    assert catalogo.rutas("T1_00001") == [
+        os.path.join(str(origen / "A"), "T1_00001_001_0000001_1.jpg"),
+        os.path.join(str(origen / "A"), "T1_00001_001_0000002_2.jpg"),
+        os.path.join(str(origen / "B"), "T1_00001_001_0000001_3.jpg"),
+    ]
+    assert catalogo.totales() == (3, 2, 5, 150)
+
+
+def test_campo_desconocido(catalogo):
+    with pytest.raises(ValueError):
+        catalogo.resumen("T1_00001", campo="carpeta")
+
+
+@pytest.mark.parametrize("texto, primera", [
+    ("T1_00001", "T1_00001: 3 imágenes, 0.0 MB"),
+    ("T1_*", "T1_00001: 3 imágenes, 0.0 MB"),
+    ("T1_00002..T3_01234", "T1_00002: 1 imágenes, 0.0 MB"),
+    # Un ID incompleto se busca como prefijo
+    ("T3_", "T3_01234: 1 imágenes, 0.0 MB"),
+    ("t9_", "T9_: sin imágenes en el catálogo"),
+])
+def test_consultar_como_en_la_ui(catalogo, texto, primera):
+    assert consultar(catalogo, texto)[0] == primera
+
+
+def test_consultar_lista_con_totales(catalogo):
+    assert consultar(catalogo, "T1_*")[-1] == "2 IDs, 4 imágenes, 0.0 MB"
@@ -0,0 +1,120 @@
+import os
+import json
+import signal
+
+import pytest
+
+import procesador
+from cli import SALIDA_CANCELADO, SALIDA_CON_ERRORES, SALIDA_FATAL, SALIDA_OK, main
+
+
+@pytest.fixture
+def origen(tmp_path):
+    carpeta = tmp_path / "origen"
+    carpeta.mkdir()
+    for nombre in ("T1_00001_a.jpg", "T1_00001_b.jpg", "T2_00002_c.jpg"):
+        (carpeta / nombre).write_bytes(nombre.encode() * 10)
+    return carpeta
+
+
+def _correr(capsys, *argv):
+    """Corre la CLI y devuelve (código de salida, eventos JSON de la salida estándar)."""
+    codigo = main([*map(str, argv), "--reporte", "csv", "--hilos", "2"])
+    eventos = [json.loads(linea) for linea in capsys.readouterr().out.splitlines()]
+    return codigo, eventos
+
+
+def test_ejecucion_sin_errores(tmp_path, origen, capsys):
+    destino = tmp_path / "destino"
+
+    codigo, eventos = _correr(capsys, origen, "--destino", destino)
+
+    assert codigo == SALIDA_OK
+    assert eventos[0]["evento"] == "inicio" and eventos[0]["destino"] == str(destino)
+    fin = eventos[-1]
+    assert fin["evento"] == "fin" and fin["codigo"] == SALIDA_OK
+    assert (fin["procesadas"], fin["errores"], fin["por_estado"]) == (3, 0, {"COPIADO": 3})
+    assert os.path.isfile(fin["csv"]) and fin["excel"] is None
+    # Antes del fin sale siempre una última línea de progreso
+    assert eventos[-2]["evento"] == "progreso" and eventos[-2]["procesadas"] == 3
+    assert (destino / "T1_00001" / "T1_00001_a.jpg").is_file()
+
+
+def test_imagenes_con_error(tmp_path, origen, capsys, monkeypatch):
+    copiar_archivo = procesador.copiar_archivo
+    fallida = str(origen / "T2_00002_c.jpg")
+
+    def copiar(origen, destino, **kw):
+        if origen == fallida:
+            raise OSError(f"no se pudo leer {origen}")
+        return copiar_archivo(origen, destino, **kw)
+
+    monkeypatch.setattr(procesador, "copiar_archivo", copiar)
+
+    codigo, eventos = _correr(capsys, origen, "--destino", tmp_path / "destino")
+
+    assert codigo == SALIDA_CON_ERRORES
+    assert eventos[-1]["errores"] == 1 and eventos[-1]["codigo"] == SALIDA_CON_ERRORES
+
+
+@pytest.mark.parametrize("argumentos", [
+    ["no_existe", "--destino", "destino"],
+    ["{origen}", "--destino", "destino", "--hilos", "-1"],
+    ["{origen}", "--destino", "destino", "--reanudar", "no_existe"],
+    ["{origen}", "--destino", "destino", "--empaquetar", "rar"],
+    ["{origen}"],
+])
+def test_argumentos_invalidos(tmp_path, origen, capsys, argumentos):
+    with pytest.raises(SystemExit) as salida:
+        main([a.format(origen=origen) for a in argumentos])
+
+    assert salida.value.code == 2
+    # Nada en la salida estándar: el error de argparse va a stderr
+    assert capsys.readouterr().out == ""
+
+
+def test_error_fatal(tmp_path, origen, capsys):
+    # El destino no se puede crear: hay un archivo en su lugar
+    destino = tmp_path / "destino"
+    destino.write_text("no es una carpeta")
+
+    codigo, eventos = _correr(capsys, origen, "--destino", destino)
+
+    assert codigo == SALIDA_FATAL
+    assert eventos[-1]["evento"] == "error" and eventos[-1]["codigo"] == SALIDA_FATAL
+    assert eventos[-1]["texto"]
+
+
+def test_cancelar_con_una_senal(tmp_path, origen, capsys, monkeypatch):
+    copiar_archivo = procesador.copiar_archivo
+    senales = []
+
+    def copiar(origen, destino, **kw):
+        # Un Ctrl+C durante la primera copia: se terminan las imágenes en
+        # curso (una segunda señal cortaría en el acto)
+        if not senales:
+            senales.append(origen)
+            os.kill(os.getpid(), signal.SIGINT)
+        return copiar_archivo(origen, destino, **kw)
+
+    monkeypatch.setattr(procesador, "copiar_archivo", copiar)
+
+    codigo, eventos = _correr(capsys, origen, "--destino", tmp_path / "destino")
+
+    assert codigo == SALIDA_CANCELADO
+    assert eventos[-1]["evento"] == "fin" and eventos[-1]["cancelado"]
+    assert os.path.isfile(eventos[-1]["csv"])
+
+
+def test_simular_no_escribe_nada(tmp_path, origen, capsys):
+    destino = tmp_path / "destino"
+
+    codigo, eventos = _correr(capsys, origen, "--destino", destino, "--simular")
+
+    assert codigo == SALIDA_OK
+    assert not destino.exists()
+    previstos = {os.path.basename(e["origen"]): e for e in eventos if e["evento"] == "previsto"}
+    assert previstos["T1_00001_a.jpg"]["destino"] == str(destino / "T1_00001" / "T1_00001_a.jpg")
+    assert previstos["T2_00002_c.jpg"]["id_monumento"] == "T2_00002"
+    fin = eventos[-1]
+    assert fin["simulacion"] and (fin["imagenes"], fin["monumentos"]) == (3, 2)
@@ -0,0 +1,87 @@
+import time
+import threading
+
+import pytest
+
+import concurrencia
+from concurrencia import ControlConcurrencia, MB
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    """Reloj manual: `reloj[0]` son los segundos de `time.monotonic()`."""
+    ahora = [1000.0]
+    monkeypatch.setattr(concurrencia.time, "monotonic", lambda: ahora[0])
+    return ahora
+
+
+def _ventana(control, reloj, mb, archivos=10):
+    reloj[0] += control.ventana
+    control.registrar(archivos=archivos, n_bytes=int(mb * MB))
+
+
+def test_escalada_sube_mientras_mejora_y_da_la_vuelta(reloj):
+    niveles = []
+    control = ControlConcurrencia(inicial=4, ventana=1.0, al_ajustar=niveles.append)
+
+    _ventana(control, reloj, 100)
+    _ventana(control, reloj, 200)
+    assert control.nivel == 6
+    # Empeoró: se da la vuelta
+    _ventana(control, reloj, 50)
+    assert control.nivel == 5
+    assert niveles == [5, 6, 5]
+
+    informe = control.informe()
+    assert informe["mejor_nivel"] == 5
+    assert informe["mejor_rendimiento"] == "200.0 MB/s"
+    assert [h[1] for h in informe["historial"]] == [4, 5, 6]
+
+
+def test_ventana_corta_o_con_pocos_archivos_no_ajusta(reloj):
+    control = ControlConcurrencia(inicial=4, ventana=2.0)
+    reloj[0] += 1.0
+    control.registrar(archivos=10, n_bytes=MB)
+    assert control.nivel == 4
+
+    control = ControlConcurrencia(inicial=4, ventana=2.0)
+    reloj[0] += 5.0
+    # Menos archivos que hilos: la medición es ruido
+    control.registrar(archivos=3, n_bytes=MB)
+    assert control.nivel == 4
+    assert control.informe()["mejor_rendimiento"] == "sin medir"
+
+
+def test_no_pasa_de_los_limites(reloj):
+    control = ControlConcurrencia(minimo=2, maximo=3, inicial=3, ventana=1.0)
+    for mb in (100, 200, 300, 400):
+        _ventana(control, reloj, mb)
+        assert 2 <= control.nivel <= 3
+
+
+def test_sin_bytes_mide_archivos_por_segundo(reloj):
+    control = ControlConcurrencia(inicial=1, ventana=1.0)
+    _ventana(control, reloj, 0, archivos=50)
+    assert control.informe()["mejor_rendimiento"] == "50.0 archivos/s"
+
+
+def test_turno_limita_los_hilos_activos():
+    control = ControlConcurrencia(inicial=2)
+    activos, maximo = [0], [0]
+    lock = threading.Lock()
+
+    def trabajar():
+        with control.turno():
+            with lock:
+                activos[0] += 1
+                maximo[0] = max(maximo[0], activos[0])
+            time.sleep(0.02)
+            with lock:
+                activos[0] -= 1
+
+    hilos = [threading.Thread(target=trabajar) for _ in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert maximo[0] == 2
@@ -0,0 +1,68 @@
+import os
+import threading
+
+import pytest
+
+import copiador
+
+
+def _origen(tmp_path, tamano=4 * 1024 * 1024):
+    origen = tmp_path / "origen.bin"
+    origen.write_bytes(os.urandom(tamano))
+    return origen
+
+
+def _copiar_con_limite(*args, **kwargs):
+    """copiar_a_varios en otro hilo: si se traba, la prueba falla en vez de colgarse."""
+    resultado = {}
+
+    def correr():
+        try:
+            resultado["errores"] = copiador.copiar_a_varios(*args, **kwargs)
+        except BaseException as e:
+            resultado["excepcion"] = e
+
+    hilo = threading.Thread(target=correr, daemon=True)
+    hilo.start()
+    hilo.join(30)
+    assert not hilo.is_alive(), "copiar_a_varios quedó bloqueado"
+    return resultado
+
+
+def test_copia_a_varios_destinos(tmp_path):
+    origen = _origen(tmp_path)
+    destinos = [tmp_path / "a.bin", tmp_path / "b.bin"]
+    r = _copiar_con_limite(origen, destinos, tam_buffer=64 * 1024, en_cola=2)
+    assert r["errores"] == [None, None]
+    for destino in destinos:
+        assert destino.read_bytes() == origen.read_bytes()
+
+
+def test_error_de_un_destino_no_detiene_a_los_demas(tmp_path):
+    origen = _origen(tmp_path)
+    bueno = tmp_path / "a.bin"
+    r = _copiar_con_limite(origen, [tmp_path / "no_existe" / "b.bin", bueno], tam_buffer=64 * 1024, en_cola=2)
+    assert isinstance(r["errores"][0], OSError)
+    assert r["errores"][1] is None
+    assert bueno.read_bytes() == origen.read_bytes()
+
+
+def test_falla_de_un_escritor_no_traba_la_lectura(tmp_path, monkeypatch):
+    # Una falla que no es de E/S en un escritor: la lectura no debe quedar
+    # esperando con su cola llena, y el error se lanza
+    origen = _origen(tmp_path)
+    preasignar = copiador._preasignar
+    llamadas = []
+    lock = threading.Lock()
+
+    def preasignar_que_falla(fd, tamano):
+        with lock:
+            llamadas.append(fd)
+            primera = len(llamadas) == 1
+        if primera:
+            raise ValueError("falla del escritor")
+        preasignar(fd, tamano)
+
+    monkeypatch.setattr(copiador, "_preasignar", preasignar_que_falla)
+    r = _copiar_con_limite(origen, [tmp_path / "a.bin", tmp_path / "b.bin"], tam_buffer=16 * 1024, en_cola=1)
+    assert isinstance(r.get("excepcion"), ValueError)
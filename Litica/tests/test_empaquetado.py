@@ -0,0 +1,72 @@
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from empaquetado import FORMATOS, Paquete, SUFIJO_PARCIAL, extraer, leer_indice, formatos_disponibles
+
+
+def _imagenes(tmp_path):
+    carpeta = tmp_path / "imagenes"
+    carpeta.mkdir()
+    contenidos = {}
+    for i, tamano in enumerate((0, 1, 300 * 1024, 3 * 1024 * 1024 + 7)):
+        ruta = carpeta / f"T1_0000{i}.jpg"
+        ruta.write_bytes(os.urandom(tamano))
+        contenidos[f"T1_00001/{ruta.name}"] = ruta
+    return contenidos
+
+
+@pytest.mark.parametrize("formato", list(FORMATOS))
+def test_ida_y_vuelta(tmp_path, formato):
+    if formato not in formatos_disponibles():
+        pytest.skip(f"{formato} no disponible")
+    contenidos = _imagenes(tmp_path)
+    ruta = tmp_path / f"T1_00001{FORMATOS[formato]}"
+    copia = tmp_path / "copia" / ruta.name
+    copia.parent.mkdir()
+
+    with Paquete(ruta, formato, copias=[copia]) as paquete:
+        for nombre, origen in contenidos.items():
+            paquete.agregar(origen, nombre)
+
+    assert not os.path.exists(str(ruta) + SUFIJO_PARCIAL)
+    assert ruta.read_bytes() == copia.read_bytes()
+    indice = leer_indice(ruta)
+    assert set(indice) == set(contenidos)
+    # Cada archivo sale solo, yendo a su posición según el índice
+    for nombre, origen in contenidos.items():
+        salida = tmp_path / "extraido"
+        extraer(ruta, nombre, salida, indice)
+        assert salida.read_bytes() == origen.read_bytes()
+
+
+@pytest.mark.parametrize("formato", ["zip", "tar"])
+def test_legible_con_la_biblioteca_estandar(tmp_path, formato):
+    contenidos = _imagenes(tmp_path)
+    ruta = tmp_path / f"T1_00001{FORMATOS[formato]}"
+    with Paquete(ruta, formato) as paquete:
+        for nombre, origen in contenidos.items():
+            paquete.agregar(origen, nombre)
+
+    if formato == "zip":
+        with zipfile.ZipFile(ruta) as z:
+            assert z.testzip() is None
+            leidos = {n: z.read(n) for n in z.namelist()}
+    else:
+        with tarfile.open(ruta) as t:
+            leidos = {m.name: t.extractfile(m).read() for m in t.getmembers()}
+    assert leidos == {n: o.read_bytes() for n, o in contenidos.items()}
+
+
+def test_origen_que_falta_no_descarta_el_paquete(tmp_path):
+    contenidos = _imagenes(tmp_path)
+    ruta = tmp_path / "T1_00001.zip"
+    paquete = Paquete(ruta, "zip")
+    paquete.agregar(next(iter(contenidos.values())), "T1_00001/a.jpg")
+    with pytest.raises(OSError):
+        paquete.agregar(tmp_path / "no_existe.jpg", "T1_00001/b.jpg")
+    # Un origen que falta no arruina el paquete
+    assert paquete.cerrar()
+    assert set(leer_indice(ruta)) == {"T1_00001/a.jpg"}
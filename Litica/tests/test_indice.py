@@ -0,0 +1,131 @@
+import os
+
+import pytest
+
+from indice import IndiceArbol
+from procesador import ids_de_imagen
+
+PASADO = (1_000_000_000, 1_000_000_000)
+# Un cambio posterior, también en el pasado (en el futuro contaría como reciente)
+DESPUES = (1_500_000_000, 1_500_000_000)
+
+
+def _arbol(tmp_path):
+    raiz = tmp_path / "origen"
+    for rel in ("T1_00001/T1_00001_001_0000001_a.jpg", "T1_00001/FOTOS/T1_00001_b.jpg",
+                "T2_00002/T2_00002_c.jpg", "T2_00002/notas.txt"):
+        ruta = raiz / rel
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(b"x" * 10)
+    _en_el_pasado(raiz)
+    return raiz
+
+
+def _en_el_pasado(raiz):
+    """Atrasa el mtime de las carpetas: las recién modificadas se vuelven a listar siempre."""
+    for carpeta, _, _ in os.walk(raiz):
+        os.utime(carpeta, PASADO)
+
+
+def _normalizar(recorrido):
+    return {carpeta: (sorted(subcarpetas), sorted(archivos)) for carpeta, subcarpetas, archivos in recorrido}
+
+
+@pytest.fixture
+def indice(tmp_path):
+    indice = IndiceArbol(str(tmp_path / "indice.sqlite"), identificar=ids_de_imagen)
+    yield indice
+    indice.cerrar()
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_segundo_escaneo_no_vuelve_a_listar(tmp_path, indice, hilos):
+    raiz = _arbol(tmp_path)
+
+    primero = indice.actualizar(raiz, hilos=hilos)
+    segundo = indice.actualizar(raiz, hilos=hilos)
+
+    assert primero["carpetas"] == primero["relistadas"] == 4
+    assert segundo["carpetas"] == 4 and segundo["relistadas"] == 0
+    assert _normalizar(indice.recorrer(raiz)) == _normalizar(os.walk(raiz))
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_solo_se_relista_la_carpeta_que_cambio(tmp_path, indice, hilos):
+    raiz = _arbol(tmp_path)
+    indice.actualizar(raiz, hilos=hilos)
+
+    nuevo = raiz / "T1_00001" / "FOTOS" / "T1_00001_d.jpg"
+    nuevo.write_bytes(b"x" * 5)
+    os.utime(nuevo.parent, DESPUES)
+
+    assert indice.actualizar(raiz, hilos=hilos)["relistadas"] == 1
+    assert ("T1_00001_d.jpg", 5) in [(a[1], a[2]) for a in indice.archivos(raiz / "T1_00001")]
+    assert indice.actualizar(raiz, hilos=hilos)["relistadas"] == 0
+
+
+def test_carpeta_recien_modificada_se_relista_hasta_asentarse(tmp_path, indice):
+    # Un archivo agregado en el mismo instante del listado podría no verse
+    raiz = _arbol(tmp_path)
+    indice.actualizar(raiz)
+    (raiz / "T2_00002" / "T2_00002_e.jpg").write_bytes(b"x")
+
+    assert indice.actualizar(raiz)["relistadas"] == 1
+    assert indice.carpetas(raiz)[str(raiz / "T2_00002")] == 0
+    assert indice.actualizar(raiz)["relistadas"] == 1
+
+    os.utime(raiz / "T2_00002", PASADO)
+    indice.actualizar(raiz)
+    assert indice.actualizar(raiz)["relistadas"] == 0
+
+
+def test_lo_borrado_sale_del_indice(tmp_path, indice):
+    raiz = _arbol(tmp_path)
+    indice.actualizar(raiz)
+
+    for archivo in (raiz / "T1_00001" / "FOTOS").iterdir():
+        archivo.unlink()
+    (raiz / "T1_00001" / "FOTOS").rmdir()
+    (raiz / "T2_00002" / "notas.txt").unlink()
+    _en_el_pasado(raiz)
+    os.utime(raiz / "T1_00001", DESPUES)
+    os.utime(raiz / "T2_00002", DESPUES)
+
+    resultado = indice.actualizar(raiz)
+
+    assert resultado["carpetas"] == 3 and resultado["relistadas"] == 2
+    assert str(raiz / "T1_00001" / "FOTOS") not in indice.carpetas(raiz)
+    assert sorted(a[1] for a in indice.archivos(raiz)) == ["T1_00001_001_0000001_a.jpg", "T2_00002_c.jpg"]
+    assert indice.consultar("SELECT COUNT(*) FROM archivos")[0][0] == 2
+
+
+def test_guarda_los_ids_de_cada_imagen(tmp_path, indice):
+    raiz = _arbol(tmp_path)
+    indice.actualizar(raiz)
+
+    filas = {a[1]: (a[4], a[5]) for a in indice.archivos(raiz)}
+
+    assert filas["T1_00001_001_0000001_a.jpg"] == ("T1_00001", "001_0000001")
+    assert filas["T2_00002_c.jpg"] == ("T2_00002", None)
+    assert filas["notas.txt"] == (None, None)
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_carpeta_ilegible_va_a_al_error(tmp_path, indice, monkeypatch, hilos):
+    raiz = _arbol(tmp_path)
+    bloqueada = str(raiz / "T2_00002")
+    scandir = os.scandir
+
+    def sin_permiso(ruta):
+        if os.fspath(ruta) == bloqueada:
+            raise PermissionError(13, "Permission denied", bloqueada)
+        return scandir(ruta)
+
+    monkeypatch.setattr(os, "scandir", sin_permiso)
+    errores = []
+
+    indice.actualizar(raiz, hilos=hilos, al_error=errores.append)
+
+    assert [e.filename for e in errores] == [bloqueada]
+    assert bloqueada not in indice.carpetas(raiz)
+    assert str(raiz / "T1_00001" / "FOTOS") in indice.carpetas(raiz)
@@ -0,0 +1,315 @@
+import os
+import datetime
+import threading
+
+import pytest
+
+from empaquetado import extraer, leer_indice
+import procesador
+from procesador import ejecutar_proceso, leer_reporte_csv, nueva_carpeta_reportes, procesar_en_flujo
+from resultados import Estado, Registro
+
+
+def _imagen(carpeta, nombre, contenido, mtime=1_700_000_000):
+    carpeta.mkdir(parents=True, exist_ok=True)
+    ruta = carpeta / nombre
+    ruta.write_bytes(contenido)
+    os.utime(ruta, (mtime, mtime))
+    return str(ruta)
+
+
+def _correr(origen, destino, **opciones):
+    """Ejecuta el proceso (sólo CSV) y devuelve ({origen: (destino, estado)}, carpeta de reportes)."""
+    opciones.setdefault("hilos", 2)
+    csv_path, excel_path = ejecutar_proceso(origen, str(destino), reporte="csv", **opciones)
+    assert excel_path is None
+    filas = list(leer_reporte_csv(csv_path))
+    resultado = {origen_: (destino_, estado) for nombre, origen_, destino_, id_m, estado in filas}
+    assert len(resultado) == len(filas), "una imagen aparece dos veces en el reporte"
+    return resultado, os.path.dirname(csv_path)
+
+
+def _leer(ruta):
+    with open(ruta, "rb") as f:
+        return f.read()
+
+
+def _falla_al_copiar(monkeypatch, rutas):
+    """La copia de `rutas` falla (como un disco que se desconecta)."""
+    copiar_archivo = procesador.copiar_archivo
+
+    def copiar(origen, destino, **kw):
+        if origen in rutas:
+            raise OSError(f"no se pudo leer {origen}")
+        return copiar_archivo(origen, destino, **kw)
+
+    monkeypatch.setattr(procesador, "copiar_archivo", copiar)
+
+
+# =================================================
+# Manifiesto e incremental
+# =================================================
+def test_incremental_omite_lo_que_no_cambio(tmp_path):
+    a = _imagen(tmp_path / "origen", "T1_00001_a.jpg", b"a" * 100)
+    b = _imagen(tmp_path / "origen", "T1_00002_b.jpg", b"b" * 100)
+    destino = tmp_path / "destino"
+
+    primera, reportes1 = _correr(str(tmp_path / "origen"), destino)
+    assert {estado for _, estado in primera.values()} == {"COPIADO"}
+    assert primera[a][0] == str(destino / "T1_00001" / "T1_00001_a.jpg")
+
+    segunda, reportes2 = _correr(str(tmp_path / "origen"), destino, incremental=True)
+    assert segunda == {r: (d, "SIN_CAMBIOS") for r, (d, _) in primera.items()}
+    # Cada ejecución tiene su propia carpeta de reportes
+    assert reportes1 != reportes2
+    assert _leer(segunda[b][0]) == b"b" * 100
+
+
+def test_imagen_editada_reemplaza_su_copia(tmp_path):
+    a = _imagen(tmp_path / "origen", "T1_00001_a.jpg", b"original")
+    destino = tmp_path / "destino"
+    primera, _ = _correr(str(tmp_path / "origen"), destino)
+
+    _imagen(tmp_path / "origen", "T1_00001_a.jpg", b"editada", mtime=1_700_000_100)
+    segunda, _ = _correr(str(tmp_path / "origen"), destino, incremental=True)
+
+    assert segunda[a] == (primera[a][0], "COPIADO")
+    assert _leer(primera[a][0]) == b"editada"
+    assert os.listdir(destino / "T1_00001") == ["T1_00001_a.jpg"]
+
+
+# =================================================
+# Duplicados
+# =================================================
+def test_duplicado_informa_el_destino_real_del_original(tmp_path):
+    # El original no puede usar su nombre (es de otro origen) y queda con
+    # sufijo: su duplicado debe informar ese mismo destino
+    _imagen(tmp_path / "otro", "T1_00001_x.jpg", b"otro contenido")
+    destino = tmp_path / "destino"
+    _correr(str(tmp_path / "otro"), destino)
+
+    original = _imagen(tmp_path / "origen" / "a", "T1_00001_x.jpg", b"repetido" * 10)
+    duplicado = _imagen(tmp_path / "origen" / "b", "T1_00001_copia.jpg", b"repetido" * 10)
+    resultado, _ = _correr(str(tmp_path / "origen"), destino, deduplicar=True)
+
+    destino_original, estado_original = resultado[original]
+    destino_duplicado, estado_duplicado = resultado[duplicado]
+    assert estado_original == "COPIADO"
+    assert estado_duplicado == "DUPLICADO"
+    assert destino_duplicado == destino_original == str(destino / "T1_00001" / "T1_00001_x_2.jpg")
+    assert not os.path.exists(destino / "T1_00001" / "T1_00001_copia.jpg")
+
+
+def test_si_falla_el_original_se_copia_otro_del_grupo(tmp_path, monkeypatch):
+    original = _imagen(tmp_path / "origen" / "a", "T1_00001_x.jpg", b"repetido" * 10)
+    segundo = _imagen(tmp_path / "origen" / "b", "T1_00001_y.jpg", b"repetido" * 10)
+    tercero = _imagen(tmp_path / "origen" / "c", "T1_00001_z.jpg", b"repetido" * 10)
+    _falla_al_copiar(monkeypatch, {original})
+
+    resultado, _ = _correr(str(tmp_path / "origen"), tmp_path / "destino", deduplicar=True)
+
+    assert resultado[original][1].startswith("ERROR")
+    copiados = [r for r in (segundo, tercero) if resultado[r][1] == "COPIADO"]
+    assert len(copiados) == 1
+    otro = ({segundo, tercero} - set(copiados)).pop()
+    # El duplicado restante apunta a la copia que sí existe
+    assert resultado[otro] == (resultado[copiados[0]][0], "DUPLICADO")
+    assert _leer(resultado[otro][0]) == b"repetido" * 10
+
+
+def test_si_fallan_todos_ningun_duplicado_apunta_a_la_nada(tmp_path, monkeypatch):
+    rutas = {_imagen(tmp_path / "origen" / d, f"T1_00001_{d}.jpg", b"repetido" * 10) for d in "abc"}
+    _falla_al_copiar(monkeypatch, rutas)
+
+    resultado, _ = _correr(str(tmp_path / "origen"), tmp_path / "destino", deduplicar=True)
+    assert len(resultado) == 3
+    for destino, estado in resultado.values():
+        assert (destino, estado[:5]) == ("", "ERROR")
+
+
+def test_duplicado_de_un_original_ya_copiado_al_reanudar(tmp_path):
+    original = _imagen(tmp_path / "origen" / "a", "T1_00001_x.jpg", b"repetido" * 10)
+    duplicado = _imagen(tmp_path / "origen" / "b", "T1_00001_y.jpg", b"repetido" * 10)
+    anterior = Registro("T1_00001_x.jpg", original, "/destino/T1_00001/T1_00001_x_3.jpg", "T1_00001",
+                        Estado.COPIADO)
+
+    registros = list(procesar_en_flujo(str(tmp_path / "origen"), str(tmp_path / "destino"), max_workers=1,
+                                       omitir={original: anterior}, duplicado_de={duplicado: original}))
+
+    assert [(r.origen, r.destino, r.estado) for r in registros] == [
+        (duplicado, "/destino/T1_00001/T1_00001_x_3.jpg", Estado.DUPLICADO)]
+
+
+# =================================================
+# Reportes y reanudación
+# =================================================
+def test_carpeta_de_reportes_unica(tmp_path):
+    carpetas = {nueva_carpeta_reportes(str(tmp_path)) for _ in range(3)}
+    assert len(carpetas) == 3
+    assert all(os.path.isdir(c) for c in carpetas)
+
+
+def test_ejecuciones_simultaneas_no_comparten_bitacora(tmp_path):
+    for i in range(4):
+        _imagen(tmp_path / "origen", f"T1_0000{i}_a.jpg", b"x" * 10)
+    errores = []
+    carpetas = []
+
+    def correr():
+        try:
+            carpetas.append(_correr(str(tmp_path / "origen"), tmp_path / "destino")[1])
+        except Exception as e:
+            errores.append(e)
+
+    hilos = [threading.Thread(target=correr) for _ in range(3)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    assert not errores
+    assert len(set(carpetas)) == 3
+
+
+def test_reanudar_completa_lo_que_falto(tmp_path):
+    imagenes = {_imagen(tmp_path / "origen", f"T1_0000{i}_a.jpg", bytes([i]) * 1000) for i in range(8)}
+    destino = tmp_path / "destino"
+    cancelar = threading.Event()
+
+    def eventos(evento):
+        if evento[0] == "procesada":
+            cancelar.set()
+
+    cortada, reportes = _correr(str(tmp_path / "origen"), destino, hilos=1, cancelar=cancelar, eventos=eventos)
+    assert 0 < len(cortada) < len(imagenes)
+
+    completa, reportes_reanudada = _correr(str(tmp_path / "origen"), destino, reanudar=reportes)
+    assert reportes_reanudada == reportes
+    assert set(completa) == imagenes
+    # Lo que ya estaba terminado se conserva tal cual
+    for origen, fila in cortada.items():
+        assert completa[origen] == fila
+    for origen, (destino_, estado) in completa.items():
+        assert estado == "COPIADO"
+        assert _leer(destino_) == _leer(origen)
+
+
+# =================================================
+# Nombres y distribuciones
+# =================================================
+def test_mismo_nombre_tamano_y_fecha_no_se_pisan(tmp_path):
+    # Dos imágenes distintas con el mismo nombre, tamaño y fecha: el dueño
+    # del nombre se decide por la ruta del origen, no por tamaño y fecha
+    a = _imagen(tmp_path / "origen" / "dia1", "T1_00001_x.jpg", b"a" * 50)
+    b = _imagen(tmp_path / "origen" / "dia2", "T1_00001_x.jpg", b"b" * 50)
+    destino = tmp_path / "destino"
+
+    primera, _ = _correr(str(tmp_path / "origen"), destino)
+    destinos = {primera[a][0], primera[b][0]}
+    assert {os.path.basename(d) for d in destinos} == {"T1_00001_x.jpg", "T1_00001_x_2.jpg"}
+    assert _leer(primera[a][0]) == b"a" * 50
+    assert _leer(primera[b][0]) == b"b" * 50
+
+    # Cada origen vuelve a su destino, con o sin incremental
+    for incremental in (False, True):
+        otra, _ = _correr(str(tmp_path / "origen"), destino, incremental=incremental)
+        assert {r: d for r, (d, _) in otra.items()} == {r: d for r, (d, _) in primera.items()}
+    assert sorted(os.listdir(destino / "T1_00001")) == ["T1_00001_x.jpg", "T1_00001_x_2.jpg"]
+
+
+def test_nombre_de_otro_origen_no_se_pisa(tmp_path):
+    a = _imagen(tmp_path / "disco1", "T1_00001_x.jpg", b"a" * 50)
+    b = _imagen(tmp_path / "disco2", "T1_00001_x.jpg", b"b" * 50)
+    destino = tmp_path / "destino"
+
+    primera, _ = _correr(str(tmp_path / "disco1"), destino)
+    segunda, _ = _correr(str(tmp_path / "disco2"), destino)
+
+    assert segunda[b][0] == str(destino / "T1_00001" / "T1_00001_x_2.jpg")
+    assert _leer(primera[a][0]) == b"a" * 50
+    assert _leer(segunda[b][0]) == b"b" * 50
+
+
+def test_distribucion_por_excavacion(tmp_path):
+    con = _imagen(tmp_path / "origen", "T1_00001_001_0000002_a.jpg", b"x")
+    sin = _imagen(tmp_path / "origen", "T1_00001_b.jpg", b"y")
+    resultado, _ = _correr(str(tmp_path / "origen"), tmp_path / "destino", distribucion="excavacion")
+    assert resultado[con][0] == str(tmp_path / "destino" / "T1_00001" / "001_0000002" / "T1_00001_001_0000002_a.jpg")
+    assert resultado[sin][0] == str(tmp_path / "destino" / "T1_00001" / "sin_excavacion" / "T1_00001_b.jpg")
+
+
+def test_distribucion_por_fecha(tmp_path):
+    mtime = 1_700_000_000
+    a = _imagen(tmp_path / "origen", "T1_00001_a.jpg", b"x", mtime=mtime)
+    resultado, _ = _correr(str(tmp_path / "origen"), tmp_path / "destino", distribucion="fecha")
+    dia = datetime.date.fromtimestamp(mtime).isoformat()
+    assert resultado[a][0] == str(tmp_path / "destino" / "T1_00001" / dia / "T1_00001_a.jpg")
+
+
+def test_distribucion_hash_estable_con_cubetas_llenas(tmp_path):
+    for i in range(12):
+        _imagen(tmp_path / "origen", f"T1_00001_{i:03d}.jpg", bytes([i]) * 10)
+    destino = tmp_path / "destino"
+    opciones = dict(distribucion="hash", max_por_carpeta=1)
+
+    primera, _ = _correr(str(tmp_path / "origen"), destino, **opciones)
+    destinos = {d for d, _ in primera.values()}
+    assert len(destinos) == 12
+    for carpeta, dirs, files in os.walk(destino / "T1_00001"):
+        assert len(files) <= 1
+
+    # Una nueva ejecución deja cada imagen en su cubeta, aunque esté llena
+    segunda, _ = _correr(str(tmp_path / "origen"), destino, **opciones)
+    assert {r: d for r, (d, _) in segunda.items()} == {r: d for r, (d, _) in primera.items()}
+    tercera, _ = _correr(str(tmp_path / "origen"), destino, incremental=True, **opciones)
+    assert {estado for _, estado in tercera.values()} == {"SIN_CAMBIOS"}
+
+
+# =================================================
+# Empaquetado
+# =================================================
+@pytest.mark.parametrize("formato", ["zip", "tar"])
+def test_empaquetar_ida_y_vuelta(tmp_path, formato):
+    a = _imagen(tmp_path / "origen" / "dia1", "T1_00001_x.jpg", b"a" * 5000)
+    b = _imagen(tmp_path / "origen" / "dia2", "T1_00001_x.jpg", b"b" * 7000)
+    c = _imagen(tmp_path / "origen", "T2_00007_y.jpg", b"c" * 3)
+    destino = tmp_path / "destino"
+
+    resultado, _ = _correr(str(tmp_path / "origen"), destino, empaquetar=formato)
+    assert {estado for _, estado in resultado.values()} == {"EMPAQUETADO"}
+
+    paquete = str(destino / f"T1_00001.{formato}")
+    indice = leer_indice(paquete)
+    # Dentro del paquete tampoco se pisa un nombre repetido
+    assert set(indice) == {"T1_00001/T1_00001_x.jpg", "T1_00001/T1_00001_x_2.jpg"}
+    for origen in (a, b, c):
+        destino_ = resultado[origen][0]
+        ruta_paquete, id_monumento, nombre = destino_.rsplit(os.sep, 2)
+        salida = tmp_path / "extraido"
+        extraer(ruta_paquete, f"{id_monumento}/{nombre}", salida)
+        assert _leer(salida) == _leer(origen)
+
+
+def test_reanudar_empaquetado_reintenta_el_monumento_con_errores(tmp_path, monkeypatch):
+    a = _imagen(tmp_path / "origen", "T1_00001_a.jpg", b"a" * 100)
+    b = _imagen(tmp_path / "origen", "T1_00001_b.jpg", b"b" * 100)
+    c = _imagen(tmp_path / "origen", "T2_00001_c.jpg", b"c" * 100)
+    destino = tmp_path / "destino"
+
+    class PaqueteQueFalla(procesador.Paquete):
+        def agregar(self, origen, nombre, **kw):
+            if origen == b:
+                raise OSError(f"no se pudo leer {origen}")
+            return super().agregar(origen, nombre, **kw)
+
+    monkeypatch.setattr(procesador, "Paquete", PaqueteQueFalla)
+    primera, reportes = _correr(str(tmp_path / "origen"), destino, empaquetar="zip")
+    assert primera[b][1].startswith("ERROR")
+    monkeypatch.undo()
+    paquete_t2 = os.stat(destino / "T2_00001.zip").st_mtime_ns
+
+    reanudada, _ = _correr(str(tmp_path / "origen"), destino, reanudar=reportes)
+    assert set(reanudada) == {a, b, c}
+    assert {estado for _, estado in reanudada.values()} == {"EMPAQUETADO"}
+    assert set(leer_indice(str(destino / "T1_00001.zip"))) == {"T1_00001/T1_00001_a.jpg", "T1_00001/T1_00001_b.jpg"}
+    # El monumento que quedó bien no se vuelve a escribir
+    assert os.stat(destino / "T2_00001.zip").st_mtime_ns == paquete_t2
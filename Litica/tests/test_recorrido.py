@@ -0,0 +1,117 @@
+import os
+
+import pytest
+
+from indice import IndiceArbol
+from recorrido import recorrer, recorrer_paralelo
+
+
+def _arbol(tmp_path):
+    """Árbol de varios niveles, con una carpeta vacía y varias ramas."""
+    raiz = tmp_path / "raiz"
+    for i in range(4):
+        for j in range(3):
+            carpeta = raiz / f"r{i}" / f"s{j}"
+            carpeta.mkdir(parents=True)
+            for k in range(2):
+                (carpeta / f"f{k}.jpg").write_bytes(b"x")
+        (raiz / f"r{i}" / "nota.txt").write_text("n")
+    (raiz / "vacia").mkdir()
+    (raiz / "suelto.jpg").write_bytes(b"x")
+    return raiz
+
+
+def _normalizar(recorrido):
+    return {carpeta: (sorted(subcarpetas), sorted(archivos)) for carpeta, subcarpetas, archivos in recorrido}
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_recorrido_paralelo_igual_que_os_walk(tmp_path, hilos):
+    raiz = _arbol(tmp_path)
+    esperado = _normalizar(os.walk(raiz))
+
+    assert _normalizar(recorrer(str(raiz))) == esperado
+    assert _normalizar(recorrer_paralelo(str(raiz), hilos=hilos)) == esperado
+
+
+def test_podar_y_filtrar(tmp_path):
+    raiz = _arbol(tmp_path)
+
+    resultado = _normalizar(recorrer_paralelo(str(raiz), hilos=4,
+                                              podar=lambda e: e.name == "r0",
+                                              filtrar=lambda e: e.name.endswith(".jpg")))
+
+    assert str(raiz / "r0") not in resultado
+    assert not any(carpeta.startswith(str(raiz / "r0")) for carpeta in resultado)
+    assert resultado[str(raiz)] == (["r1", "r2", "r3", "vacia"], ["suelto.jpg"])
+    assert resultado[str(raiz / "r1")] == (["s0", "s1", "s2"], [])
+
+
+def test_entradas_devuelve_dir_entry(tmp_path):
+    raiz = _arbol(tmp_path)
+
+    for carpeta, _, archivos in recorrer_paralelo(str(raiz), hilos=4, entradas=True):
+        for entrada in archivos:
+            assert entrada.path == os.path.join(carpeta, entrada.name)
+            assert entrada.stat().st_size > 0
+
+
+def test_cortar_el_recorrido_no_deja_hilos_colgados(tmp_path):
+    raiz = _arbol(tmp_path)
+
+    for _ in recorrer_paralelo(str(raiz), hilos=4, tam_cola=1):
+        break
+
+    # Y se puede volver a recorrer completo después
+    assert len(_normalizar(recorrer_paralelo(str(raiz), hilos=4))) == len(_normalizar(os.walk(raiz)))
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_enlace_a_carpeta_se_omite(tmp_path, hilos):
+    raiz = _arbol(tmp_path)
+    afuera = tmp_path / "afuera"
+    afuera.mkdir()
+    (afuera / "ajeno.jpg").write_bytes(b"x")
+    os.symlink(afuera, raiz / "enlace")
+    # Un ciclo tampoco se sigue
+    os.symlink(raiz, raiz / "r1" / "ciclo")
+    # Un enlace a un archivo sí es un archivo
+    os.symlink(raiz / "suelto.jpg", raiz / "otro.jpg")
+
+    resultado = _normalizar(recorrer_paralelo(str(raiz), hilos=hilos))
+
+    subcarpetas, archivos = resultado[str(raiz)]
+    assert "enlace" not in subcarpetas and "enlace" not in archivos
+    assert "ciclo" not in resultado[str(raiz / "r1")][1]
+    assert "otro.jpg" in archivos
+    relativas = [os.path.relpath(carpeta, raiz) for carpeta in resultado]
+    assert not any("enlace" in r or "ciclo" in r for r in relativas)
+
+    # El índice omite los mismos enlaces
+    indice = IndiceArbol(str(tmp_path / "indice.db"))
+    try:
+        indice.actualizar(str(raiz), hilos=hilos)
+        assert _normalizar(indice.recorrer(str(raiz))) == resultado
+    finally:
+        indice.cerrar()
+
+
+@pytest.mark.parametrize("hilos", [1, 4])
+def test_carpeta_ilegible_va_a_al_error(tmp_path, monkeypatch, hilos):
+    raiz = _arbol(tmp_path)
+    bloqueada = str(raiz / "r2")
+    scandir = os.scandir
+
+    def sin_permiso(ruta):
+        if os.fspath(ruta) == bloqueada:
+            raise PermissionError(13, "Permission denied", bloqueada)
+        return scandir(ruta)
+
+    monkeypatch.setattr(os, "scandir", sin_permiso)
+    errores = []
+
+    resultado = _normalizar(recorrer_paralelo(str(raiz), hilos=hilos, al_error=errores.append))
+
+    assert [e.filename for e in errores] == [bloqueada]
+    assert bloqueada not in resultado
+    assert str(raiz / "r3") in resultado
@@ -0,0 +1,107 @@
+import os
+import shutil
+import hashlib
+import threading
+import subprocess
+
+import pytest
+
+import verificacion
+from verificacion import (ErrorVerificacion, ManifiestoSumas, copiar_verificado, nuevo_hash,
+                          suma_archivo, verificar_copia)
+
+# No es múltiplo de la página: la última lectura con O_DIRECT es corta
+DATOS = os.urandom(3 * 4096 + 123)
+
+
+@pytest.fixture
+def origen(tmp_path):
+    ruta = tmp_path / "a.jpg"
+    ruta.write_bytes(DATOS)
+    return ruta
+
+
+@pytest.mark.parametrize("sin_cache", [True, False])
+@pytest.mark.parametrize("datos", [DATOS, b""])
+def test_suma_archivo_igual_que_hashlib(tmp_path, sin_cache, datos):
+    ruta = tmp_path / "a.bin"
+    ruta.write_bytes(datos)
+
+    assert suma_archivo(ruta, sin_cache=sin_cache, tam=4096) == hashlib.blake2b(datos).hexdigest()
+
+
+def test_suma_archivo_sin_o_direct(origen, monkeypatch):
+    # tmpfs y algunos recursos de red no admiten O_DIRECT
+    def sin_o_direct(*args):
+        raise OSError(22, "Invalid argument")
+
+    monkeypatch.setattr(verificacion, "_leer_directo", sin_o_direct)
+
+    assert suma_archivo(origen) == hashlib.blake2b(DATOS).hexdigest()
+
+
+def test_algoritmo_desconocido_o_no_instalado(monkeypatch):
+    with pytest.raises(ValueError):
+        nuevo_hash("md5")
+    monkeypatch.setattr(verificacion, "xxhash", None)
+    with pytest.raises(ValueError, match="xxhash"):
+        nuevo_hash("xxh64")
+    assert verificacion.algoritmos_disponibles() == ["blake2b"]
+
+
+def test_copiar_verificado_devuelve_la_suma_del_origen(tmp_path, origen):
+    destino = tmp_path / "b.jpg"
+
+    suma = copiar_verificado(origen, destino)
+
+    assert suma == hashlib.blake2b(DATOS).hexdigest()
+    assert destino.read_bytes() == DATOS
+
+
+def test_copia_que_no_coincide_con_el_origen(tmp_path, origen, monkeypatch):
+    def copiar_con_error(origen, destino, progreso=None, suma=None):
+        datos = open(origen, "rb").read()
+        suma.update(datos)
+        with open(destino, "wb") as f:
+            f.write(datos[:-1] + bytes([datos[-1] ^ 1]))
+        return len(datos)
+
+    monkeypatch.setattr(verificacion, "copiar_archivo", copiar_con_error)
+
+    with pytest.raises(ErrorVerificacion, match="verificación fallida"):
+        copiar_verificado(origen, tmp_path / "b.jpg")
+
+
+def test_verificar_copia(origen):
+    verificar_copia(origen, hashlib.blake2b(DATOS).hexdigest())
+    with pytest.raises(ErrorVerificacion):
+        verificar_copia(origen, "0" * 128)
+
+
+def test_manifiesto_con_rutas_relativas_y_varios_hilos(tmp_path, origen):
+    carpeta = tmp_path / "salida"
+    carpeta.mkdir()
+    manifiesto = ManifiestoSumas(carpeta)
+
+    def copiar(i):
+        subcarpeta = carpeta / f"T1_0000{i}"
+        subcarpeta.mkdir()
+        manifiesto.copiar(origen, subcarpeta / "a.jpg")
+
+    hilos = [threading.Thread(target=copiar, args=(i,)) for i in range(8)]
+    for h in hilos:
+        h.start()
+    for h in hilos:
+        h.join()
+    manifiesto.cerrar()
+
+    suma = hashlib.blake2b(DATOS).hexdigest()
+    lineas = sorted(open(manifiesto.ruta, encoding="utf-8").read().splitlines())
+    assert lineas == [f"{suma}  T1_0000{i}/a.jpg" for i in range(8)]
+    assert manifiesto.total == 8
+    assert manifiesto.ruta.endswith(".b2sum")
+
+    if shutil.which("b2sum"):
+        # Se comprueba con la herramienta estándar
+        subprocess.run(["b2sum", "--quiet", "-c", os.path.basename(manifiesto.ruta)],
+                       cwd=carpeta, check=True)
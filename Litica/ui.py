@@ -1,8 +1,17 @@
 import tkinter as tk
 from tkinter import filedialog, ttk, scrolledtext, messagebox
 import os
+import time
+import queue
+import threading
+import collections
 import webbrowser
-from procesador import ejecutar_proceso, recolectar_imagenes
+from procesador import ejecutar_proceso, recolectar_imagenes, identificar, ids_de_imagen
+from indice import IndiceArbol, ruta_por_defecto
+from catalogo import Catalogo, consultar
+from distribucion import DISTRIBUCIONES, DISTRIBUCION
+from empaquetado import formatos_disponibles
+from bitacora import NOMBRE_BITACORA
 
 
 # ============================
@@ -16,6 +25,15 @@ ACCENT = "#5874ee"   # Azul VSCode
 CONSOLE_BG = "#3A3A3A"
 CONSOLE_FG = "#5874ee"
 
+# Refresco de la UI mientras corre el proceso (~30 cuadros por segundo)
+FRAME_MS = 33
+# La consola guarda sólo las últimas N líneas (búfer circular)
+LINEAS_CONSOLA = 1000
+# Tope de eventos que se procesan por cuadro, para no congelar la ventana
+EVENTOS_POR_CUADRO = 20000
+# Opción de empaquetado que deja las imágenes sueltas
+SIN_PAQUETE = "no"
+
 
 class App(tk.Tk):
     def __init__(self):
@@ -25,23 +43,58 @@ class App(tk.Tk):
         # CONFIGURACIÓN DE VENTANA
         # -----------------------------
         self.title("Reencarpetado de Imágenes por ID de monumento")
-        self.geometry("900x650")
+        self.geometry("900x720")
         self.configure(bg=BG)
         self.resizable(False, False)
 
         # Centrar ventana
         self.update_idletasks()
         width = 900
-        height = 650
+        height = 720
         x = (self.winfo_screenwidth() // 2) - (width // 2)
         y = (self.winfo_screenheight() // 2) - (height // 2)
         self.geometry(f"{width}x{height}+{x}+{y}")
 
         # Variables
-        self.folder_origen = ""
+        # Una o varias carpetas origen (en discos distintos se copian a la vez)
+        self.folders_origen = []
         self.folder_destino = ""
         self.path_reporte = ""
         self.path_excel = ""
+        self.incremental = tk.BooleanVar(value=True)
+        self.enlazar = tk.BooleanVar(value=False)
+        self.deduplicar = tk.BooleanVar(value=False)
+        self.verificar = tk.BooleanVar(value=False)
+        # Subcarpetas dentro de cada monumento (ver distribucion.py)
+        self.distribucion = tk.StringVar(value=DISTRIBUCION)
+        # Un paquete por monumento en vez de archivos sueltos (ver empaquetado.py)
+        self.empaquetar = tk.StringVar(value=SIN_PAQUETE)
+
+        # Índice persistente de los orígenes: la vista previa y el recorrido
+        # sólo vuelven a listar las carpetas que cambiaron (ver indice.py)
+        try:
+            self.indice = IndiceArbol(ruta_por_defecto("litica"), ids_de_imagen)
+        except Exception:
+            self.indice = None
+
+        # Ejecución en segundo plano: el hilo de trabajo publica eventos en
+        # la cola y la UI los drena a ritmo fijo (ver _drenar_eventos)
+        self.cola_eventos = queue.Queue()
+        self.cancelar = threading.Event()
+        self.hilo = None
+        # True desde que arranca un trabajo hasta que llega su evento final
+        self.trabajando = False
+        # False mientras corre la vista previa: no mueve la barra de progreso
+        self.en_proceso = False
+        # Consultas del catálogo: en curso, pedidas en total y la última
+        # pedida en cada ventana (sólo esa se muestra)
+        self.consultas = 0
+        self.consultas_pedidas = 0
+        self.consulta_vigente = {}
+        # True mientras hay un ciclo de _drenar_eventos programado
+        self.drenando = False
+        self.lineas = collections.deque(maxlen=LINEAS_CONSOLA)
+        self.lineas_nuevas = 0
 
         # =====================================
         # TITULO
@@ -69,6 +122,10 @@ class App(tk.Tk):
                   command=self.seleccionar_origen,
                   bg=BTN_BG, fg=BTN_FG, width=25).grid(row=0, column=1, padx=10, pady=5)
 
+        tk.Button(frame, text="+ Agregar origen",
+                  command=self.agregar_origen,
+                  bg=BTN_BG, fg=BTN_FG, width=15).grid(row=0, column=2, padx=(0, 10), pady=5)
+
         # ---- DESTINO ----
         self.lbl_destino = tk.Label(frame, text="Carpeta destino: (no seleccionada)", bg=BG, fg=FG)
         self.lbl_destino.grid(row=1, column=0, padx=10, pady=5, sticky="w")
@@ -78,20 +135,63 @@ class App(tk.Tk):
                   bg=BTN_BG, fg=BTN_FG, width=25).grid(row=1, column=1, padx=10, pady=5)
 
         # ---- VISTA PREVIA ----
-        tk.Button(frame, text="Vista previa",
-                  command=self.vista_previa,
-                  bg=ACCENT, fg="white", width=25).grid(row=2, column=0, columnspan=2, pady=10)
-
-        # ---- EJECUTAR ----
-        tk.Button(frame, text="Ejecutar procesamiento",
-                  command=self.ejecutar,
-                  bg="#5874ee", fg="white", width=32).grid(row=3, column=0, columnspan=2, pady=10)
+        self.btn_vista = tk.Button(frame, text="Vista previa",
+                                   command=self.vista_previa,
+                                   bg=ACCENT, fg="white", width=25)
+        self.btn_vista.grid(row=2, column=0, columnspan=2, pady=10)
+
+        tk.Button(frame, text="Catálogo por ID",
+                  command=self.abrir_catalogo,
+                  bg=BTN_BG, fg=BTN_FG, width=15).grid(row=2, column=2, padx=(0, 10), pady=10)
+
+        # ---- OPCIONES ----
+        tk.Checkbutton(frame, text="Omitir imágenes ya copiadas sin cambios",
+                       variable=self.incremental,
+                       bg=BG, fg=FG, selectcolor=BTN_BG,
+                       activebackground=BG, activeforeground=FG).grid(row=3, column=0, sticky="w", padx=10)
+
+        tk.Checkbutton(frame, text="Reorganizar sin duplicar (mismo disco: reflink / enlace duro)",
+                       variable=self.enlazar,
+                       bg=BG, fg=FG, selectcolor=BTN_BG,
+                       activebackground=BG, activeforeground=FG).grid(row=3, column=1, sticky="w", padx=10)
+
+        tk.Checkbutton(frame, text="Detectar duplicados (una sola copia por contenido)",
+                       variable=self.deduplicar,
+                       bg=BG, fg=FG, selectcolor=BTN_BG,
+                       activebackground=BG, activeforeground=FG).grid(row=4, column=0, sticky="w", padx=10)
+
+        tk.Checkbutton(frame, text="Verificar copias (suma de control, relee el destino)",
+                       variable=self.verificar,
+                       bg=BG, fg=FG, selectcolor=BTN_BG,
+                       activebackground=BG, activeforeground=FG).grid(row=4, column=1, sticky="w", padx=10)
+
+        tk.Label(frame, text="Distribución de salida:", bg=BG, fg=FG).grid(row=3, column=2, sticky="w", padx=(0, 10))
+        ttk.Combobox(frame, textvariable=self.distribucion, values=list(DISTRIBUCIONES),
+                     state="readonly", width=14).grid(row=4, column=2, sticky="w", padx=(0, 10))
+
+        tk.Label(frame, text="Empaquetar por monumento:", bg=BG, fg=FG).grid(row=3, column=3, sticky="w", padx=(0, 10))
+        ttk.Combobox(frame, textvariable=self.empaquetar, values=[SIN_PAQUETE] + formatos_disponibles(),
+                     state="readonly", width=14).grid(row=4, column=3, sticky="w", padx=(0, 10))
+
+        # ---- EJECUTAR / CANCELAR ----
+        self.btn_ejecutar = tk.Button(frame, text="Ejecutar procesamiento",
+                                      command=self.ejecutar,
+                                      bg="#5874ee", fg="white", width=32)
+        self.btn_ejecutar.grid(row=5, column=0, pady=10)
+
+        self.btn_cancelar = tk.Button(frame, text="Cancelar",
+                                      command=self.cancelar_proceso,
+                                      bg=BTN_BG, fg=BTN_FG, width=25, state="disabled")
+        self.btn_cancelar.grid(row=5, column=1, pady=10)
 
         # =====================================
         # BARRA DE PROGRESO
         # =====================================
-        self.progress = ttk.Progressbar(self, length=700, mode="indeterminate")
-        self.progress.pack(pady=10)
+        self.progress = ttk.Progressbar(self, length=700, mode="determinate")
+        self.progress.pack(pady=(10, 2))
+
+        self.lbl_progreso = tk.Label(self, text="", bg=BG, fg=FG)
+        self.lbl_progreso.pack()
 
         # =====================================
         # CONSOLA
@@ -118,15 +218,25 @@ class App(tk.Tk):
                   command=self.abrir_excel,
                   bg=BTN_BG, fg=BTN_FG, width=25).grid(row=0, column=1, padx=10)
 
+        tk.Button(frame2, text="Reanudar ejecución interrumpida",
+                  command=self.reanudar_proceso,
+                  bg=BTN_BG, fg=BTN_FG, width=28).grid(row=0, column=2, padx=10)
+
     # =============================================
     # SELECCIÓN DE CARPETAS
     # =============================================
     def seleccionar_origen(self):
         ruta = filedialog.askdirectory()
         if ruta:
-            self.folder_origen = ruta
+            self.folders_origen = [ruta]
             self.lbl_origen.configure(text=f"Carpeta origen: {ruta}")
 
+    def agregar_origen(self):
+        ruta = filedialog.askdirectory()
+        if ruta and ruta not in self.folders_origen:
+            self.folders_origen.append(ruta)
+            self.lbl_origen.configure(text="Carpetas origen: " + "; ".join(self.folders_origen))
+
     def seleccionar_destino(self):
         ruta = filedialog.askdirectory()
         if ruta:
@@ -137,41 +247,313 @@ class App(tk.Tk):
     # VISTA PREVIA
     # =============================================
     def vista_previa(self):
-        if not self.folder_origen:
+        if not self.folders_origen:
             messagebox.showerror("Error", "Selecciona la carpeta origen.")
             return
 
-        imágenes = recolectar_imagenes(self.folder_origen)
-        self.log(f"Vista previa: {len(imágenes)} imágenes encontradas.")
+        if self.hilo is not None and self.hilo.is_alive():
+            return
+
+        # El primer escaneo de un recurso grande tarda: corre en el hilo de
+        # trabajo y el resultado llega por la cola de eventos. El catálogo
+        # consulta el mismo índice desde otro hilo; `IndiceArbol` serializa
+        # los accesos con su propio lock
+        self.log("Vista previa: escaneando...")
+        self.btn_vista.configure(state="disabled")
+        self.btn_ejecutar.configure(state="disabled")
+        self.en_proceso = False
+        self.hilo = threading.Thread(target=self._trabajo_vista_previa,
+                                     args=(list(self.folders_origen),), daemon=True)
+        self.trabajando = True
+        self.hilo.start()
+        self._drenar()
+
+    def _trabajo_vista_previa(self, origen):
+        """Corre en el hilo de trabajo: nunca toca widgets, sólo la cola."""
+        try:
+            inicio = time.monotonic()
+            imágenes = recolectar_imagenes(origen, self.indice)
+            monumentos = {identificar(os.path.basename(ruta))[0] for ruta in imágenes} - {""}
+            self.cola_eventos.put(("vista_previa", (len(imágenes), len(monumentos), time.monotonic() - inicio)))
+        except Exception as e:
+            self.cola_eventos.put(("error", f"Vista previa: {e}"))
+
+    # =============================================
+    # CATÁLOGO POR ID (consultas al índice, sin tocar el disco)
+    # =============================================
+    def abrir_catalogo(self):
+        if self.indice is None:
+            messagebox.showerror("Error", "El índice de orígenes no está disponible.")
+            return
+
+        ventana = tk.Toplevel(self)
+        ventana.title("Catálogo por ID")
+        ventana.configure(bg=BG)
+        ventana.geometry("760x420")
+
+        barra = tk.Frame(ventana, bg=BG)
+        barra.pack(fill="x", padx=10, pady=10)
+        consulta = tk.StringVar()
+        campo = tk.StringVar(value="monumento")
+        entrada = tk.Entry(barra, textvariable=consulta, width=30)
+        entrada.pack(side="left")
+        for texto, valor in (("Monumento", "monumento"), ("Excavación", "excavacion")):
+            tk.Radiobutton(barra, text=texto, variable=campo, value=valor,
+                           bg=BG, fg=FG, selectcolor=BTN_BG,
+                           activebackground=BG, activeforeground=FG).pack(side="left", padx=5)
+
+        salida = scrolledtext.ScrolledText(ventana, bg=CONSOLE_BG, fg=CONSOLE_FG,
+                                           insertbackground="white", font=("Consolas", 10))
+        salida.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+
+        catalogo = Catalogo(self.indice)
+
+        def buscar(*_):
+            texto, tipo = consulta.get(), campo.get()
+            if not texto.strip():
+                return
+
+            def trabajo():
+                inicio = time.monotonic()
+                lineas = consultar(catalogo, texto, tipo)
+                lineas.append(f"({(time.monotonic() - inicio) * 1000:.0f} ms)")
+                return lineas
+
+            self._consultar_catalogo(salida, trabajo)
+
+        def resumen():
+            monumentos, excavaciones, imagenes, total = catalogo.totales()
+            return [f"Catálogo: {monumentos} monumentos, {excavaciones} excavaciones, "
+                    f"{imagenes} imágenes. Se actualiza con cada vista previa o ejecución."]
+
+        tk.Button(barra, text="Buscar", command=buscar,
+                  bg=ACCENT, fg="white", width=12).pack(side="left", padx=5)
+        tk.Label(barra, text="ID, prefijo (T3_*) o rango (T1_00100..T1_00200)",
+                 bg=BG, fg=FG).pack(side="left", padx=5)
+        entrada.bind("<Return>", buscar)
+        entrada.focus_set()
+        self._consultar_catalogo(salida, resumen)
+
+    def _consultar_catalogo(self, salida, trabajo):
+        """
+        Corre `trabajo()` (devuelve las líneas a mostrar en `salida`) en
+        otro hilo: mientras un escaneo actualiza el índice, su lock está
+        tomado y la UI no debe congelarse esperando. Las líneas llegan por
+        la cola de eventos; si entretanto se pidió otra consulta en la
+        misma ventana, se descartan.
+        """
+        self.consultas += 1
+        self.consultas_pedidas += 1
+        n = self.consulta_vigente[str(salida)] = self.consultas_pedidas
+        salida.delete("1.0", tk.END)
+        salida.insert(tk.END, "Consultando el índice...")
+        threading.Thread(target=self._trabajo_catalogo, args=(salida, n, trabajo), daemon=True).start()
+        self._drenar()
+
+    def _trabajo_catalogo(self, salida, n, trabajo):
+        """Corre en otro hilo: nunca toca widgets, sólo la cola."""
+        try:
+            lineas = trabajo()
+        except Exception as e:
+            lineas = [f"❌ Error: {e}"]
+        self.cola_eventos.put(("catalogo", (salida, n, lineas)))
+
+    def _mostrar_catalogo(self, salida, n, lineas):
+        self.consultas -= 1
+        if self.consulta_vigente.get(str(salida)) != n:
+            return
+        del self.consulta_vigente[str(salida)]
+        if not salida.winfo_exists():
+            return
+        salida.delete("1.0", tk.END)
+        salida.insert(tk.END, "\n".join(lineas))
 
     # =============================================
-    # EJECUCIÓN PRINCIPAL
+    # EJECUCIÓN PRINCIPAL (en segundo plano)
     # =============================================
-    def ejecutar(self):
-        if not self.folder_origen or not self.folder_destino:
+    def ejecutar(self, reanudar=None):
+        if not self.folders_origen or not self.folder_destino:
             messagebox.showerror("Error", "Debes seleccionar ambas carpetas.")
             return
+        if self.hilo is not None and self.hilo.is_alive():
+            return
 
-        self.log("Procesando imágenes...")
-        self.progress.start(10)  # velocidad animada
+        self.log("Reanudando procesamiento..." if reanudar else "Procesando imágenes...")
+        self.btn_vista.configure(state="disabled")
+        self.btn_ejecutar.configure(state="disabled")
+        self.btn_cancelar.configure(state="normal")
+
+        # Estado del progreso (sólo lo toca el hilo de la UI)
+        self.en_proceso = True
+        self.cancelar.clear()
+        self.inicio = time.monotonic()
+        self.encontradas = 0
+        self.escaneo_terminado = False
+        self.procesadas = 0
+        self.bytes_copiados = 0
+        self.hilos = {}
+        self.por_estado = collections.Counter()
+        self.progress.configure(value=0, maximum=1)
+
+        opciones = dict(
+            incremental=self.incremental.get(),
+            enlazar=self.enlazar.get(),
+            deduplicar=self.deduplicar.get(),
+            verificar=self.verificar.get(),
+            reanudar=reanudar,
+            indice=self.indice,
+            distribucion=self.distribucion.get(),
+            empaquetar=None if self.empaquetar.get() == SIN_PAQUETE else self.empaquetar.get(),
+        )
+        self.hilo = threading.Thread(
+            target=self._trabajo,
+            args=(list(self.folders_origen), self.folder_destino, opciones),
+            daemon=True,
+        )
+        self.trabajando = True
+        self.hilo.start()
+        self._drenar()
 
-        # Llamar al proceso real
-        csv_path, excel_path = ejecutar_proceso(
-            self.folder_origen,
-            self.folder_destino,
-            callback=self.log
+    def reanudar_proceso(self):
+        """Elige la carpeta `reportes_<fecha>` de una ejecución cortada y la continúa."""
+        if not self.folders_origen or not self.folder_destino:
+            messagebox.showerror("Error", "Debes seleccionar ambas carpetas.")
+            return
+
+        ruta = filedialog.askdirectory(title="Carpeta de reportes a reanudar",
+                                       initialdir=self.folder_destino)
+        if not ruta:
+            return
+        if not os.path.exists(os.path.join(ruta, NOMBRE_BITACORA)):
+            messagebox.showerror("Error", "Esa carpeta no tiene bitácora de una ejecución anterior.")
+            return
+        self.ejecutar(reanudar=ruta)
+
+    def _trabajo(self, origen, destino, opciones):
+        """Corre en el hilo de trabajo: nunca toca widgets, sólo la cola."""
+        cola = self.cola_eventos
+        try:
+            resultado = ejecutar_proceso(
+                origen,
+                destino,
+                callback=lambda texto: cola.put(("mensaje", texto)),
+                eventos=cola.put,
+                cancelar=self.cancelar,
+                **opciones
+            )
+            cola.put(("fin", resultado))
+        except Exception as e:
+            cola.put(("error", str(e)))
+
+    def cancelar_proceso(self):
+        self.cancelar.set()
+        self.btn_cancelar.configure(state="disabled")
+        self.log("Cancelando: se terminan las imágenes en curso...")
+
+    def _drenar(self):
+        """Programa el ciclo de _drenar_eventos, salvo que ya esté corriendo."""
+        if not self.drenando:
+            self.drenando = True
+            self.after(FRAME_MS, self._drenar_eventos)
+
+    def _drenar_eventos(self):
+        """
+        Se ejecuta cada FRAME_MS en el hilo de la UI. Vacía la cola
+        acumulando los eventos (conteos, bytes, líneas de consola) y redibuja
+        una sola vez por cuadro, sin importar cuántas imágenes terminaron.
+        Sigue mientras haya un trabajo o una consulta del catálogo en curso.
+        """
+        final = None
+        for _ in range(EVENTOS_POR_CUADRO):
+            try:
+                tipo, dato = self.cola_eventos.get_nowait()
+            except queue.Empty:
+                break
+
+            if tipo == "procesada":
+                self.procesadas += 1
+                self.por_estado[dato] += 1
+            elif tipo == "bytes":
+                self.bytes_copiados += dato
+            elif tipo == "hilos":
+                dev, n = dato
+                self.hilos[dev] = n
+            elif tipo == "mensaje":
+                self._agregar_linea(dato)
+            elif tipo == "encontradas":
+                self.encontradas = max(self.encontradas, dato)
+            elif tipo == "escaneo_fin":
+                self.encontradas = dato
+                self.escaneo_terminado = True
+            elif tipo == "catalogo":
+                self._mostrar_catalogo(*dato)
+            elif tipo in ("fin", "error", "vista_previa"):
+                final = (tipo, dato)
+
+        if self.en_proceso:
+            self._actualizar_progreso()
+        self._refrescar_consola()
+
+        if final is not None:
+            self.trabajando = False
+        if self.trabajando or self.consultas:
+            self.after(FRAME_MS, self._drenar_eventos)
+        else:
+            self.drenando = False
+        if final is not None:
+            self._terminar(*final)
+
+    def _actualizar_progreso(self):
+        total = max(self.encontradas, self.procesadas, 1)
+        self.progress.configure(maximum=total, value=self.procesadas)
+
+        transcurrido = time.monotonic() - self.inicio
+        ritmo = self.procesadas / transcurrido if transcurrido > 0 else 0
+        if not self.escaneo_terminado:
+            eta = "escaneando..."
+        elif ritmo > 0:
+            restante = int((total - self.procesadas) / ritmo)
+            eta = f"ETA {restante // 3600:02d}:{restante % 3600 // 60:02d}:{restante % 60:02d}"
+        else:
+            eta = ""
+
+        estados = "  ".join(f"{k}: {v}" for k, v in sorted(self.por_estado.items()))
+        self.lbl_progreso.configure(
+            text=f"{self.procesadas}/{total} imágenes · {self.bytes_copiados / 2**20:.0f} MB · "
+                 f"{ritmo:.0f} img/s · {eta}"
+                 + (f" · hilos {'+'.join(map(str, self.hilos.values()))}" if self.hilos else "")
+                 + f"    {estados}"
         )
 
-        self.progress.stop()
+    def _terminar(self, tipo, dato):
+        self.btn_vista.configure(state="normal")
+        self.btn_ejecutar.configure(state="normal")
+        self.btn_cancelar.configure(state="disabled")
+
+        if tipo == "vista_previa":
+            imágenes, monumentos, segundos = dato
+            self.log(f"Vista previa: {imágenes} imágenes encontradas, "
+                     f"{monumentos} monumentos ({segundos:.2f} s).")
+            return
+
+        if tipo == "error":
+            self.log(f"❌ Error: {dato}")
+            messagebox.showerror("Error", f"El procesamiento falló:\n{dato}")
+            return
 
+        csv_path, excel_path = dato
         self.path_reporte = os.path.dirname(csv_path)
         self.path_excel = excel_path
 
-        self.log("\n✔ PROCESO COMPLETO ✔")
+        if self.cancelar.is_set():
+            self.log("\n✖ PROCESO CANCELADO ✖")
+        else:
+            self.log("\n✔ PROCESO COMPLETO ✔")
         self.log(f"CSV creado en: {csv_path}")
         self.log(f"Excel creado en: {excel_path}")
 
-        messagebox.showinfo("Finalizado", "El procesamiento ha terminado correctamente.")
+        messagebox.showinfo("Finalizado", "El procesamiento ha terminado correctamente."
+                            if not self.cancelar.is_set() else "El procesamiento fue cancelado.")
 
     # =============================================
     # FUNCIONES PARA ABRIR ARCHIVOS
@@ -189,12 +571,36 @@ class App(tk.Tk):
             messagebox.showerror("Error", "Aún no se ha generado un archivo Excel.")
 
     # =============================================
-    # LOG EN CONSOLA
+    # LOG EN CONSOLA (búfer circular)
     # =============================================
-    def log(self, texto):
-        self.consola.insert("end", texto + "\n")
+    def _agregar_linea(self, texto):
+        self.lineas.append(texto)
+        self.lineas_nuevas += 1
+
+    def _refrescar_consola(self):
+        """Vuelca a la consola las líneas nuevas y recorta las más viejas."""
+        if not self.lineas_nuevas:
+            return
+
+        if self.lineas_nuevas >= len(self.lineas):
+            # Llegaron más líneas de las que caben: se redibuja el búfer
+            self.consola.delete("1.0", "end")
+            self.consola.insert("end", "\n".join(self.lineas) + "\n")
+        else:
+            nuevas = list(self.lineas)[-self.lineas_nuevas:]
+            self.consola.insert("end", "\n".join(nuevas) + "\n")
+            sobrantes = int(self.consola.index("end-1c").split(".")[0]) - 1 - LINEAS_CONSOLA
+            if sobrantes > 0:
+                self.consola.delete("1.0", f"{sobrantes + 1}.0")
+
+        self.lineas_nuevas = 0
         self.consola.see("end")
 
+    def log(self, texto):
+        for linea in texto.split("\n"):
+            self._agregar_linea(linea)
+        self._refrescar_consola()
+
 
 if __name__ == "__main__":
     app = App()
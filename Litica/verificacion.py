@@ -0,0 +1,158 @@
+import os
+import mmap
+import hashlib
+import threading
+from datetime import datetime
+
+from copiador import copiar_archivo
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+
+# BLAKE2b de 512 bits, el mismo que `b2sum`: el manifiesto se puede
+# comprobar con `b2sum -c`. Con el paquete `xxhash` instalado también hay
+# "xxh64" y "xxh128" (mucho más rápidos, sin resistencia criptográfica).
+ALGORITMO = "blake2b"
+EXTENSIONES = {"blake2b": ".b2sum", "xxh64": ".xxh64sum", "xxh128": ".xxh128sum"}
+
+# Lectura de verificación (múltiplo del tamaño de página, para O_DIRECT)
+TAM_LECTURA = 8 * 1024 * 1024
+
+
+class ErrorVerificacion(OSError):
+    """La copia no coincide con el origen."""
+
+
+def algoritmos_disponibles():
+    return ["blake2b"] + (["xxh64", "xxh128"] if xxhash is not None else [])
+
+
+def nuevo_hash(algoritmo=ALGORITMO):
+    if algoritmo == "blake2b":
+        return hashlib.blake2b()
+    if algoritmo in ("xxh64", "xxh128"):
+        if xxhash is None:
+            raise ValueError(f"{algoritmo} requiere el paquete xxhash (pip install xxhash)")
+        return getattr(xxhash, algoritmo)()
+    raise ValueError(f"Algoritmo de suma desconocido: {algoritmo}")
+
+
+# =================================================
+# Lectura sin caché
+# =================================================
+def _leer_directo(ruta, h, tam):
+    """Lee con O_DIRECT (sin pasar por la caché de páginas). Lanza OSError si no se puede."""
+    fd = os.open(ruta, os.O_RDONLY | os.O_DIRECT)
+    try:
+        # mmap entrega un buffer alineado a página, como exige O_DIRECT
+        with mmap.mmap(-1, tam) as buf:
+            vista = memoryview(buf)
+            try:
+                while True:
+                    n = os.readv(fd, [buf])
+                    h.update(vista[:n])
+                    # Tras una lectura corta el desplazamiento ya no está
+                    # alineado: era el final del archivo
+                    if n < tam:
+                        break
+            finally:
+                vista.release()
+    finally:
+        os.close(fd)
+
+
+def _leer(ruta, h, tam, sin_cache):
+    with open(ruta, "rb") as f:
+        if sin_cache and hasattr(os, "posix_fadvise"):
+            # Sólo las páginas ya escritas a disco se pueden descartar
+            os.fdatasync(f.fileno())
+            os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_DONTNEED)
+        buf = bytearray(tam)
+        vista = memoryview(buf)
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(vista[:n])
+
+
+def suma_archivo(ruta, algoritmo=ALGORITMO, sin_cache=True, tam=TAM_LECTURA):
+    """
+    Suma de control de `ruta`. Con `sin_cache` se lee del disco y no de la
+    caché de páginas, para comprobar lo que realmente quedó escrito: con
+    O_DIRECT donde se puede (Linux) y si no, descartando antes las páginas
+    del archivo (`posix_fadvise`). En Windows la lectura es normal.
+    """
+    if sin_cache and hasattr(os, "O_DIRECT"):
+        h = nuevo_hash(algoritmo)
+        try:
+            _leer_directo(ruta, h, tam)
+            return h.hexdigest()
+        except OSError:
+            # tmpfs, algunos sistemas de red...: sin O_DIRECT
+            pass
+    h = nuevo_hash(algoritmo)
+    _leer(ruta, h, tam, sin_cache)
+    return h.hexdigest()
+
+
+def verificar_copia(destino, esperada, algoritmo=ALGORITMO, sin_cache=True):
+    """Relee `destino` y lanza `ErrorVerificacion` si su suma no es `esperada`."""
+    obtenida = suma_archivo(destino, algoritmo, sin_cache)
+    if obtenida != esperada:
+        raise ErrorVerificacion(f"verificación fallida en {destino}: {algoritmo} {obtenida[:16]}… ≠ {esperada[:16]}… (origen)")
+
+
+def copiar_verificado(origen, destino, progreso=None, algoritmo=ALGORITMO, sin_cache=True):
+    """
+    Copia calculando la suma del origen sobre los mismos buffers de la
+    copia (una sola lectura del origen), luego relee el destino y compara.
+    Devuelve la suma; lanza `ErrorVerificacion` si no coincide.
+    """
+    h = nuevo_hash(algoritmo)
+    copiar_archivo(origen, destino, progreso=progreso, suma=h)
+    esperada = h.hexdigest()
+    verificar_copia(destino, esperada, algoritmo, sin_cache)
+    return esperada
+
+
+# =================================================
+# Manifiesto de sumas
+# =================================================
+class ManifiestoSumas:
+    """
+    Archivo de sumas junto a los datos copiados, en el formato de
+    `b2sum`/`xxhsum` ("<suma>  <ruta relativa>"), con las rutas relativas
+    a `carpeta`: se comprueba con `cd carpeta && b2sum -c sumas_....b2sum`.
+    Varios hilos pueden agregar líneas a la vez.
+    """
+
+    def __init__(self, carpeta, algoritmo=ALGORITMO, sin_cache=True):
+        nuevo_hash(algoritmo)  # falla ya si el algoritmo no está disponible
+        self.carpeta = str(carpeta)
+        self.algoritmo = algoritmo
+        self.sin_cache = sin_cache
+        nombre = f"sumas_{datetime.now():%Y%m%d_%H%M%S}{EXTENSIONES[algoritmo]}"
+        self.ruta = os.path.join(self.carpeta, nombre)
+        self._f = open(self.ruta, "a", encoding="utf-8", newline="\n")
+        self._lock = threading.Lock()
+        self.total = 0
+
+    def agregar(self, ruta, suma):
+        rel = os.path.relpath(ruta, self.carpeta).replace(os.sep, "/")
+        with self._lock:
+            self._f.write(f"{suma}  {rel}\n")
+            self.total += 1
+
+    def copiar(self, origen, destino, progreso=None):
+        """`copiar_verificado` con el algoritmo del manifiesto; anota la suma."""
+        suma = copiar_verificado(origen, destino, progreso, self.algoritmo, self.sin_cache)
+        self.agregar(destino, suma)
+        return suma
+
+    def cerrar(self):
+        with self._lock:
+            self._f.close()
@@ -0,0 +1,333 @@
+import os
+import errno
+import queue
+import shutil
+import threading
+
+
+# Tamaño del buffer para la copia en espacio de usuario
+TAM_BUFFER = 8 * 1024 * 1024
+# Bytes por llamada al kernel: lo bastante grande para no perder
+# rendimiento y lo bastante chico para reportar progreso en archivos enormes
+TAM_TRAMO = 32 * 1024 * 1024
+# Sólo se preasigna espacio a partir de este tamaño
+UMBRAL_PREASIGNAR = 16 * 1024 * 1024
+# Copia a varios destinos: tramos leídos que cada destino puede tener
+# pendientes de escribir. Acota la memoria y cuánto se adelanta un
+# destino rápido a uno lento
+TRAMOS_EN_COLA = 4
+
+# Errores con los que el kernel indica "esta vía no sirve para este par
+# de archivos"; se prueba el siguiente método sin dar la copia por fallida
+_ERRNOS_SIN_SOPORTE = {
+    errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EBADF,
+    errno.ENOTSOCK, getattr(errno, "EOPNOTSUPP", errno.ENOTSUP), errno.ENOTSUP,
+}
+
+# ioctl de Linux para clonar un archivo por reflink (btrfs, XFS, bcachefs...)
+FICLONE = 0x40049409
+
+_usar_copy_file_range = hasattr(os, "copy_file_range")
+_usar_sendfile = hasattr(os, "sendfile") and os.name != "nt"
+
+
+def _mismo_archivo(origen, destino):
+    try:
+        return os.path.samefile(origen, destino)
+    except OSError:
+        return False
+
+
+def _preasignar(fd, tamano):
+    """Reserva el espacio del destino de una vez para evitar fragmentación."""
+    if tamano < UMBRAL_PREASIGNAR:
+        return
+    try:
+        if hasattr(os, "posix_fallocate"):
+            os.posix_fallocate(fd, 0, tamano)
+        elif os.name == "nt":
+            # En NTFS fijar el fin de archivo reserva los clústeres
+            os.truncate(fd, tamano)
+    except OSError:
+        # Sin soporte en este sistema de archivos: se copia igual
+        pass
+
+
+def _copiar_copy_file_range(fd_origen, fd_destino, tamano, copiados, progreso):
+    global _usar_copy_file_range
+    while copiados < tamano:
+        try:
+            n = os.copy_file_range(fd_origen, fd_destino, min(TAM_TRAMO, tamano - copiados))
+        except OSError as e:
+            if e.errno == errno.ENOSYS:
+                _usar_copy_file_range = False
+            if e.errno in _ERRNOS_SIN_SOPORTE:
+                return copiados, False
+            raise
+        if n == 0:
+            break
+        copiados += n
+        if progreso:
+            progreso(n)
+    return copiados, True
+
+
+def _copiar_sendfile(fd_origen, fd_destino, tamano, copiados, progreso):
+    global _usar_sendfile
+    while copiados < tamano:
+        try:
+            n = os.sendfile(fd_destino, fd_origen, copiados, min(TAM_TRAMO, tamano - copiados))
+        except OSError as e:
+            if e.errno == errno.ENOSYS:
+                _usar_sendfile = False
+            if e.errno in _ERRNOS_SIN_SOPORTE:
+                return copiados, False
+            raise
+        if n == 0:
+            break
+        copiados += n
+        if progreso:
+            progreso(n)
+    return copiados, True
+
+
+def _copiar_buffer(f_origen, f_destino, progreso, tam_buffer, suma=None):
+    copiados = 0
+    buf = bytearray(tam_buffer)
+    vista = memoryview(buf)
+    while True:
+        n = f_origen.readinto(buf)
+        if not n:
+            break
+        f_destino.write(vista[:n])
+        if suma is not None:
+            suma.update(vista[:n])
+        copiados += n
+        if progreso:
+            progreso(n)
+    return copiados
+
+
+def copiar_archivo(origen, destino, progreso=None, preasignar=True, tam_buffer=TAM_BUFFER, suma=None):
+    """
+    Copia `origen` en `destino` conservando metadatos (como `shutil.copy2`).
+
+    Usa `os.copy_file_range` o `os.sendfile` cuando el sistema lo permite
+    (los datos no pasan por Python) y si no, lecturas con un buffer grande.
+    `progreso(n)` se llama con los bytes copiados en cada tramo, también
+    dentro de un mismo archivo. Devuelve el total de bytes copiados.
+
+    `suma` (un objeto de hashlib o similar) se actualiza con los mismos
+    buffers de la copia; en ese caso no se usa la copia en kernel, porque
+    los datos tienen que pasar por Python.
+    """
+    if _mismo_archivo(origen, destino):
+        # Abrir el destino con "wb" truncaría también el origen
+        raise shutil.SameFileError(f"{origen!r} y {destino!r} son el mismo archivo")
+
+    with open(origen, "rb") as f_origen, open(destino, "wb") as f_destino:
+        fd_origen = f_origen.fileno()
+        fd_destino = f_destino.fileno()
+        tamano = os.fstat(fd_origen).st_size
+
+        if preasignar:
+            _preasignar(fd_destino, tamano)
+
+        copiados, completo = 0, False
+        en_kernel = suma is None
+        if en_kernel and _usar_copy_file_range:
+            copiados, completo = _copiar_copy_file_range(fd_origen, fd_destino, tamano, copiados, progreso)
+        if en_kernel and not completo and _usar_sendfile:
+            copiados, completo = _copiar_sendfile(fd_origen, fd_destino, tamano, copiados, progreso)
+
+        if not completo:
+            # Sin soporte del kernel: sigue por buffer desde donde se quedó.
+            # Para archivos chicos no hace falta reservar el buffer completo.
+            f_origen.seek(copiados)
+            f_destino.seek(copiados)
+            tam_buffer = min(tam_buffer, max(tamano - copiados + 1, 64 * 1024))
+            copiados += _copiar_buffer(f_origen, f_destino, progreso, tam_buffer, suma)
+
+        # Si el origen se achicó, no dejar el espacio preasignado al final
+        f_destino.truncate(copiados)
+
+    shutil.copystat(origen, destino)
+    return copiados
+
+
+class _Escritor(threading.Thread):
+    """Escribe en un destino los tramos que le entrega `copiar_a_varios`."""
+
+    def __init__(self, destino, tamano, en_cola):
+        super().__init__(daemon=True)
+        self.destino = destino
+        self.tamano = tamano
+        self.cola = queue.Queue(maxsize=en_cola)
+        self.error = None
+
+    def run(self):
+        terminado = False
+        try:
+            with open(self.destino, "wb") as f:
+                _preasignar(f.fileno(), self.tamano)
+                while True:
+                    tramo = self.cola.get()
+                    if tramo is None:
+                        terminado = True
+                        break
+                    f.write(tramo)
+                # Si el origen se achicó, no dejar el espacio preasignado al final
+                f.truncate(f.tell())
+        except BaseException as e:
+            # Cualquier falla (no sólo de E/S) detiene este escritor; la
+            # lectura la ve en `error` y deja de entregarle tramos
+            self.error = e
+        finally:
+            # Seguir vaciando la cola hasta el None final para que un `put`
+            # de la lectura con la cola llena nunca quede bloqueado
+            while not terminado and self.cola.get() is not None:
+                pass
+
+
+def copiar_a_varios(origen, destinos, progreso=None, tam_buffer=TAM_BUFFER, en_cola=TRAMOS_EN_COLA,
+                    suma=None):
+    """
+    Copia `origen` en todos los `destinos` leyéndolo una sola vez: cada
+    tramo leído se comparte (sin copiarlo) con un hilo escritor por
+    destino. Cada escritor tiene una cola de `en_cola` tramos; si un disco
+    es lento, la lectura espera cuando su cola se llena, así el rápido se
+    adelanta como mucho esos tramos y la memoria queda acotada.
+
+    Los errores de escritura son por destino: un disco lleno o
+    desconectado no detiene la copia a los demás. Devuelve la lista de
+    errores en el orden de `destinos` (None si ese destino quedó bien).
+    Un error al leer el origen, o uno de un escritor que no sea de E/S,
+    se lanza. `progreso(n)` recibe los bytes leídos del origen y `suma`,
+    si se pasa, se actualiza con ellos.
+    """
+    errores = [None] * len(destinos)
+    validos = []
+    for i, destino in enumerate(destinos):
+        if _mismo_archivo(origen, destino):
+            errores[i] = shutil.SameFileError(f"{origen!r} y {destino!r} son el mismo archivo")
+        else:
+            validos.append(i)
+
+    with open(origen, "rb") as f_origen:
+        tamano = os.fstat(f_origen.fileno()).st_size
+
+        if tamano <= tam_buffer:
+            # Archivo chico: se lee entero y se escribe en cada destino
+            # desde este mismo hilo (crear hilos costaría más que copiar)
+            datos = f_origen.read()
+            if suma is not None:
+                suma.update(datos)
+            for i in validos:
+                try:
+                    with open(destinos[i], "wb") as f_destino:
+                        f_destino.write(datos)
+                except OSError as e:
+                    errores[i] = e
+            if progreso:
+                progreso(len(datos))
+        else:
+            escritores = {i: _Escritor(destinos[i], tamano, en_cola) for i in validos}
+            for escritor in escritores.values():
+                escritor.start()
+            try:
+                while True:
+                    tramo = f_origen.read(tam_buffer)
+                    if not tramo:
+                        break
+                    vivos = [e for e in escritores.values() if e.error is None]
+                    if not vivos:
+                        break
+                    if suma is not None:
+                        suma.update(tramo)
+                    for escritor in vivos:
+                        escritor.cola.put(tramo)
+                    if progreso:
+                        progreso(len(tramo))
+            finally:
+                for escritor in escritores.values():
+                    escritor.cola.put(None)
+                for escritor in escritores.values():
+                    escritor.join()
+            for i, escritor in escritores.items():
+                errores[i] = escritor.error
+            # Un error que no es de E/S del destino es una falla del
+            # programa, no de un disco: no se reporta por destino
+            for escritor in escritores.values():
+                if escritor.error is not None and not isinstance(escritor.error, OSError):
+                    raise escritor.error
+
+    for i in validos:
+        if errores[i] is None:
+            try:
+                shutil.copystat(origen, destinos[i])
+            except OSError as e:
+                errores[i] = e
+    return errores
+
+
+def clonar_archivo(origen, destino):
+    """
+    Clon por reflink: el destino comparte los bloques del origen hasta que
+    alguno de los dos se modifique. Lanza OSError si el sistema de archivos
+    no lo soporta.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        raise OSError(errno.ENOTSUP, "reflink no disponible en este sistema")
+
+    # Se clona a un temporal para no perder un destino previo si falla
+    temporal = f"{destino}.clon_tmp"
+    with open(origen, "rb") as f_origen:
+        try:
+            with open(temporal, "wb") as f_destino:
+                fcntl.ioctl(f_destino.fileno(), FICLONE, f_origen.fileno())
+        except OSError:
+            os.remove(temporal)
+            raise
+    shutil.copystat(origen, temporal)
+    os.replace(temporal, destino)
+
+
+def enlazar_archivo(origen, destino):
+    """Enlace duro; si `destino` ya existe se reemplaza de forma atómica."""
+    if os.path.exists(destino):
+        if _mismo_archivo(origen, destino):
+            return
+        temporal = f"{destino}.enlace_tmp"
+        os.link(origen, temporal)
+        os.replace(temporal, destino)
+    else:
+        os.link(origen, destino)
+
+
+def clonar_enlazar_o_copiar(origen, destino, progreso=None):
+    """
+    Coloca `origen` en `destino` con el método más barato disponible:
+    reflink, luego enlace duro y, sólo si ninguno es posible (otro disco,
+    FAT/exFAT...), copia normal. Devuelve el método usado:
+    "CLONADO", "ENLAZADO" o "COPIADO".
+    """
+    if _mismo_archivo(origen, destino):
+        # Ya enlazado en una ejecución anterior
+        return "ENLAZADO"
+
+    try:
+        clonar_archivo(origen, destino)
+        return "CLONADO"
+    except OSError:
+        pass
+
+    try:
+        enlazar_archivo(origen, destino)
+        return "ENLAZADO"
+    except OSError:
+        pass
+
+    copiar_archivo(origen, destino, progreso=progreso)
+    return "COPIADO"
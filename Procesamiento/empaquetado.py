@@ -0,0 +1,305 @@
+import os
+import csv
+import tarfile
+import zipfile
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+# Formatos de paquete y su extensión. "zip" va sin compresión (stored):
+# JPEG/TIFF ya vienen comprimidos y así cualquier programa lo abre. Con el
+# paquete `zstandard` instalado también hay "tar.zst".
+FORMATOS = {"zip": ".zip", "tar": ".tar", "tar.zst": ".tar.zst"}
+FORMATO = "zip"
+NIVEL_ZSTD = 3
+
+# Índice junto a cada paquete: <paquete>.indice.csv
+SUFIJO_INDICE = ".indice.csv"
+# Mientras se escribe, el paquete lleva este sufijo: una ejecución cortada
+# nunca deja un paquete a medias con el nombre final
+SUFIJO_PARCIAL = ".parcial"
+
+TAM_BUFFER = 1024 * 1024
+
+
+def formatos_disponibles():
+    return ["zip", "tar"] + (["tar.zst"] if zstandard is not None else [])
+
+
+def ruta_indice(ruta_paquete):
+    return str(ruta_paquete) + SUFIJO_INDICE
+
+
+class _Contador:
+    """Envuelve un destino de escritura y lleva la posición (lo que pide tarfile)."""
+
+    def __init__(self, f):
+        self.f = f
+        self.posicion = 0
+
+    def write(self, datos):
+        self.f.write(datos)
+        self.posicion += len(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.posicion
+
+
+class _Varios:
+    """Archivo que escribe lo mismo en varios (un paquete por destino, una sola lectura del origen)."""
+
+    def __init__(self, archivos):
+        self.archivos = archivos
+
+    def write(self, datos):
+        for f in self.archivos:
+            f.write(datos)
+        return len(datos)
+
+    def tell(self):
+        return self.archivos[0].tell()
+
+    def seek(self, posicion, desde=os.SEEK_SET):
+        for f in self.archivos:
+            f.seek(posicion, desde)
+        return self.archivos[0].tell()
+
+    def seekable(self):
+        return True
+
+    def flush(self):
+        for f in self.archivos:
+            f.flush()
+
+    def sincronizar(self):
+        for f in self.archivos:
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        for f in self.archivos:
+            f.close()
+
+
+class _Lector:
+    """Lee el origen informando el progreso y alimentando la suma, sin copias intermedias."""
+
+    def __init__(self, f, progreso=None, suma=None):
+        self.f = f
+        self.progreso = progreso
+        self.suma = suma
+
+    def read(self, n=-1):
+        datos = self.f.read(n)
+        if datos:
+            if self.suma is not None:
+                self.suma.update(datos)
+            if self.progreso:
+                self.progreso(len(datos))
+        return datos
+
+
+class Paquete:
+    """
+    Un archivo de paquete (zip, tar o tar.zst) escrito de principio a fin,
+    sin volver atrás salvo para completar el encabezado de cada miembro del
+    zip. Cada origen se lee una sola vez y va directo al paquete: no pasa
+    por una copia temporal.
+
+    Junto al paquete queda `<paquete>.indice.csv` con el nombre, tamaño y
+    posición de cada archivo, para sacar uno solo con un `seek` (ver
+    `extraer`). En "tar.zst" cada miembro es un bloque zstd independiente:
+    la posición es la del bloque y, dentro de él, la de los datos.
+
+    Con `copias` (otras rutas) el mismo paquete se escribe a la vez en
+    varios destinos, leyendo cada origen una sola vez.
+
+    Un `Paquete` no admite escrituras concurrentes: lo usa un solo hilo.
+    """
+
+    def __init__(self, ruta, formato=FORMATO, copias=()):
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato de paquete desconocido: {formato} (usar {', '.join(FORMATOS)})")
+        if formato == "tar.zst" and zstandard is None:
+            raise ValueError("tar.zst requiere el paquete zstandard (pip install zstandard)")
+        self.rutas = [str(r) for r in (ruta, *copias)]
+        self.ruta = self.rutas[0]
+        self.formato = formato
+        self.total = 0
+        self.bytes = 0
+        self._indice = []
+        self._error = None
+
+        self._f = _Varios([])
+        try:
+            for r in self.rutas:
+                self._f.archivos.append(open(r + SUFIJO_PARCIAL, "wb"))
+        except OSError:
+            self._f.close()
+            raise
+        self._zst = None
+        if formato == "zip":
+            self._zip = zipfile.ZipFile(self._f, "w", zipfile.ZIP_STORED, allowZip64=True)
+        else:
+            destino = self._f
+            if formato == "tar.zst":
+                self._zst = zstandard.ZstdCompressor(level=NIVEL_ZSTD).stream_writer(self._f, closefd=False)
+                destino = self._zst
+            self._salida = _Contador(destino)
+            self._tar = tarfile.open(fileobj=self._salida, mode="w", format=tarfile.PAX_FORMAT)
+
+    def agregar(self, origen, nombre, progreso=None, suma=None):
+        """
+        Agrega `origen` como `nombre` (con "/" como separador). Si falla
+        antes de escribir (origen inexistente, sin permiso) el paquete
+        sigue sirviendo; si falla a mitad de la escritura queda inutilizable
+        y `cerrar()` lo descarta. Devuelve los bytes agregados.
+        """
+        if self._error is not None:
+            raise OSError(f"paquete {self.ruta} inutilizable: {self._error}")
+        nombre = nombre.replace(os.sep, "/")
+        with open(origen, "rb") as f:
+            st = os.fstat(f.fileno())
+            try:
+                if self.formato == "zip":
+                    self._agregar_zip(origen, nombre, f, progreso, suma)
+                else:
+                    self._agregar_tar(nombre, f, progreso, suma)
+            except Exception as e:
+                self._error = e
+                raise
+        self.total += 1
+        self.bytes += st.st_size
+        return st.st_size
+
+    def agregar_carpeta(self, nombre):
+        """Agrega una carpeta (vacía o no), para recrear la estructura completa al extraer."""
+        if self._error is not None:
+            raise OSError(f"paquete {self.ruta} inutilizable: {self._error}")
+        nombre = nombre.replace(os.sep, "/").rstrip("/") + "/"
+        try:
+            if self.formato == "zip":
+                self._zip.writestr(zipfile.ZipInfo(nombre), b"")
+            else:
+                info = tarfile.TarInfo(nombre)
+                info.type = tarfile.DIRTYPE
+                info.mode = 0o755
+                self._tar.addfile(info)
+                if self._zst is not None:
+                    self._zst.flush(zstandard.FLUSH_FRAME)
+        except Exception as e:
+            self._error = e
+            raise
+
+    def _agregar_zip(self, origen, nombre, f, progreso, suma):
+        info = zipfile.ZipInfo.from_file(origen, nombre, strict_timestamps=False)
+        info.compress_type = zipfile.ZIP_STORED
+        inicio = self._f.tell()
+        with self._zip.open(info, "w") as w:
+            # El encabezado local ya está escrito: aquí empiezan los datos
+            datos = self._f.tell()
+            lector = _Lector(f, progreso, suma)
+            while True:
+                bloque = lector.read(TAM_BUFFER)
+                if not bloque:
+                    break
+                w.write(bloque)
+        self._indice.append((nombre, info.file_size, inicio, datos))
+
+    def _agregar_tar(self, nombre, f, progreso, suma):
+        info = self._tar.gettarinfo(arcname=nombre, fileobj=f)
+        info.uname = info.gname = ""
+        if self._zst is not None:
+            inicio = self._f.tell()
+            datos = len(info.tobuf(self._tar.format, self._tar.encoding, self._tar.errors))
+        else:
+            inicio = self._salida.tell()
+            datos = inicio + len(info.tobuf(self._tar.format, self._tar.encoding, self._tar.errors))
+        self._tar.addfile(info, _Lector(f, progreso, suma))
+        if self._zst is not None:
+            # Cada miembro en su propio bloque: se puede descomprimir solo
+            self._zst.flush(zstandard.FLUSH_FRAME)
+        self._indice.append((nombre, info.size, inicio, datos))
+
+    def cerrar(self):
+        """
+        Termina el paquete y su índice y les da el nombre final. Un paquete
+        inutilizable se borra. Devuelve True si quedó completo.
+        """
+        try:
+            if self.formato == "zip":
+                self._zip.close()
+            else:
+                self._tar.close()
+                if self._zst is not None:
+                    self._zst.close()
+            self._f.sincronizar()
+        except Exception as e:
+            self._error = self._error or e
+        finally:
+            self._f.close()
+
+        if self._error is not None:
+            for ruta in self.rutas:
+                try:
+                    os.remove(ruta + SUFIJO_PARCIAL)
+                except OSError:
+                    pass
+            return False
+        for ruta in self.rutas:
+            with open(ruta_indice(ruta) + SUFIJO_PARCIAL, "w", newline="", encoding="utf8") as f:
+                w = csv.writer(f)
+                w.writerow(["nombre", "tamano", "inicio", "datos"])
+                w.writerows(self._indice)
+            os.replace(ruta + SUFIJO_PARCIAL, ruta)
+            os.replace(ruta_indice(ruta) + SUFIJO_PARCIAL, ruta_indice(ruta))
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+
+def leer_indice(ruta_paquete):
+    """{nombre: (tamaño, inicio, datos)} del índice de un paquete."""
+    with open(ruta_indice(ruta_paquete), newline="", encoding="utf8") as f:
+        lector = csv.reader(f)
+        next(lector)
+        return {nombre: (int(tamano), int(inicio), int(datos)) for nombre, tamano, inicio, datos in lector}
+
+
+def extraer(ruta_paquete, nombre, destino, indice=None):
+    """
+    Saca un solo archivo del paquete yendo directo a su posición (según el
+    índice), sin leer el resto. En "tar.zst" sólo se descomprime su bloque.
+    """
+    if indice is None:
+        indice = leer_indice(ruta_paquete)
+    tamano, inicio, datos = indice[nombre.replace(os.sep, "/")]
+    with open(ruta_paquete, "rb") as f, open(destino, "wb") as salida:
+        if str(ruta_paquete).endswith(FORMATOS["tar.zst"]):
+            if zstandard is None:
+                raise ValueError("tar.zst requiere el paquete zstandard (pip install zstandard)")
+            f.seek(inicio)
+            f = zstandard.ZstdDecompressor().stream_reader(f, read_across_frames=False)
+            # Los datos empiezan después del encabezado tar del miembro
+            pendiente = datos
+            while pendiente:
+                leido = len(f.read(min(pendiente, TAM_BUFFER)))
+                if not leido:
+                    raise OSError(f"{ruta_paquete}: {nombre} está incompleto")
+                pendiente -= leido
+        else:
+            f.seek(datos)
+        while tamano:
+            bloque = f.read(min(tamano, TAM_BUFFER))
+            if not bloque:
+                raise OSError(f"{ruta_paquete}: {nombre} está incompleto")
+            salida.write(bloque)
+            tamano -= len(bloque)
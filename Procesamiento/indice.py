@@ -0,0 +1,337 @@
+import os
+import sys
+import time
+import sqlite3
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+from planificador import dispositivo_de, es_rotacional
+from recorrido import HILOS_RECORRIDO
+
+
+# Una carpeta modificada hace menos de esto se vuelve a listar en el
+# próximo escaneo aunque su mtime no cambie: un archivo agregado en el
+# mismo instante del listado podría no aparecer y tampoco mover el mtime
+# (como el "racy git" del índice de git)
+MARGEN_RECIENTE_NS = 2 * 10**9
+
+# Versión del esquema (PRAGMA user_version); una base de otra versión se
+# vacía y se vuelve a armar en el próximo escaneo
+ESQUEMA = 1
+
+_Stat = collections.namedtuple("_Stat", "st_size st_mtime st_mtime_ns st_ino")
+
+
+def ruta_por_defecto(aplicacion):
+    """Base de datos del índice en la carpeta de caché del usuario."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == "darwin":
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    carpeta = os.path.join(base, "RepoTM")
+    os.makedirs(carpeta, exist_ok=True)
+    return os.path.join(carpeta, f"indice_{aplicacion}.sqlite")
+
+
+def _rango(ruta):
+    """Límites [desde, hasta) de las rutas que están debajo de `ruta`."""
+    return ruta + os.sep, ruta + chr(ord(os.sep) + 1)
+
+
+def _avisar(al_error, error):
+    """Pasa `error` a `al_error`, salvo que sea algo que ya no existe (se borró)."""
+    if al_error is not None and not isinstance(error, FileNotFoundError):
+        al_error(error)
+
+
+class Entrada:
+    """
+    Archivo o carpeta leído del índice. Imita lo que se usa de
+    `os.DirEntry` (`name`, `path`, `is_dir()`, `stat()`, `inode()`), así
+    sirve tal cual para los `podar`/`filtrar` de `recorrido`.
+    """
+
+    __slots__ = ("name", "path", "_stat")
+
+    def __init__(self, carpeta, nombre, stat=None):
+        self.name = nombre
+        self.path = os.path.join(carpeta, nombre)
+        self._stat = stat
+
+    def is_dir(self, follow_symlinks=True):
+        return self._stat is None
+
+    def is_file(self, follow_symlinks=True):
+        return self._stat is not None
+
+    def stat(self, follow_symlinks=True):
+        return self._stat
+
+    def inode(self):
+        return self._stat.st_ino if self._stat else 0
+
+
+class IndiceArbol:
+    """
+    Índice persistente (SQLite) de uno o varios árboles de origen.
+
+    Guarda cada carpeta con su mtime y cada archivo con tamaño, mtime,
+    inodo y, si se pasa `identificar(nombre)`, los IDs que se extraen de
+    su nombre (la base del catálogo por ID de Litica). `actualizar(raiz)` sólo vuelve a listar las carpetas cuyo
+    mtime cambió (agregar, borrar o renombrar un archivo cambia el mtime
+    de su carpeta); las demás se resuelven con un `stat`. Un archivo
+    editado en su lugar no cambia el mtime de su carpeta: su tamaño en el
+    índice puede quedar atrasado hasta que algo más cambie en la carpeta.
+    """
+
+    def __init__(self, ruta, identificar=None):
+        self.ruta = ruta
+        self.identificar = identificar
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, check_same_thread=False)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.execute("PRAGMA synchronous=NORMAL")
+        if self._con.execute("PRAGMA user_version").fetchone()[0] != ESQUEMA:
+            self._con.executescript("DROP TABLE IF EXISTS archivos; DROP TABLE IF EXISTS carpetas;")
+        self._con.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS carpetas (
+                id       INTEGER PRIMARY KEY,
+                ruta     TEXT NOT NULL UNIQUE,
+                padre    INTEGER,
+                mtime_ns INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS carpetas_padre ON carpetas (padre);
+            CREATE TABLE IF NOT EXISTS archivos (
+                carpeta       INTEGER NOT NULL,
+                nombre        TEXT NOT NULL,
+                tamano        INTEGER NOT NULL,
+                mtime_ns      INTEGER NOT NULL,
+                inodo         INTEGER NOT NULL,
+                id_monumento  TEXT,
+                id_excavacion TEXT,
+                PRIMARY KEY (carpeta, nombre)
+            ) WITHOUT ROWID;
+            -- Búsquedas por ID (catálogo): el índice ya incluye la clave
+            -- primaria, así que contar y sumar bytes no toca la tabla
+            CREATE INDEX IF NOT EXISTS archivos_monumento
+                ON archivos (id_monumento, tamano) WHERE id_monumento IS NOT NULL;
+            CREATE INDEX IF NOT EXISTS archivos_excavacion
+                ON archivos (id_excavacion, tamano) WHERE id_excavacion IS NOT NULL;
+            """
+        )
+        self._con.execute(f"PRAGMA user_version = {ESQUEMA}")
+        self._con.commit()
+
+    def cerrar(self):
+        with self._lock:
+            self._con.close()
+
+    # =================================================
+    # Escaneo incremental
+    # =================================================
+    def _revisar(self, carpeta, mtime_conocido, al_error=None):
+        """
+        (carpeta, mtime_ns, listado). `listado` es None si el mtime no
+        cambió; si no, (subcarpetas, archivos) con archivos como
+        (nombre, tamaño, mtime_ns, inodo). mtime_ns es None si la carpeta
+        ya no existe o no se pudo leer. Los errores que no son "ya no
+        existe" se pasan a `al_error`.
+        """
+        try:
+            mtime = os.stat(carpeta).st_mtime_ns
+        except OSError as e:
+            _avisar(al_error, e)
+            return carpeta, None, None
+        if mtime == mtime_conocido:
+            return carpeta, mtime, None
+
+        subcarpetas, archivos = [], []
+        try:
+            with os.scandir(carpeta) as it:
+                for entrada in it:
+                    try:
+                        if entrada.is_dir(follow_symlinks=False):
+                            subcarpetas.append(entrada.name)
+                            continue
+                        if entrada.is_symlink() and entrada.is_dir():
+                            # Enlace a una carpeta: se omite, como en `recorrido`
+                            continue
+                        st = entrada.stat(follow_symlinks=False)
+                    except OSError as e:
+                        _avisar(al_error, e)
+                        continue
+                    # En Windows inode() costaría un stat más por archivo
+                    inodo = entrada.inode() if os.name != "nt" else 0
+                    archivos.append((entrada.name, st.st_size, st.st_mtime_ns, inodo))
+        except OSError as e:
+            _avisar(al_error, e)
+            return carpeta, None, None
+        if time.time_ns() - mtime < MARGEN_RECIENTE_NS:
+            mtime = 0
+        return carpeta, mtime, (subcarpetas, archivos)
+
+    def actualizar(self, raiz, hilos=None, al_error=None):
+        """
+        Pone al día el índice de `raiz`. Las carpetas de cada nivel se
+        revisan en paralelo (en serie en un HDD). Devuelve un dict con
+        "carpetas" (revisadas), "relistadas" y "segundos".
+        `al_error(OSError)` se entera de lo que no se pudo leer (como en
+        `recorrido.recorrer`); eso queda fuera del índice.
+        """
+        inicio = time.monotonic()
+        raiz = os.path.abspath(raiz)
+        if hilos is None:
+            hilos = 1 if es_rotacional(dispositivo_de(raiz)) else HILOS_RECORRIDO
+
+        desde, hasta = _rango(raiz)
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT id, ruta, padre, mtime_ns FROM carpetas WHERE ruta = ? OR (ruta >= ? AND ruta < ?)",
+                (raiz, desde, hasta),
+            ).fetchall()
+        ids = {ruta: id_ for id_, ruta, _, _ in filas}
+        mtimes = {ruta: mtime for _, ruta, _, mtime in filas}
+        rutas_por_id = {id_: ruta for id_, ruta, _, _ in filas}
+        hijas = collections.defaultdict(list)
+        for _, ruta, padre, _ in filas:
+            if padre in rutas_por_id:
+                hijas[rutas_por_id[padre]].append(ruta)
+
+        vistas = set()
+        relistadas = 0
+        nivel = [(raiz, None)]
+        with ThreadPoolExecutor(max_workers=max(1, hilos)) as pool:
+            while nivel:
+                siguiente = []
+                revisadas = pool.map(lambda c: self._revisar(c[0], mtimes.get(c[0]), al_error), nivel)
+                with self._lock:
+                    for (carpeta, padre), (_, mtime, listado) in zip(nivel, revisadas):
+                        if mtime is None:
+                            continue
+                        vistas.add(carpeta)
+                        if listado is None:
+                            siguiente += [(h, carpeta) for h in hijas.get(carpeta, ())]
+                            continue
+                        relistadas += 1
+                        id_ = self._guardar_carpeta(carpeta, ids.get(padre), mtime, listado[1])
+                        ids[carpeta] = id_
+                        siguiente += [(os.path.join(carpeta, n), carpeta) for n in listado[0]]
+                    self._con.commit()
+                nivel = siguiente
+
+        # Lo que estaba en el índice y ya no existe
+        borradas = [ids[ruta] for ruta in ids if ruta not in vistas]
+        with self._lock:
+            for id_ in borradas:
+                self._con.execute("DELETE FROM archivos WHERE carpeta = ?", (id_,))
+                self._con.execute("DELETE FROM carpetas WHERE id = ?", (id_,))
+            self._con.commit()
+
+        return {"carpetas": len(vistas), "relistadas": relistadas,
+                "segundos": time.monotonic() - inicio}
+
+    def _guardar_carpeta(self, carpeta, padre, mtime, archivos):
+        con = self._con
+        fila = con.execute("SELECT id FROM carpetas WHERE ruta = ?", (carpeta,)).fetchone()
+        if fila:
+            id_ = fila[0]
+            con.execute("UPDATE carpetas SET padre = ?, mtime_ns = ? WHERE id = ?", (padre, mtime, id_))
+            con.execute("DELETE FROM archivos WHERE carpeta = ?", (id_,))
+        else:
+            id_ = con.execute("INSERT INTO carpetas (ruta, padre, mtime_ns) VALUES (?, ?, ?)",
+                              (carpeta, padre, mtime)).lastrowid
+        con.executemany("INSERT INTO archivos VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        ((id_, nombre, tamano, mtime_a, inodo, *self._ids(nombre))
+                         for nombre, tamano, mtime_a, inodo in archivos))
+        return id_
+
+    def _ids(self, nombre):
+        """(id_monumento, id_excavacion) del nombre; NULL si no hay."""
+        if self.identificar is None:
+            return None, None
+        id_monumento, id_excavacion = self.identificar(nombre)
+        return id_monumento or None, id_excavacion or None
+
+    # =================================================
+    # Consultas (sin tocar el disco)
+    # =================================================
+    def consultar(self, sql, parametros=()):
+        """Ejecuta una consulta de sólo lectura sobre la base y devuelve las filas."""
+        with self._lock:
+            return self._con.execute(sql, parametros).fetchall()
+
+    def carpetas(self, raiz):
+        """{ruta: mtime_ns} de `raiz` y todo lo que tiene debajo."""
+        raiz = os.path.abspath(raiz)
+        desde, hasta = _rango(raiz)
+        with self._lock:
+            return dict(self._con.execute(
+                "SELECT ruta, mtime_ns FROM carpetas WHERE ruta = ? OR (ruta >= ? AND ruta < ?)",
+                (raiz, desde, hasta)))
+
+    def archivos(self, raiz):
+        """
+        Lista de (carpeta, nombre, tamaño, mtime_ns, id_monumento,
+        id_excavacion) de todo lo que está debajo de `raiz`.
+        """
+        raiz = os.path.abspath(raiz)
+        desde, hasta = _rango(raiz)
+        with self._lock:
+            return self._con.execute(
+                """
+                SELECT c.ruta, a.nombre, a.tamano, a.mtime_ns, a.id_monumento, a.id_excavacion
+                FROM carpetas c JOIN archivos a ON a.carpeta = c.id
+                WHERE c.ruta = ? OR (c.ruta >= ? AND c.ruta < ?)
+                ORDER BY c.ruta, a.inodo
+                """,
+                (raiz, desde, hasta),
+            ).fetchall()
+
+    def recorrer(self, raiz, podar=None, filtrar=None, entradas=False):
+        """
+        Como `recorrido.recorrer`, pero desde el índice: genera
+        (carpeta, subcarpetas, archivos), con los archivos en orden de
+        inodo. `podar`/`filtrar` reciben `Entrada`s (como `os.DirEntry`).
+        Llamar antes a `actualizar(raiz)` para que esté al día.
+        """
+        raiz = os.path.abspath(raiz)
+        desde, hasta = _rango(raiz)
+        with self._lock:
+            filas = self._con.execute(
+                "SELECT id, ruta, padre FROM carpetas WHERE ruta = ? OR (ruta >= ? AND ruta < ?)",
+                (raiz, desde, hasta),
+            ).fetchall()
+        id_raiz = None
+        hijas = collections.defaultdict(list)
+        for id_, ruta, padre in filas:
+            if ruta == raiz:
+                id_raiz = id_
+            hijas[padre].append((id_, ruta))
+        if id_raiz is None:
+            return
+
+        pendientes = [(id_raiz, raiz)]
+        while pendientes:
+            id_, carpeta = pendientes.pop()
+            with self._lock:
+                filas = self._con.execute(
+                    "SELECT nombre, tamano, mtime_ns, inodo FROM archivos WHERE carpeta = ? ORDER BY inodo",
+                    (id_,),
+                ).fetchall()
+            archivos = [Entrada(carpeta, nombre, _Stat(tamano, mtime / 1e9, mtime, inodo))
+                        for nombre, tamano, mtime, inodo in filas]
+            if filtrar is not None:
+                archivos = [e for e in archivos if filtrar(e)]
+            subcarpetas = [(h, Entrada(carpeta, os.path.basename(ruta))) for h, ruta in hijas.get(id_, ())]
+            if podar is not None:
+                subcarpetas = [(h, e) for h, e in subcarpetas if not podar(e)]
+
+            if entradas:
+                yield carpeta, [e for _, e in subcarpetas], archivos
+            else:
+                yield carpeta, [e.name for _, e in subcarpetas], [e.name for e in archivos]
+            pendientes += [(h, e.path) for h, e in reversed(subcarpetas)]
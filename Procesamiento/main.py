@@ -2,11 +2,11 @@
 # Importaciones y configuración inicial
 import os
 import sys
-import re
+import copy
 import json
-import shutil
 import queue
 import threading
+import time
 import platform
 import subprocess
 from pathlib import Path
@@ -17,8 +17,29 @@ from tkinter import ttk, filedialog, messagebox
 
 import pandas as pd
 
+from copiador import copiar_archivo, copiar_a_varios
+from planificador import ejecutar_por_dispositivo
+from rules import DEFAULT_RULES, RuleSet
+from scan_plan import ScanPlan, parse_ids
+from indice import IndiceArbol, ruta_por_defecto
+from sync import sync_file, delete_extraneous, is_unchanged, unshare
+import snapshot
+from verificacion import ManifiestoSumas, nuevo_hash, verificar_copia
+from empaquetado import Paquete, FORMATOS, FORMATO, formatos_disponibles
+
 CONFIG_FILE = "config.json"
 
+# Archivos a partir de este tamaño informan progreso por bytes y se
+# copian antes que los chicos de su monumento
+LARGE_FILE_BYTES = 64 * 1024 * 1024
+
+# Hilos de copia por disco; 0 = automático (según el tipo de disco)
+DEFAULT_WORKERS = 0
+MAX_WORKERS = 32
+
+# Separador para indicar varias carpetas origen (o destino) en el mismo campo
+SOURCE_SEPARATOR = ";"
+
 # -------------------------
 # Utilidades para entorno
 # -------------------------
@@ -50,12 +71,53 @@ class App:
         self.report_path_absolute = False
         self.report_path = Path(get_base_path() / "reporte")
 
+        # Reglas de inclusión/exclusión por modo (config.json → "rules")
+        self.rules = copy.deepcopy(DEFAULT_RULES)
+        self.workers = tk.IntVar(value=DEFAULT_WORKERS)
+
+        # Respaldo en modo espejo: sólo copiar lo que cambió y, si se pide,
+        # borrar del destino lo que ya no está en el origen (ver sync.py)
+        self.mirror_sync = tk.BooleanVar(value=False)
+        self.mirror_delete = tk.BooleanVar(value=False)
+
+        # Respaldo por instantáneas: dest/<fecha_hora>/ con enlaces duros a
+        # la anterior para lo que no cambió (ver snapshot.py)
+        self.snapshot_mode = tk.BooleanVar(value=False)
+        self.snapshot_retention = dict(snapshot.DEFAULT_RETENTION)
+
+        # Copia verificada: suma de control en la misma lectura de la copia
+        # y relectura del destino (ver verificacion.py)
+        self.verify_copies = tk.BooleanVar(value=False)
+
+        # Un archivo por monumento (zip, tar o tar.zst) en vez de miles de
+        # archivos sueltos, para recursos de red y USB (ver empaquetado.py)
+        self.pack_monuments = tk.BooleanVar(value=False)
+        self.pack_format = tk.StringVar(value=FORMATO)
+
+        # Índice persistente de los orígenes (ver indice.py): "Analizar" y
+        # el plan de copia sólo vuelven a listar las carpetas que cambiaron
+        self.use_index = True
+        self.index = None
+
         # Cola para comunicacion hilo->UI y lista de no copiados
         self.ui_queue = queue.Queue()
         self.not_copied = []
 
+        # Plan del último recorrido (se reutiliza si nada cambió) y
+        # progreso por bytes de la ejecución en curso
+        self.scan_plan = None
+        self.progress_lock = threading.Lock()
+        self.bytes_done = 0
+        self.run_totals = (0, 0)
+        self.run_started = 0.0
+
         # Cargar configuración si existe
         self.load_config()
+        if self.use_index:
+            try:
+                self.index = IndiceArbol(ruta_por_defecto("procesamiento"), parse_ids)
+            except Exception as e:
+                print("Índice no disponible:", e)
 
         # Construir UI
         self.setup_ui()
@@ -93,6 +155,18 @@ class App:
                     self.report_path = Path(rp)
                 else:
                     self.report_path = Path(get_base_path()) / rp
+            self.workers.set(data.get("workers", DEFAULT_WORKERS))
+            self.mirror_sync.set(data.get("mirror_sync", False))
+            self.mirror_delete.set(data.get("mirror_delete", False))
+            self.snapshot_mode.set(data.get("snapshot", False))
+            self.snapshot_retention.update(data.get("snapshot_retention", {}))
+            self.verify_copies.set(data.get("verify", False))
+            self.pack_monuments.set(data.get("pack", False))
+            self.pack_format.set(data.get("pack_format", FORMATO))
+            self.use_index = data.get("use_index", True)
+            for mode, rules in data.get("rules", {}).items():
+                if mode in self.rules:
+                    self.rules[mode].update(rules)
         except Exception as e:
             print("Error cargando config:", e)
 
@@ -107,6 +181,16 @@ class App:
             "dark_mode": self.dark_mode.get(),
             "report_path": rp_to_save,
             "report_path_absolute": self.report_path_absolute,
+            "workers": self.workers.get(),
+            "mirror_sync": self.mirror_sync.get(),
+            "mirror_delete": self.mirror_delete.get(),
+            "snapshot": self.snapshot_mode.get(),
+            "snapshot_retention": self.snapshot_retention,
+            "verify": self.verify_copies.get(),
+            "pack": self.pack_monuments.get(),
+            "pack_format": self.pack_format.get(),
+            "use_index": self.use_index,
+            "rules": self.rules,
         }
         try:
             with open(CONFIG_FILE, "w", encoding="utf-8") as f:
@@ -130,6 +214,8 @@ class App:
         menubar.add_cascade(label="Opciones", menu=menu_opciones)
         menu_opciones.add_checkbutton(label="Modo Oscuro 🌙", variable=self.dark_mode, command=self.toggle_dark_mode)
         menu_opciones.add_command(label="Configuración de reportes…", command=self.open_config_window)
+        menu_opciones.add_command(label="Hilos de copia…", command=self.open_workers_window)
+        menu_opciones.add_command(label="Instantáneas…", command=self.open_snapshots_window)
         menu_opciones.add_command(label="Abrir carpeta de reportes", command=self.open_report_folder)
 
         menu_tools = tk.Menu(menubar, tearoff=0)
@@ -151,11 +237,13 @@ class App:
         ttk.Label(main, text="Carpeta Origen:").grid(row=0, column=0, sticky="w")
         ttk.Entry(main, textvariable=self.source_var).grid(row=0, column=1, sticky="ew")
         ttk.Button(main, text="Buscar", command=self.choose_source).grid(row=0, column=2, padx=6)
+        ttk.Button(main, text="+ Agregar", command=self.add_source).grid(row=0, column=3, padx=(0, 6))
 
         # Destino
         ttk.Label(main, text="Carpeta Destino:").grid(row=1, column=0, sticky="w")
         ttk.Entry(main, textvariable=self.dest_var).grid(row=1, column=1, sticky="ew")
         ttk.Button(main, text="Buscar", command=self.choose_dest).grid(row=1, column=2, padx=6)
+        ttk.Button(main, text="+ Agregar", command=self.add_dest).grid(row=1, column=3, padx=(0, 6))
 
         # Modo
         ttk.Label(main, text="Modo de operación:").grid(row=2, column=0, sticky="w")
@@ -170,16 +258,27 @@ class App:
 
         ttk.Checkbutton(main, text="Generar reporte Excel de no copiados", variable=self.generate_report).grid(row=6, column=1, sticky="w", pady=(0,8))
 
+        # Respaldo espejo
+        ttk.Checkbutton(main, text="Respaldo espejo: copiar sólo lo que cambió", variable=self.mirror_sync).grid(row=7, column=1, sticky="w")
+        ttk.Checkbutton(main, text="Borrar del destino lo que ya no está en el origen", variable=self.mirror_delete).grid(row=8, column=1, sticky="w")
+        ttk.Checkbutton(main, text="Respaldo por instantáneas (carpeta con fecha y hora)", variable=self.snapshot_mode).grid(row=9, column=1, sticky="w")
+        ttk.Checkbutton(main, text="Verificar copias (suma de control, relee el destino)", variable=self.verify_copies).grid(row=10, column=1, sticky="w", pady=(0,8))
+
+        # Empaquetado por monumento
+        ttk.Checkbutton(main, text="Empaquetar cada monumento en un archivo", variable=self.pack_monuments).grid(row=7, column=2, columnspan=2, sticky="w")
+        ttk.Combobox(main, textvariable=self.pack_format, values=formatos_disponibles(),
+                     state="readonly", width=10).grid(row=8, column=2, sticky="w")
+
         # Log
         self.log = tk.Text(main, height=14)
-        self.log.grid(row=7, column=0, columnspan=3, sticky="nsew")
-        main.rowconfigure(7, weight=1)
+        self.log.grid(row=11, column=0, columnspan=3, sticky="nsew")
+        main.rowconfigure(11, weight=1)
 
         # Progreso
         self.progress = ttk.Progressbar(main, mode="determinate")
-        self.progress.grid(row=8, column=0, columnspan=3, sticky="ew", pady=6)
+        self.progress.grid(row=12, column=0, columnspan=3, sticky="ew", pady=6)
         self.progress_label = ttk.Label(main, text="Progreso: 0%")
-        self.progress_label.grid(row=9, column=0, columnspan=3, sticky="w")
+        self.progress_label.grid(row=13, column=0, columnspan=3, sticky="w")
 
     # -------------------------
     # Ventana de configuracion (menu)
@@ -217,6 +316,77 @@ class App:
         ttk.Button(btn_frame, text="Restablecer a carpeta por defecto", command=reset_default).grid(row=0, column=1, padx=6)
         ttk.Button(win, text="Cerrar", command=win.destroy).pack(pady=(6,10))
 
+    # -------------------------
+    # Ventana de hilos de copia (menu)
+    # -------------------------
+    def open_workers_window(self):
+        win = tk.Toplevel(self.root)
+        win.title("Hilos de copia")
+        win.geometry("360x150")
+        win.transient(self.root)
+        win.grab_set()
+
+        ttk.Label(win, text="Hilos de copia por disco (0 = automático):").pack(pady=(10, 4))
+        ttk.Spinbox(win, from_=0, to=MAX_WORKERS, textvariable=self.workers, width=6).pack()
+
+        def close():
+            try:
+                self.workers.set(max(0, min(MAX_WORKERS, int(self.workers.get()))))
+            except (tk.TclError, ValueError):
+                self.workers.set(DEFAULT_WORKERS)
+            self.save_config()
+            win.destroy()
+
+        ttk.Button(win, text="Guardar", command=close).pack(pady=10)
+
+    # -------------------------
+    # Ventana de instantáneas (menu)
+    # -------------------------
+    def open_snapshots_window(self):
+        win = tk.Toplevel(self.root)
+        win.title("Instantáneas")
+        win.geometry("560x380")
+        win.transient(self.root)
+        win.grab_set()
+
+        dests = self.get_dests()
+        ttk.Label(win, text="Instantáneas en: " + ("; ".join(dests) or "(sin destino)")).pack(pady=(10, 4))
+        listbox = tk.Listbox(win, height=10)
+        listbox.pack(fill="both", expand=True, padx=10)
+        for dest in dests:
+            if len(dests) > 1:
+                listbox.insert(tk.END, f"📁 {dest}")
+            snapshots = snapshot.load_catalog(dest)
+            for s in reversed(snapshots):
+                if s["complete"]:
+                    detail = (f"{s.get('files', 0)} archivos · {s.get('linked', 0)} enlazados · "
+                              f"{s.get('bytes_written', 0) / 2**20:.1f} MB escritos")
+                else:
+                    detail = "incompleta"
+                listbox.insert(tk.END, f"{s['name']} — {detail}")
+            if not snapshots:
+                listbox.insert(tk.END, "No hay instantáneas.")
+
+        ttk.Label(win, text="Conservar:").pack(pady=(8, 2))
+        frame = ttk.Frame(win)
+        frame.pack()
+        variables = {}
+        for col, (key, label) in enumerate((("keep_last", "últimas"), ("keep_daily", "días"), ("keep_monthly", "meses"))):
+            variables[key] = tk.IntVar(value=self.snapshot_retention[key])
+            ttk.Spinbox(frame, from_=0, to=999, textvariable=variables[key], width=5).grid(row=0, column=2 * col, padx=(6, 2))
+            ttk.Label(frame, text=label).grid(row=0, column=2 * col + 1, padx=(0, 6))
+
+        def close():
+            for key, var in variables.items():
+                try:
+                    self.snapshot_retention[key] = max(0, int(var.get()))
+                except (tk.TclError, ValueError):
+                    pass
+            self.save_config()
+            win.destroy()
+
+        ttk.Button(win, text="Guardar", command=close).pack(pady=10)
+
     # -------------------------
     # Temas: claro / oscuro
     # -------------------------
@@ -264,9 +434,13 @@ class App:
         """Encolar mensaje para ser mostrado en el thread principal"""
         self.ui_queue.put(("log", msg))
 
-    def safe_progress(self, current, total):
-        """Encolar progreso (current, total)"""
-        self.ui_queue.put(("progress", (current, total)))
+    def safe_progress(self, files_done, bytes_done):
+        """Encolar progreso (archivos terminados, bytes copiados)"""
+        self.ui_queue.put(("progress", (files_done, bytes_done)))
+
+    def safe_file_progress(self, files_done, bytes_done, name, done, size):
+        """Encolar progreso dentro de un archivo grande (bytes copiados / tamaño)"""
+        self.ui_queue.put(("file_progress", (files_done, bytes_done, name, done, size)))
 
     def process_ui_queue(self):
         """Procesa la cola y actualiza UI (run en mainloop)"""
@@ -277,10 +451,12 @@ class App:
                     self.log.insert(tk.END, payload + "\n")
                     self.log.see(tk.END)
                 elif kind == "progress":
-                    current, total = payload
-                    pct = int((current / total) * 100) if total > 0 else 0
-                    self.progress["value"] = pct
-                    self.progress_label.config(text=f"Progreso: {pct}%")
+                    files_done, bytes_done = payload
+                    self._show_progress(files_done, bytes_done)
+                elif kind == "file_progress":
+                    files_done, bytes_done, name, done, size = payload
+                    self._show_progress(files_done, bytes_done,
+                                        f" — {name} ({done // 2**20}/{size // 2**20} MB)")
                 elif kind == "restore_ui":
                     # Reactivar widgets (habilitar)
                     self._set_ui_enabled(True)
@@ -293,6 +469,25 @@ class App:
             pass
         self.root.after(100, self.process_ui_queue)
 
+    def _show_progress(self, files_done, bytes_done, extra=""):
+        """Barra ponderada por bytes (un TIFF de 2 GB pesa más que un .txt) con ETA"""
+        total_files, total_bytes = self.run_totals
+        if total_bytes > 0:
+            fraction = bytes_done / total_bytes
+        else:
+            fraction = files_done / total_files if total_files > 0 else 0
+        pct = int(min(fraction, 1) * 100)
+        self.progress["value"] = pct
+
+        eta = ""
+        elapsed = time.monotonic() - self.run_started
+        if 0 < fraction < 1 and elapsed > 1:
+            remaining = int(elapsed * (1 - fraction) / fraction)
+            eta = f" · ETA {remaining // 3600:02d}:{remaining % 3600 // 60:02d}:{remaining % 60:02d}"
+        self.progress_label.config(
+            text=f"Progreso: {pct}% — {files_done}/{total_files} archivos · "
+                 f"{bytes_done / 2**30:.2f}/{total_bytes / 2**30:.2f} GB{eta}{extra}")
+
     def _set_ui_enabled(self, enabled: bool):
         """Habilita o deshabilita widgets principales para evitar interacción mientras corre"""
         state = "normal" if enabled else "disabled"
@@ -307,50 +502,53 @@ class App:
         # No hacemos nada con el menu para evitar bloquear acceso a configuración.
 
     # -------------------------
-    # Conteo de archivos (para barra real)
+    # Plan de copia (un solo recorrido, para barra real)
     # -------------------------
-    def count_files(self, source_path: Path, mode: str) -> int:
+    def get_scan_plan(self, sources, mode: str) -> ScanPlan:
         """
-        Cuenta archivos que se van a copiar según el modo:
-        - 'respaldo': copia toda la estructura de cada monumento, omitiendo 'PROYECTO AGISOFT'
-        - 'informes': copia toda la estructura de cada monumento, omitiendo 'PRODUCTOS GENERADOS' y 'PROYECTO AGISOFT'
+        Plan de copia de `sources` en un solo recorrido (ver scan_plan.py),
+        según las reglas del modo. Si "Analizar" ya armó uno con los mismos
+        orígenes, modo y reglas, y ninguna carpeta cambió, se reutiliza.
         """
-        source = Path(source_path)
-        if not source.exists():
-            return 0
-
-        pattern = re.compile(r"^[T][1-7]_\d{5}", re.IGNORECASE)
-        exclude_folders = {"PROYECTO AGISOFT"} if mode == "respaldo" else {"PROYECTO AGISOFT", "PRODUCTOS GENERADOS"}
-
-        total = 0
-        monuments = [d for d in source.iterdir() if d.is_dir() and pattern.match(d.name)]
-        for monument in monuments:
-            for root, dirs, files in os.walk(monument):
-                current = Path(root)
-                if any(p.upper() in exclude_folders for p in current.parts):
-                    continue
-                total += len(files)
-        return total
+        rules_config = self.rules[mode]
+        plan = self.scan_plan
+        if plan is not None and plan.matches(sources, mode, rules_config) and plan.is_fresh():
+            self.safe_log("♻️ Sin cambios desde el último análisis: se reutiliza el recorrido.")
+            return plan
+        plan = ScanPlan.build(sources, mode, rules_config, index=self.index)
+        self.scan_plan = plan
+        return plan
 
     # -------------------------
     # Analizar carpeta (muestra en log)
     # -------------------------
     def analyze_folder(self):
         self.clear_log()
-        src = self.source_var.get()
-        if not src:
+        sources = self.get_sources()
+        if not sources:
             self.safe_log("⚠️ Selecciona una carpeta origen antes de analizar.")
             return
         try:
-            source = Path(src)
-            pattern = re.compile(r"^[T][1-7]_\d{5}", re.IGNORECASE)
-            monuments = [d.name for d in source.iterdir() if d.is_dir() and pattern.match(d.name)]
-            self.safe_log(f"📂 Monumentos detectados: {len(monuments)}")
-            for m in monuments:
-                self.safe_log(f" - {m}")
-            # además mostrar conteo estimado de archivos (según modo)
-            total_files = self.count_files(source, self.mode_var.get())
-            self.safe_log(f"📊 Archivos aproximados a copiar: {total_files}")
+            started = time.monotonic()
+            plan = self.get_scan_plan(sources, self.mode_var.get())
+            for source in plan.sources:
+                monuments = plan.monuments[source]
+                if len(sources) > 1:
+                    self.safe_log(f"📁 {source}")
+                self.safe_log(f"📂 Monumentos detectados: {len(monuments)}")
+                for m in monuments:
+                    self.safe_log(f" - {m}")
+            # además mostrar conteo de archivos y bytes (según modo)
+            self.safe_log(f"📊 Archivos a copiar: {plan.total_files} ({plan.total_bytes / 2**30:.2f} GB)"
+                          f" — {time.monotonic() - started:.2f} s")
+            for error in plan.scan_errors:
+                self.safe_log(f"⚠️ No se pudo leer {error}")
+            for dst in self.get_dests():
+                if not Path(dst).exists():
+                    continue
+                ok, needed, free = plan.check_free_space(dst)
+                self.safe_log(f"💾 Espacio libre en {dst}: {free / 2**30:.2f} GB"
+                              + ("" if ok else f" — ⚠️ insuficiente, se necesitan {needed / 2**30:.2f} GB"))
         except Exception as e:
             self.safe_log(f"❌ Error analizando carpeta: {e}")
 
@@ -370,80 +568,145 @@ class App:
     def _run_thread(self):
         try:
             self.not_copied = []
-            src = self.source_var.get()
-            dst = self.dest_var.get()
+            sources = self.get_sources()
+            dests = self.get_dests()
             mode = self.mode_var.get()
 
-            if not src or not dst:
+            if not sources or not dests:
                 self.safe_log("⚠️ Selecciona carpeta origen y destino.")
                 return
 
-            src_path = Path(src)
-            dst_path = Path(dst)
-            if not src_path.exists() or not dst_path.exists():
+            src_paths = [Path(src) for src in sources]
+            dst_paths = [Path(dst) for dst in dests]
+            if not all(p.exists() for p in src_paths + dst_paths):
                 self.safe_log("⚠️ Las rutas seleccionadas no existen.")
                 return
 
-            # 1) Contar archivos totales para barra real
-            total_files = self.count_files(src_path, mode)
+            # 1) Un solo recorrido: archivos, tamaños y carpetas a recrear
+            plan = self.get_scan_plan(sources, mode)
+            for error in plan.scan_errors:
+                self.safe_log(f"⚠️ No se pudo leer {error}")
+            total_files = plan.total_files
             if total_files == 0:
                 self.safe_log("⚠️ No se encontraron archivos para copiar.")
                 return
 
-            # 2) Ejecutar proceso según modo, actualizando progreso por cada archivo copiado
-            files_processed = 0
-
-            if mode == "respaldo":
-                # recorrer monumentos y copiar
-                pattern = re.compile(r"^[T][1-7]_\d{5}", re.IGNORECASE)
-                exclude = {"PROYECTO AGISOFT","FOTOS DE PROCESAMIENTO","FOTOS DE REGISTRO","FOTOS PROCESAMIENTO", "FOTOS REGISTRO", "PUNTOS DE CONTROL"}
-                monuments = [d for d in src_path.iterdir() if d.is_dir() and pattern.match(d.name)]
-                for monument in monuments:
-                    self.safe_log(f"📦 Respaldando: {monument.name}")
-                    for root, dirs, files in os.walk(monument):
-                        current = Path(root)
-                        if any(p.upper() in exclude for p in current.parts):
-                            continue
-                        rel = current.relative_to(monument)
-                        target_dir = dst_path / monument.name / rel
-                        target_dir.mkdir(parents=True, exist_ok=True)
-                        for f in files:
-                            src_file = current / f
-                            dst_file = target_dir / f
-                            try:
-                                # Modo A: sobrescribir automáticamente
-                                shutil.copy2(src_file, dst_file)
-                            except Exception as e:
-                                self.not_copied.append((str(src_file), str(dst_file), str(e), datetime.now()))
-                                self.safe_log(f"❌ Error copiando {src_file}: {e}")
-                            files_processed += 1
-                            self.safe_progress(files_processed, total_files)
-
-            else:  # informes
-                pattern = re.compile(r"^[T][1-7]_\d{5}", re.IGNORECASE)
-                exclude = {"PRODUCTOS GENERADOS", "PROYECTO AGISOFT"}
-                monuments = [d for d in src_path.iterdir() if d.is_dir() and pattern.match(d.name)]
-                for monument in monuments:
-                    self.safe_log(f"📄 Copiando estructura: {monument.name}")
-                    for root, dirs, files in os.walk(monument):
-                        current = Path(root)
-                        if any(p.upper() in exclude for p in current.parts):
-                            continue
-                        rel = current.relative_to(monument)
-                        target_dir = dst_path / monument.name / rel
-                        target_dir.mkdir(parents=True, exist_ok=True)
-                        for f in files:
-                            src_file = current / f
-                            dst_file = target_dir / f
-                            try:
-                                shutil.copy2(src_file, dst_file)
-                            except Exception as e:
-                                self.not_copied.append((str(src_file), str(dst_file), str(e), datetime.now()))
-                                self.safe_log(f"❌ Error copiando {src_file}: {e}")
-                            files_processed += 1
-                            self.safe_progress(files_processed, total_files)
-
-            # 3) Generar reporte si aplica
+            # Empaquetado: un archivo por monumento en cada destino, escrito
+            # de corrido; no aplica espejo, instantáneas ni verificación
+            pack = self.pack_monuments.get()
+            pack_format = self.pack_format.get()
+            if pack and pack_format not in formatos_disponibles():
+                self.safe_log(f"⚠️ Formato de paquete no disponible: {pack_format} "
+                              f"(tar.zst requiere pip install zstandard).")
+                return
+
+            # Instantánea (sólo respaldos): se copia en dest/<fecha_hora>/ y
+            # lo que no cambió se enlaza desde la última instantánea completa
+            snaps = None
+            if mode == "respaldo" and self.snapshot_mode.get() and not pack:
+                snaps = [snapshot.Snapshot(p, sources, mode) for p in dst_paths]
+
+            # 2) Verificar espacio libre en cada destino antes de escribir el
+            #    primer byte (con instantáneas, sólo cuenta lo que cambió desde la base)
+            for i, dst_path in enumerate(dst_paths):
+                base = snaps[i].base_path if snaps else None
+                ok, needed, free = plan.check_free_space(base or dst_path)
+                if not ok:
+                    self.safe_log(f"❌ Espacio insuficiente en {dst_path}: se necesitan {needed / 2**30:.2f} GB "
+                                  f"y hay {free / 2**30:.2f} GB libres.")
+                    return
+
+            # 3) Copiar según el plan, con progreso ponderado por bytes.
+            #    Cada origen se alimenta desde su propio hilo y cada disco
+            #    físico copia con sus propios hilos (ver planificador.py):
+            #    tantos como diga "Hilos de copia…", o según el disco si es 0.
+            #    Con varios destinos cada archivo se lee una sola vez.
+            self.files_processed = 0
+            self.bytes_done = 0
+            self.run_totals = (total_files, plan.total_bytes)
+            self.run_started = time.monotonic()
+
+            if snaps:
+                for snap in snaps:
+                    snap.start()
+                    self.safe_log(f"🗂️ Instantánea: {snap.path}"
+                                  + (f" (enlazando desde {snap.base['name']})" if snap.base else " (primera, copia completa)"))
+                dst_paths = [Path(snap.path) for snap in snaps]
+
+            # Modo espejo (sólo respaldos): se salta lo que no cambió y los
+            # archivos grandes modificados se actualizan por bloques.
+            # No aplica a instantáneas, que siempre escriben en carpeta nueva.
+            mirror = mode == "respaldo" and self.mirror_sync.get() and not snaps and not pack
+            if mirror:
+                self.safe_log("🔁 Respaldo espejo: sólo se copia lo que cambió.")
+            if pack:
+                self.safe_log(f"📦 Empaquetado por monumento ({pack_format}): espejo, instantáneas "
+                              f"y verificación no se aplican.")
+            # Copia verificada: un manifiesto de sumas por destino
+            sums = [ManifiestoSumas(p) for p in dst_paths] if self.verify_copies.get() and not pack else None
+            actions = [{"unchanged": 0, "delta": 0, "linked": 0, "copied": 0, "packed": 0} for _ in dst_paths]
+            written = [0] * len(dst_paths)
+            errors = [0] * len(dst_paths)
+
+            def copy_task(task):
+                src_file, rel, size, _ = task
+                targets = [(p / rel, snaps[i].previous(rel) if snaps else None) for i, p in enumerate(dst_paths)]
+                try:
+                    results = self._copy_file(Path(src_file), targets, size, mirror, sums)
+                except Exception as e:
+                    results = [(None, 0, e)] * len(targets)
+                return src_file, [t[0] for t in targets], results
+
+            workers = self.workers.get() or None
+            if pack:
+                # Un monumento por tarea: lo escribe entero un solo hilo, y
+                # los hilos son los del disco del (primer) destino
+                def pack_task(item):
+                    return self._pack_monument(*item, dst_paths, pack_format)
+
+                batches = ejecutar_por_dispositivo([(str(dst_paths[0]), self._pack_tasks(plan))],
+                                                   pack_task, hilos=workers)
+                outcomes = (outcome for batch in batches for outcome in batch)
+            else:
+                fuentes = [(source, self._copy_tasks(plan, source, dst_paths, mode)) for source in plan.sources]
+                outcomes = ejecutar_por_dispositivo(fuentes, copy_task, hilos=workers)
+            for src_file, dst_files, results in outcomes:
+                for i, (dst_file, (action, n, error)) in enumerate(zip(dst_files, results)):
+                    if error is not None:
+                        errors[i] += 1
+                        self.not_copied.append((str(src_file), str(dst_file), str(error), datetime.now()))
+                        self.safe_log(f"❌ Error copiando {src_file} → {dst_file}: {error}")
+                    else:
+                        actions[i][action] += 1
+                        written[i] += n
+                self.files_processed += 1
+                self.safe_progress(self.files_processed, self.bytes_done)
+
+            for i, dst_path in enumerate(dst_paths):
+                prefix = f"[{dst_path}] " if len(dst_paths) > 1 else ""
+                if errors[i] and len(dst_paths) > 1:
+                    self.safe_log(f"❌ {prefix}{errors[i]} archivos no copiados")
+                if sums:
+                    sums[i].cerrar()
+                    self.safe_log(f"🔒 {prefix}{sums[i].total} copias verificadas; sumas en {sums[i].ruta}")
+                if pack:
+                    self.safe_log(f"📦 {prefix}Empaquetados: {actions[i]['packed']} archivos "
+                                  f"· {written[i] / 2**20:.1f} MB escritos")
+                if mirror:
+                    self.safe_log(f"🔁 {prefix}Sin cambios: {actions[i]['unchanged']} · actualizados por bloques: "
+                                  f"{actions[i]['delta']} · copiados: {actions[i]['copied']} · {written[i] / 2**20:.1f} MB escritos")
+                    if self.mirror_delete.get():
+                        self._delete_extraneous(plan, dst_path, mode, errors[i])
+                if snaps:
+                    snap = snaps[i]
+                    snap.finish(files=self.files_processed, linked=actions[i]["linked"], copied=actions[i]["copied"],
+                                bytes_written=written[i], errors=errors[i])
+                    self.safe_log(f"🗂️ {prefix}Enlazados: {actions[i]['linked']} · copiados: {actions[i]['copied']} "
+                                  f"· {written[i] / 2**20:.1f} MB escritos")
+                    for name in snapshot.prune(snap.dest, self.snapshot_retention):
+                        self.safe_log(f"🗑️ Instantánea vencida eliminada: {name}")
+
+            # 4) Generar reporte si aplica
             if self.generate_report.get() and self.not_copied:
                 self.generate_excel_report()
 
@@ -457,6 +720,242 @@ class App:
             # restaurar UI (en cola para que corra en main thread)
             self.ui_queue.put(("restore_ui", None))
 
+    # -------------------------
+    # Tareas de copia de un origen
+    # -------------------------
+    def _copy_tasks(self, plan: ScanPlan, source: str, dst_paths, mode: str):
+        """
+        Genera las tareas del plan para `source`, repartidas entre los hilos
+        de copia del disco (ver planificador.py).
+
+        Los monumentos salen del más pesado al más liviano, para que uno
+        enorme no quede solo al final mientras los demás hilos esperan; como
+        sus archivos van a una cola común, todos los hilos trabajan en él a
+        la vez. Dentro de cada monumento primero van los archivos grandes y
+        luego el resto en el orden del recorrido (por carpeta e inodo).
+
+        Al entrar en cada monumento se crea toda su estructura de carpetas
+        en cada destino (también las vacías). Modo A: sobrescribir automáticamente.
+        """
+        dirs_by_monument = {}
+        for rel_dir in plan.dirs[source]:
+            dirs_by_monument.setdefault(Path(rel_dir).parts[0], []).append(rel_dir)
+
+        tasks_by_monument = {}
+        bytes_by_monument = {}
+        for task in plan.files[source]:
+            monument = Path(task[1]).parts[0]
+            tasks_by_monument.setdefault(monument, []).append(task)
+            bytes_by_monument[monument] = bytes_by_monument.get(monument, 0) + task[2]
+
+        for monument in sorted(tasks_by_monument, key=bytes_by_monument.get, reverse=True):
+            self._start_monument(monument, dirs_by_monument.pop(monument, []), dst_paths, mode)
+            tasks = tasks_by_monument.pop(monument)
+            yield from (t for t in tasks if t[2] >= LARGE_FILE_BYTES)
+            yield from (t for t in tasks if t[2] < LARGE_FILE_BYTES)
+
+        # Monumentos sin ningún archivo: sólo su estructura
+        for monument, rel_dirs in dirs_by_monument.items():
+            self._start_monument(monument, rel_dirs, dst_paths, mode)
+
+    def _pack_tasks(self, plan: ScanPlan):
+        """
+        Una tarea por monumento para el empaquetado: (monumento, carpetas,
+        archivos), juntando lo que el monumento tenga en cada origen (si
+        una ruta se repite, queda la del último origen, como al copiar).
+        Salen del monumento más pesado al más liviano.
+        """
+        dirs_by_monument = {}
+        files_by_monument = {}
+        for source in plan.sources:
+            for rel_dir in plan.dirs[source]:
+                dirs_by_monument.setdefault(Path(rel_dir).parts[0], set()).add(rel_dir)
+            for task in plan.files[source]:
+                files_by_monument.setdefault(Path(task[1]).parts[0], {})[task[1]] = task
+
+        monuments = sorted(set(dirs_by_monument) | set(files_by_monument),
+                           key=lambda m: sum(t[2] for t in files_by_monument.get(m, {}).values()),
+                           reverse=True)
+        for monument in monuments:
+            yield (monument, sorted(dirs_by_monument.get(monument, ())),
+                   list(files_by_monument.get(monument, {}).values()))
+
+    def _pack_monument(self, monument, rel_dirs, tasks, dst_paths, fmt: str):
+        """
+        Escribe el paquete `<destino>/<monumento>.zip` (o .tar / .tar.zst)
+        con la estructura completa del monumento, en todos los destinos a
+        la vez: cada archivo del origen se lee una sola vez y va directo al
+        paquete (ver empaquetado.py).
+
+        Devuelve, por archivo, (origen, destinos, [(acción, bytes, error)]
+        por destino), como `copy_task`. Si el paquete no se pudo terminar,
+        todos sus archivos quedan como error.
+        """
+        archives = [p / (monument + FORMATOS[fmt]) for p in dst_paths]
+        self.safe_log(f"📦 Empaquetando: {monument} → {archives[0].name}")
+        outcomes = []
+        try:
+            package = Paquete(archives[0], fmt, copias=archives[1:])
+        except Exception as e:
+            return [(src_file, [a / rel for a in archives], [(None, 0, e)] * len(archives))
+                    for src_file, rel, _, _ in tasks]
+
+        try:
+            for rel_dir in rel_dirs:
+                package.agregar_carpeta(rel_dir)
+        except Exception:
+            pass  # el paquete quedó inutilizable: cerrar() lo descarta
+
+        for src_file, rel, size, _ in tasks:
+            done = 0
+
+            def on_chunk(n):
+                nonlocal done
+                done += n
+                with self.progress_lock:
+                    self.bytes_done += n
+                    bytes_done = self.bytes_done
+                if size >= LARGE_FILE_BYTES:
+                    self.safe_file_progress(self.files_processed, bytes_done, Path(src_file).name, done, size)
+
+            try:
+                n = package.agregar(src_file, rel, progreso=on_chunk)
+                result = ("packed", n, None)
+            except Exception as e:
+                result = (None, 0, e)
+            outcomes.append((src_file, [a / rel for a in archives], [result] * len(archives)))
+
+        if not package.cerrar():
+            error = OSError(f"paquete {archives[0]} descartado por un error de escritura")
+            outcomes = [(src_file, dst_files, [(None, 0, error) if r[2] is None else r for r in results])
+                        for src_file, dst_files, results in outcomes]
+        return outcomes
+
+    def _start_monument(self, monument, rel_dirs, dst_paths, mode: str):
+        if mode == "respaldo":
+            self.safe_log(f"📦 Respaldando: {monument}")
+        else:
+            self.safe_log(f"📄 Copiando estructura: {monument}")
+        for dst_path in dst_paths:
+            for rel_dir in rel_dirs:
+                (dst_path / rel_dir).mkdir(parents=True, exist_ok=True)
+
+    # -------------------------
+    # Copia de un archivo con progreso en bytes
+    # -------------------------
+    def _copy_file(self, src_file: Path, targets, size: int, mirror=False, sums=None):
+        """
+        Copia con el motor de `copiador` (copia en kernel cuando se puede).
+        Suma los bytes copiados al progreso global; en archivos grandes
+        (TIFF, exportaciones de Agisoft) además informa el avance dentro del
+        archivo para que la barra no se quede congelada.
+
+        `targets` es una lista de (destino, previo), uno por carpeta destino.
+        En modo espejo (`mirror`) se sincroniza con `sync.sync_file`; en
+        una instantánea, `previo` es el mismo archivo en la instantánea
+        anterior y se enlaza si no cambió (`snapshot.link_or_copy`).
+
+        Con varios destinos, lo que hay que escribir se copia leyendo el
+        origen una sola vez (`copiador.copiar_a_varios`); el progreso cuenta
+        los bytes del origen, no los de cada destino.
+
+        Con `sums` (un `ManifiestoSumas` por destino) la suma del origen se
+        calcula en la misma lectura de la copia; cada destino escrito se
+        relee y compara, y su suma se anota en el manifiesto. Una copia que
+        no coincide se informa como error de ese destino.
+
+        Devuelve una lista de (acción, bytes escritos, error) por destino.
+        """
+        large = size >= LARGE_FILE_BYTES
+        done = 0
+
+        def on_chunk(n):
+            nonlocal done
+            done += n
+            with self.progress_lock:
+                self.bytes_done += n
+                bytes_done = self.bytes_done
+            if large:
+                self.safe_file_progress(self.files_processed, bytes_done, src_file.name, done, size)
+
+        if len(targets) == 1:
+            dst_file, previous = targets[0]
+            digest = nuevo_hash(sums[0].algoritmo) if sums else None
+            try:
+                if mirror:
+                    action, n = sync_file(src_file, dst_file, progreso=on_chunk, suma=digest)
+                elif previous is not None:
+                    action, n = snapshot.link_or_copy(src_file, dst_file, previous, progreso=on_chunk, suma=digest)
+                else:
+                    action, n = "copied", copiar_archivo(src_file, dst_file, progreso=on_chunk, suma=digest)
+                if digest is not None and action in ("copied", "delta"):
+                    self._verify(sums[0], dst_file, digest.hexdigest())
+                return [(action, n, None)]
+            except Exception as e:
+                return [(None, 0, e)]
+
+        # Varios destinos: primero lo que se resuelve sin leer el origen
+        # (sin cambios o enlazado) y el resto en una sola pasada
+        st = os.stat(src_file)
+        results = [None] * len(targets)
+        pending = []
+        for i, (dst_file, previous) in enumerate(targets):
+            try:
+                if mirror and is_unchanged(st.st_size, st.st_mtime, dst_file):
+                    results[i] = ("unchanged", 0, None)
+                elif previous is not None and snapshot.try_link(st, dst_file, previous):
+                    results[i] = ("linked", 0, None)
+                else:
+                    if mirror:
+                        unshare(dst_file)
+                    pending.append(i)
+            except Exception as e:
+                results[i] = (None, 0, e)
+
+        if not pending:
+            on_chunk(st.st_size)
+            return results
+        digest = nuevo_hash(sums[0].algoritmo) if sums else None
+        try:
+            copy_errors = copiar_a_varios(src_file, [targets[i][0] for i in pending], progreso=on_chunk, suma=digest)
+        except Exception as e:
+            copy_errors = [e] * len(pending)
+        for i, error in zip(pending, copy_errors):
+            if error is None and digest is not None:
+                try:
+                    self._verify(sums[i], targets[i][0], digest.hexdigest())
+                except OSError as e:
+                    error = e
+            results[i] = ("copied", st.st_size, None) if error is None else (None, 0, error)
+        return results
+
+    def _verify(self, sums: ManifiestoSumas, dst_file: Path, expected: str):
+        """Relee `dst_file` sin caché, compara con la suma del origen y la anota."""
+        verificar_copia(dst_file, expected, sums.algoritmo, sums.sin_cache)
+        sums.agregar(dst_file, expected)
+
+    def _delete_extraneous(self, plan: ScanPlan, dst_path: Path, mode: str, errors: int):
+        """
+        Modo espejo: borra de los monumentos del destino lo que ya no está
+        en el origen. Como rsync, si hubo errores de copia o algo del origen
+        no se pudo leer (y por eso falta en el plan) no se borra nada.
+        """
+        if errors:
+            self.safe_log(f"⚠️ Hubo errores de copia: no se borra nada de {dst_path}.")
+            return
+        if plan.scan_errors:
+            self.safe_log(f"⚠️ No se pudieron leer {len(plan.scan_errors)} rutas del origen: "
+                          f"no se borra nada de {dst_path}.")
+            return
+        expected_files = {rel for entries in plan.files.values() for _, rel, _, _ in entries}
+        expected_dirs = {rel for dirs in plan.dirs.values() for rel in dirs}
+        monuments = sorted({m for names in plan.monuments.values() for m in names})
+        deleted = delete_extraneous(str(dst_path), monuments, expected_files, expected_dirs,
+                                    RuleSet.from_config(self.rules[mode]))
+        for path in deleted:
+            self.safe_log(f"🗑️ Eliminado del destino: {path}")
+        self.safe_log(f"🗑️ Eliminados del destino: {len(deleted)}")
+
 # main.py  - Parte 3/3
 # Reporte Excel, abrir carpeta y launch
 
@@ -524,11 +1023,31 @@ class App:
         if p:
             self.source_var.set(p)
 
+    def add_source(self):
+        """Agrega otra carpeta origen (por ejemplo, en otro disco)."""
+        p = filedialog.askdirectory()
+        if p and p not in self.get_sources():
+            self.source_var.set(SOURCE_SEPARATOR.join(self.get_sources() + [p]))
+
+    def get_sources(self):
+        """Carpetas origen escritas en el campo, separadas por ';'."""
+        return [s.strip() for s in self.source_var.get().split(SOURCE_SEPARATOR) if s.strip()]
+
     def choose_dest(self):
         p = filedialog.askdirectory()
         if p:
             self.dest_var.set(p)
 
+    def add_dest(self):
+        """Agrega otra carpeta destino (por ejemplo, un segundo disco de respaldo)."""
+        p = filedialog.askdirectory()
+        if p and p not in self.get_dests():
+            self.dest_var.set(SOURCE_SEPARATOR.join(self.get_dests() + [p]))
+
+    def get_dests(self):
+        """Carpetas destino escritas en el campo, separadas por ';'."""
+        return [d.strip() for d in self.dest_var.get().split(SOURCE_SEPARATOR) if d.strip()]
+
 # -------------------------
 # MAIN
 # -------------------------
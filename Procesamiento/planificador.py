@@ -0,0 +1,192 @@
+import os
+import sys
+import queue
+import threading
+import collections
+
+
+# Tareas en espera por dispositivo (y resultados en espera en total)
+TAM_COLA = 256
+# Cada cuántas tareas encoladas se avisa ("encontradas", n)
+AVISO_ESCANEO = 256
+
+# Hilos por dispositivo según el tipo de disco (None = no se pudo saber)
+HILOS_POR_TIPO = {True: 2, False: 8, None: 4}
+
+_FIN = object()
+_local = threading.local()
+
+
+# =================================================
+# Dispositivos
+# =================================================
+def dispositivo_de(ruta):
+    """Identificador del disco físico (`st_dev`) donde vive `ruta`."""
+    try:
+        return os.stat(ruta).st_dev
+    except OSError:
+        return None
+
+
+def es_rotacional(dev):
+    """
+    True si `dev` es un disco de platos (HDD), False si es de estado
+    sólido y None si no se puede saber (sólo se consulta en Linux).
+    """
+    if dev is None or not sys.platform.startswith("linux"):
+        return None
+    base = os.path.realpath(f"/sys/dev/block/{os.major(dev)}:{os.minor(dev)}")
+    # Una partición no tiene `queue/`: está en el disco que la contiene
+    for carpeta in (base, os.path.dirname(base)):
+        try:
+            with open(os.path.join(carpeta, "queue", "rotational")) as f:
+                return f.read().strip() == "1"
+        except OSError:
+            continue
+    return None
+
+
+def hilos_sugeridos(dev):
+    """Pocos hilos en un HDD (cada salto del cabezal cuesta), más en SSD/NVMe."""
+    return HILOS_POR_TIPO[es_rotacional(dev)]
+
+
+def agrupar_por_dispositivo(raices):
+    """{dispositivo: [raíces en ese dispositivo]}, en el orden recibido."""
+    grupos = collections.OrderedDict()
+    for raiz in raices:
+        grupos.setdefault(dispositivo_de(raiz), []).append(raiz)
+    return grupos
+
+
+# =================================================
+# Planificador
+# =================================================
+class _Dispositivo:
+    __slots__ = ("dev", "cola", "hilos", "control", "fuentes")
+
+    def __init__(self, dev, cola, hilos, control):
+        self.dev = dev
+        self.cola = cola
+        self.hilos = hilos
+        self.control = control
+        self.fuentes = 0
+
+
+def registrar_bytes(n):
+    """
+    Suma `n` bytes al control de concurrencia del dispositivo del hilo
+    actual (si lo tiene). Pensado como `progreso` de la copia.
+    """
+    control = getattr(_local, "control", None)
+    if control is not None:
+        control.registrar(n_bytes=n)
+
+
+def ejecutar_por_dispositivo(fuentes, trabajar, hilos=None, tam_cola=TAM_COLA,
+                             crear_control=None, eventos=None):
+    """
+    Planificador de E/S por disco físico.
+
+    `fuentes` es una lista de (raíz, iterable de tareas). Las raíces se
+    agrupan por dispositivo (`st_dev`); cada dispositivo tiene su propia
+    cola y sus propios hilos, así un HDD USB lento no frena a un NVMe y
+    varias raíces en discos distintos se recorren y copian a la vez. Cada
+    fuente se recorre en su propio hilo y sus tareas se encolan en el
+    orden en que llegan (con `recorrido.recorrer`, carpeta por carpeta y
+    por inodo).
+
+    `trabajar(tarea)` corre en los hilos del dispositivo y su valor se
+    entrega conforme termina; no debe lanzar excepciones.
+    `hilos`: hilos por dispositivo; None = `hilos_sugeridos` según el disco.
+    `crear_control(dev, hilos)` puede devolver un `ControlConcurrencia`
+    para ese dispositivo: se arrancan `control.maximo` hilos y el control
+    decide cuántos trabajan a la vez.
+    `eventos(evento)` recibe ("encontradas", n) mientras se recorre y
+    ("escaneo_fin", n) cuando terminaron todas las fuentes.
+    """
+    detener = threading.Event()
+    cola_resultados = queue.Queue(maxsize=tam_cola)
+    lock = threading.Lock()
+    estado = {"encontradas": 0, "fuentes": len(fuentes)}
+
+    dispositivos = {}
+    asignadas = []
+    for raiz, tareas in fuentes:
+        dev = dispositivo_de(raiz)
+        d = dispositivos.get(dev)
+        if d is None:
+            n = hilos or hilos_sugeridos(dev)
+            control = crear_control(dev, n) if crear_control else None
+            if control is not None:
+                n = control.maximo
+            d = dispositivos[dev] = _Dispositivo(dev, queue.Queue(maxsize=tam_cola), n, control)
+        d.fuentes += 1
+        asignadas.append((d, tareas))
+
+    def alimentar(d, tareas):
+        try:
+            for tarea in tareas:
+                if detener.is_set():
+                    break
+                d.cola.put(tarea)
+                if eventos:
+                    with lock:
+                        estado["encontradas"] += 1
+                        n = estado["encontradas"]
+                    if n % AVISO_ESCANEO == 0:
+                        eventos(("encontradas", n))
+        finally:
+            with lock:
+                d.fuentes -= 1
+                ultima_del_disco = d.fuentes == 0
+                estado["fuentes"] -= 1
+                ultima = estado["fuentes"] == 0
+                n = estado["encontradas"]
+            if ultima and eventos:
+                eventos(("escaneo_fin", n))
+            if ultima_del_disco:
+                for _ in range(d.hilos):
+                    d.cola.put(_FIN)
+
+    def consumir(d):
+        _local.control = d.control
+        try:
+            while True:
+                tarea = d.cola.get()
+                if tarea is _FIN:
+                    break
+                if detener.is_set():
+                    continue
+                if d.control is None:
+                    r = trabajar(tarea)
+                else:
+                    with d.control.turno():
+                        r = trabajar(tarea)
+                    d.control.registrar(archivos=1)
+                cola_resultados.put(r)
+        finally:
+            _local.control = None
+            cola_resultados.put(_FIN)
+
+    hilos_activos = [threading.Thread(target=alimentar, args=(d, t), daemon=True) for d, t in asignadas]
+    for d in dispositivos.values():
+        hilos_activos += [threading.Thread(target=consumir, args=(d,), daemon=True) for _ in range(d.hilos)]
+    for h in hilos_activos:
+        h.start()
+
+    activos = sum(d.hilos for d in dispositivos.values())
+    try:
+        while activos:
+            r = cola_resultados.get()
+            if r is _FIN:
+                activos -= 1
+                continue
+            yield r
+    finally:
+        # Si el consumidor corta antes de tiempo, vaciar las colas para
+        # que ningún hilo quede bloqueado en un put().
+        detener.set()
+        while activos:
+            if cola_resultados.get() is _FIN:
+                activos -= 1
@@ -0,0 +1,117 @@
+# rules.py
+# Reglas de inclusión/exclusión que se aplican DURANTE el recorrido:
+# las carpetas excluidas no se listan (se podan) y los archivos se
+# filtran con la información que ya trae cada os.DirEntry.
+import re
+import fnmatch
+
+# Reglas por defecto de cada modo (se guardan en config.json bajo "rules"
+# y desde ahí se pueden editar)
+DEFAULT_RULES = {
+    "respaldo": {
+        "exclude_dirs": [
+            "PROYECTO AGISOFT",
+            "FOTOS DE PROCESAMIENTO",
+            "FOTOS DE REGISTRO",
+            "FOTOS PROCESAMIENTO",
+            "FOTOS REGISTRO",
+            "PUNTOS DE CONTROL",
+        ],
+        "include_files": [],
+        "exclude_files": [],
+        "include_extensions": [],
+        "exclude_extensions": [],
+        "min_size": None,
+        "max_size": None,
+    },
+    "informes": {
+        "exclude_dirs": ["PRODUCTOS GENERADOS", "PROYECTO AGISOFT"],
+        "include_files": [],
+        "exclude_files": [],
+        "include_extensions": [],
+        "exclude_extensions": [],
+        "min_size": None,
+        "max_size": None,
+    },
+}
+
+
+def _compile_names(patterns):
+    """
+    Separa nombres exactos (se comparan en un set) de globs (`*`, `?`, `[]`),
+    que se unen en una sola expresión regular. Todo sin distinguir mayúsculas.
+    """
+    names, globs = set(), []
+    for p in patterns:
+        if any(c in p for c in "*?["):
+            globs.append(fnmatch.translate(p))
+        else:
+            names.add(p.upper())
+    regex = re.compile("|".join(globs), re.IGNORECASE) if globs else None
+    return names, regex
+
+
+def _matches(name, compiled):
+    names, regex = compiled
+    return name.upper() in names or (regex is not None and regex.match(name) is not None)
+
+
+def _normalize_ext(ext):
+    ext = ext.lower()
+    return ext if ext.startswith(".") else "." + ext
+
+
+class RuleSet:
+    """
+    Reglas compiladas de un modo.
+
+    - exclude_dirs: nombres o globs de carpetas que no se recorren.
+    - include_files / exclude_files: globs de nombres de archivo
+      (si include_files no está vacío, sólo pasan los que coinciden).
+    - include_extensions / exclude_extensions: ".tif", "jpg", ...
+    - min_size / max_size: en bytes (None = sin límite).
+
+    `prune(entry)` y `accept(entry)` se pasan como `podar` y `filtrar`
+    a `recorrido.recorrer_paralelo`.
+    """
+
+    def __init__(self, exclude_dirs=(), include_files=(), exclude_files=(),
+                 include_extensions=(), exclude_extensions=(), min_size=None, max_size=None):
+        self._exclude_dirs = _compile_names(exclude_dirs)
+        self._include_files = _compile_names(include_files) if include_files else None
+        self._exclude_files = _compile_names(exclude_files)
+        self._include_ext = tuple(_normalize_ext(e) for e in include_extensions)
+        self._exclude_ext = tuple(_normalize_ext(e) for e in exclude_extensions)
+        self.min_size = min_size
+        self.max_size = max_size
+
+    @classmethod
+    def from_config(cls, data):
+        """Crea las reglas desde el dict de un modo (claves como DEFAULT_RULES)."""
+        known = DEFAULT_RULES["respaldo"].keys()
+        return cls(**{k: v for k, v in data.items() if k in known and v is not None})
+
+    def prune(self, entry):
+        """True si no hay que entrar en la carpeta `entry`."""
+        return _matches(entry.name, self._exclude_dirs)
+
+    def accept(self, entry):
+        """True si el archivo `entry` se copia."""
+        name = entry.name
+        if self._include_files is not None and not _matches(name, self._include_files):
+            return False
+        if _matches(name, self._exclude_files):
+            return False
+        ext = name[name.rfind("."):].lower() if "." in name else ""
+        if self._include_ext and ext not in self._include_ext:
+            return False
+        if ext and ext in self._exclude_ext:
+            return False
+        if self.min_size is not None or self.max_size is not None:
+            # stat() queda guardado en la entrada (en Windows ya viene del listado)
+            size = entry.stat().st_size
+            if self.min_size is not None and size < self.min_size:
+                return False
+            if self.max_size is not None and size > self.max_size:
+                return False
+        return True
@@ -0,0 +1,157 @@
+# scan_plan.py
+# Plan de copia construido en un solo recorrido: lo usan "Analizar
+# Carpeta", la barra de progreso (por bytes) y el copiador.
+import os
+import re
+import json
+import shutil
+from pathlib import Path
+
+from recorrido import recorrer_paralelo
+from rules import RuleSet
+
+MONUMENT_PATTERN = re.compile(r"^[T][1-7]_\d{5}", re.IGNORECASE)
+# ID de monumento y, si viene a continuación, de excavación (como en Litica)
+IDS_PATTERN = re.compile(r"(T[1-7]_\d{5})(?:_(\d{3}_\d{7}))?", re.IGNORECASE)
+
+
+def parse_ids(name):
+    """(id_monumento, id_excavacion) de un nombre; "" si no aparecen."""
+    match = IDS_PATTERN.search(name)
+    if not match:
+        return "", ""
+    return match.group(1), match.group(2) or ""
+
+
+class ScanPlan:
+    """
+    Lista de archivos a copiar, con su tamaño y fecha, por carpeta origen.
+
+    - files[origen] = [(ruta origen, ruta destino relativa, tamaño, mtime)]
+      La ruta destino es relativa a la carpeta destino ("T1_00001/FOTOS/a.jpg"),
+      así el plan no depende del destino elegido.
+    - monuments[origen] = nombres de las carpetas de monumento encontradas.
+    - dirs[origen] = carpetas destino relativas, también las vacías, para
+      recrear la estructura completa.
+    - scan_errors = "ruta: error" de lo que no se pudo leer (carpetas sin
+      permiso, un recurso de red que falló, ...). Eso falta en el plan, así
+      que con errores el modo espejo no borra nada del destino.
+
+    Se reutiliza entre "Analizar" y "Ejecutar" mientras no cambien los
+    orígenes, el modo, las reglas ni el mtime de ninguna carpeta recorrida
+    (agregar, borrar o renombrar un archivo cambia el mtime de su carpeta).
+    Con un índice (ver indice.py) armar el plan tampoco recorre el disco:
+    sólo se vuelven a listar las carpetas que cambiaron.
+    """
+
+    def __init__(self, sources, mode, rules_config):
+        self.key = self.make_key(sources, mode, rules_config)
+        self.sources = [str(s) for s in sources]
+        self.mode = mode
+        self.files = {}
+        self.monuments = {}
+        self.dirs = {}
+        self.dir_mtimes = {}
+        self.scan_errors = []
+        self.total_files = 0
+        self.total_bytes = 0
+
+    @staticmethod
+    def make_key(sources, mode, rules_config):
+        return (tuple(str(s) for s in sources), mode, json.dumps(rules_config, sort_keys=True))
+
+    @classmethod
+    def build(cls, sources, mode, rules_config, index=None):
+        """
+        Recorre una sola vez cada origen aplicando las reglas del modo.
+        Con `index` (un `IndiceArbol`) lo pone al día y lee el árbol de ahí.
+        """
+        plan = cls(sources, mode, rules_config)
+        rules = RuleSet.from_config(rules_config)
+        for source in plan.sources:
+            plan._scan_source(source, rules, index)
+        return plan
+
+    def _scan_source(self, source, rules, index=None):
+        self.dir_mtimes[source] = os.stat(source).st_mtime_ns
+        monuments = [d for d in Path(source).iterdir() if d.is_dir() and MONUMENT_PATTERN.match(d.name)]
+        self.monuments[source] = [m.name for m in monuments]
+
+        entries = self.files[source] = []
+        planned_dirs = self.dirs[source] = []
+        for monument in monuments:
+            if index is not None:
+                index.actualizar(monument, al_error=self._scan_error)
+                # mtime 0 = carpeta recién modificada: el plan no se reutiliza
+                mtimes = index.carpetas(monument)
+                walk = index.recorrer(monument, podar=rules.prune, filtrar=rules.accept, entradas=True)
+            else:
+                mtimes = None
+                walk = recorrer_paralelo(str(monument), podar=rules.prune, filtrar=rules.accept, entradas=True,
+                                         al_error=self._scan_error)
+            for root, _, files in walk:
+                try:
+                    self.dir_mtimes[root] = mtimes[root] if mtimes is not None else os.stat(root).st_mtime_ns
+                except OSError as e:
+                    self._scan_error(e)
+                    continue
+                rel_dir = os.path.relpath(root, source)
+                planned_dirs.append(rel_dir)
+                for entry in files:
+                    try:
+                        st = entry.stat()
+                    except OSError as e:
+                        self._scan_error(e)
+                        continue
+                    entries.append((entry.path, os.path.join(rel_dir, entry.name), st.st_size, st.st_mtime))
+                    self.total_bytes += st.st_size
+        self.total_files += len(entries)
+
+    def _scan_error(self, error):
+        """Anota algo que no se pudo leer; lo que ya no existe no es un error (se borró)."""
+        if not isinstance(error, FileNotFoundError):
+            self.scan_errors.append(f"{error.filename}: {error.strerror or error}")
+
+    def matches(self, sources, mode, rules_config):
+        return self.key == self.make_key(sources, mode, rules_config)
+
+    def is_fresh(self):
+        """
+        True si ninguna carpeta recorrida cambió desde que se armó el plan.
+        Un plan con errores de lectura no se reutiliza: se vuelve a intentar.
+        """
+        if self.scan_errors:
+            return False
+        for path, mtime in self.dir_mtimes.items():
+            try:
+                if os.stat(path).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    def required_space(self, dst):
+        """
+        Bytes nuevos que ocupará la copia en `dst`: el tamaño de cada archivo
+        menos lo que ya ocupa el destino que se va a sobrescribir.
+        """
+        needed = 0
+        for entries in self.files.values():
+            for src, rel, size, mtime in entries:
+                try:
+                    existing = os.stat(os.path.join(dst, rel)).st_size
+                except OSError:
+                    existing = 0
+                needed += max(0, size - existing)
+        return needed
+
+    def check_free_space(self, dst):
+        """
+        Verificación previa de espacio libre. Devuelve (alcanza, necesario, libre).
+        Sólo revisa los destinos existentes si el total no cabe de entrada.
+        """
+        free = shutil.disk_usage(dst).free
+        if self.total_bytes <= free:
+            return True, self.total_bytes, free
+        needed = self.required_space(dst)
+        return needed <= free, needed, free
@@ -0,0 +1,184 @@
+# snapshot.py
+# Respaldos por instantáneas: cada ejecución crea dest/<fecha_hora>/ y los
+# archivos que no cambiaron desde la instantánea anterior se enlazan
+# (enlace duro) en vez de copiarse, como rsnapshot o Time Machine.
+import os
+import json
+import shutil
+from datetime import datetime
+
+from copiador import copiar_archivo
+from sync import is_unchanged
+
+# Catálogo de instantáneas, en la raíz del destino
+CATALOG_FILE = "snapshots.json"
+NAME_FORMAT = "%Y-%m-%d_%H%M%S"
+
+# Se conservan las últimas `keep_last`, la más nueva de cada uno de los
+# últimos `keep_daily` días y la más nueva de cada uno de los últimos
+# `keep_monthly` meses (config.json → "snapshot_retention")
+DEFAULT_RETENTION = {"keep_last": 7, "keep_daily": 14, "keep_monthly": 12}
+
+
+# =================================================
+# Catálogo
+# =================================================
+def load_catalog(dest):
+    """
+    Instantáneas registradas en `dest`, de la más vieja a la más nueva.
+    Las que ya no existen en disco (borradas a mano) se descartan.
+    """
+    try:
+        with open(os.path.join(dest, CATALOG_FILE), "r", encoding="utf-8") as f:
+            snapshots = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return [s for s in snapshots if os.path.isdir(os.path.join(dest, s["name"]))]
+
+
+def save_catalog(dest, snapshots):
+    """Escribe el catálogo de forma atómica (un corte no lo deja a medias)."""
+    path = os.path.join(dest, CATALOG_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(snapshots, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def latest_complete(snapshots):
+    for s in reversed(snapshots):
+        if s["complete"]:
+            return s
+    return None
+
+
+# =================================================
+# Retención
+# =================================================
+def expired(snapshots, retention):
+    """
+    Instantáneas que la política de retención ya no conserva. La última
+    completa se conserva siempre (es la base de la próxima); las
+    incompletas (ejecución cortada) se borran en cuanto hay una completa
+    más nueva.
+    """
+    retention = {**DEFAULT_RETENTION, **(retention or {})}
+    complete = [s for s in snapshots if s["complete"]]
+    if not complete:
+        return []
+
+    keep = {s["name"] for s in complete[-max(1, retention["keep_last"]):]}
+    for length, count in ((10, retention["keep_daily"]), (7, retention["keep_monthly"])):
+        # "started" es ISO: los primeros 10 caracteres son el día, 7 el mes
+        periods = set()
+        for s in reversed(complete):
+            period = s["started"][:length]
+            if period in periods:
+                continue
+            if len(periods) >= count:
+                break
+            periods.add(period)
+            keep.add(s["name"])
+
+    newest = complete[-1]["started"]
+    return [s for s in snapshots
+            if s["name"] not in keep and (s["complete"] or s["started"] < newest)]
+
+
+def prune(dest, retention):
+    """Borra las instantáneas vencidas y las quita del catálogo. Devuelve sus nombres."""
+    snapshots = load_catalog(dest)
+    removed = []
+    for s in expired(snapshots, retention):
+        shutil.rmtree(os.path.join(dest, s["name"]), ignore_errors=True)
+        removed.append(s["name"])
+    if removed:
+        save_catalog(dest, [s for s in snapshots if s["name"] not in removed])
+    return removed
+
+
+# =================================================
+# Una instantánea
+# =================================================
+class Snapshot:
+    """
+    Instantánea nueva en `dest`. `base` es la última instantánea completa
+    (None si es la primera): de ahí se enlazan los archivos sin cambios.
+
+    Se registra en el catálogo como incompleta al empezar y como completa
+    al terminar, así una ejecución cortada nunca se usa como base.
+    """
+
+    def __init__(self, dest, sources, mode):
+        self.dest = str(dest)
+        now = datetime.now()
+        name = now.strftime(NAME_FORMAT)
+        suffix = 2
+        while os.path.exists(os.path.join(self.dest, name)):
+            name = f"{now.strftime(NAME_FORMAT)}_{suffix}"
+            suffix += 1
+        self.name = name
+        self.path = os.path.join(self.dest, name)
+        self.base = latest_complete(load_catalog(self.dest))
+        self.base_path = os.path.join(self.dest, self.base["name"]) if self.base else None
+        self.entry = {
+            "name": name,
+            "started": now.isoformat(timespec="seconds"),
+            "finished": None,
+            "complete": False,
+            "base": self.base["name"] if self.base else None,
+            "mode": mode,
+            "sources": [str(s) for s in sources],
+        }
+
+    def start(self):
+        os.makedirs(self.path)
+        self._save()
+
+    def finish(self, **stats):
+        """Marca la instantánea como completa con sus totales (archivos, bytes, ...)."""
+        self.entry.update(stats)
+        self.entry["finished"] = datetime.now().isoformat(timespec="seconds")
+        self.entry["complete"] = True
+        self._save()
+
+    def _save(self):
+        snapshots = [s for s in load_catalog(self.dest) if s["name"] != self.name]
+        save_catalog(self.dest, snapshots + [self.entry])
+
+    def previous(self, rel):
+        """Ruta de `rel` en la instantánea base (None si no hay base)."""
+        return os.path.join(self.base_path, rel) if self.base_path else None
+
+
+def link_or_copy(src, dst, previous=None, progreso=None, suma=None):
+    """
+    Enlaza `dst` a `previous` si el origen no cambió (mismo tamaño y fecha);
+    si no, o si el sistema de archivos no admite enlaces duros, copia.
+    Devuelve (acción, bytes escritos), con acción "linked" o "copied".
+    `suma` se actualiza con el origen si se copia.
+    """
+    if previous is not None:
+        st = os.stat(src)
+        if try_link(st, dst, previous):
+            if progreso:
+                progreso(st.st_size)
+            return "linked", 0
+    return "copied", copiar_archivo(src, dst, progreso=progreso, suma=suma)
+
+
+def try_link(st, dst, previous):
+    """
+    Enlaza `dst` a `previous` si coincide con el origen (`st` es su
+    os.stat). Devuelve False si cambió o si no se pudo enlazar.
+    """
+    if not is_unchanged(st.st_size, st.st_mtime, previous):
+        return False
+    try:
+        os.link(previous, dst)
+        return True
+    except OSError:
+        # FAT/exFAT, límite de enlaces por inodo, ...: se copiará
+        return False
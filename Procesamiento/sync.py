@@ -0,0 +1,159 @@
+# sync.py
+# Respaldo en modo espejo: sólo se escribe lo que cambió.
+import os
+import shutil
+
+from copiador import copiar_archivo
+from recorrido import recorrer
+
+# Bloque de comparación del delta
+BLOCK_SIZE = 1024 * 1024
+# A partir de este tamaño un archivo cambiado se actualiza por bloques
+# en vez de copiarse entero
+DELTA_MIN_BYTES = 64 * 1024 * 1024
+# Si ya difiere dentro de este comienzo, el archivo se reescribió entero
+# (p. ej. se volvió a exportar) y el delta leería los dos para nada
+DELTA_PROBE_BYTES = 8 * BLOCK_SIZE
+# FAT/exFAT guardan la fecha con resolución de 2 segundos
+MTIME_TOLERANCE = 2.0
+
+
+def is_unchanged(size, mtime, dst):
+    """Verificación rápida (como rsync): mismo tamaño y misma fecha de modificación."""
+    try:
+        st = os.stat(dst)
+    except OSError:
+        return False
+    return st.st_size == size and abs(st.st_mtime - mtime) <= MTIME_TOLERANCE
+
+
+def delta_copy(src, dst, progreso=None, block_size=BLOCK_SIZE, suma=None):
+    """
+    Actualiza `dst` para que quede igual a `src` reescribiendo sólo los
+    bloques que difieren. Ambos archivos son locales, así que los bloques
+    se comparan directamente (sin firmas de por medio) en la misma
+    posición: sólo sirve para ediciones en su lugar, que no desplazan el
+    resto del archivo (ver `delta_worthwhile`). Si el tamaño cambió
+    igual se recorta o se extiende el final.
+    `suma` se actualiza con todo el origen. Devuelve los bytes escritos.
+    """
+    written = 0
+    buf_src = bytearray(block_size)
+    buf_dst = bytearray(block_size)
+    view_src = memoryview(buf_src)
+    view_dst = memoryview(buf_dst)
+
+    with open(src, "rb") as f_src, open(dst, "r+b") as f_dst:
+        offset = 0
+        while True:
+            n = f_src.readinto(buf_src)
+            if not n:
+                break
+            if suma is not None:
+                suma.update(view_src[:n])
+            m = f_dst.readinto(buf_dst)
+            if m != n or view_src[:n] != view_dst[:n]:
+                f_dst.seek(offset)
+                f_dst.write(view_src[:n])
+                written += n
+            offset += n
+            if progreso:
+                progreso(n)
+        f_dst.truncate(offset)
+
+    # La fecha se copia al final: si se corta a la mitad, la próxima
+    # verificación rápida no lo da por sincronizado
+    shutil.copystat(src, dst)
+    return written
+
+
+def sync_file(src, dst, progreso=None, suma=None):
+    """
+    Sincroniza un archivo. Devuelve (acción, bytes escritos), con acción
+    "unchanged", "delta" o "copied".
+
+    El tamaño y la fecha del origen se leen aquí y no del plan: un archivo
+    editado en su lugar no cambia el mtime de su carpeta, así que un plan
+    reutilizado podría traer datos viejos. `suma` se actualiza con el
+    origen si se escribe algo.
+    """
+    st = os.stat(src)
+    size = st.st_size
+    if is_unchanged(size, st.st_mtime, dst):
+        if progreso:
+            progreso(size)
+        return "unchanged", 0
+
+    if (os.path.exists(dst) and not unshare(dst) and size >= DELTA_MIN_BYTES
+            and delta_worthwhile(src, dst, size)):
+        return "delta", delta_copy(src, dst, progreso, suma=suma)
+
+    return "copied", copiar_archivo(src, dst, progreso=progreso, suma=suma)
+
+
+def delta_worthwhile(src, dst, size, probe=DELTA_PROBE_BYTES, block_size=BLOCK_SIZE):
+    """
+    Indica si conviene actualizar `dst` por bloques. Como los bloques se
+    comparan en la misma posición, un tamaño distinto (algo se insertó o
+    se quitó) desplaza todo lo que sigue y cada bloque saldría distinto;
+    lo mismo si ya difieren al comienzo. En esos casos una copia completa
+    escribe lo mismo leyendo la mitad.
+    """
+    if os.path.getsize(dst) != size:
+        return False
+    with open(src, "rb") as f_src, open(dst, "rb") as f_dst:
+        done = 0
+        while done < probe:
+            block = f_src.read(block_size)
+            if block != f_dst.read(block_size):
+                return False
+            if not block:
+                break
+            done += len(block)
+    return True
+
+
+def unshare(dst):
+    """
+    Si `dst` es un enlace duro (p. ej. de una instantánea) lo borra:
+    escribir encima modificaría también las otras copias. Devuelve True
+    si lo borró.
+    """
+    try:
+        if os.stat(dst).st_nlink > 1:
+            os.remove(dst)
+            return True
+    except FileNotFoundError:
+        pass
+    return False
+
+
+def delete_extraneous(dst_root, monuments, expected_files, expected_dirs, rules):
+    """
+    Borra de los monumentos `monuments` en `dst_root` lo que ya no está en
+    el origen. `expected_files`/`expected_dirs` son rutas relativas a
+    `dst_root`. Lo que las reglas excluyen no se toca (como rsync sin
+    --delete-excluded). Devuelve la lista de rutas borradas.
+    """
+    deleted = []
+    for monument in monuments:
+        root = os.path.join(dst_root, monument)
+        if not os.path.isdir(root):
+            continue
+        extra_dirs = []
+        for folder, dirs, files in recorrer(root, podar=rules.prune, filtrar=rules.accept):
+            rel_folder = os.path.relpath(folder, dst_root)
+            if rel_folder not in expected_dirs:
+                extra_dirs.append(folder)
+                continue
+            for name in files:
+                if os.path.join(rel_folder, name) not in expected_files:
+                    path = os.path.join(folder, name)
+                    os.remove(path)
+                    deleted.append(path)
+        # Carpetas sobrantes: de la más profunda a la menos
+        for folder in sorted(extra_dirs, key=len, reverse=True):
+            if os.path.exists(folder):
+                shutil.rmtree(folder)
+                deleted.append(folder)
+    return deleted
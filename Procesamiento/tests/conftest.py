@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Los módulos de Procesamiento se importan como scripts (`import sync`)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+import os
+
+import pytest
+
+from rules import DEFAULT_RULES, RuleSet
+
+
+class FakeEntry:
+    """Lo que las reglas usan de un os.DirEntry: el nombre y stat()."""
+
+    def __init__(self, name, size=0):
+        self.name = name
+        self.size = size
+        self.stats = 0
+
+    def stat(self):
+        self.stats += 1
+        return os.stat_result((0, 0, 0, 0, 0, 0, self.size, 0, 0, 0))
+
+
+def test_prune_exact_names_and_globs_ignore_case():
+    rules = RuleSet(exclude_dirs=["PROYECTO AGISOFT", "tmp_*"])
+
+    assert rules.prune(FakeEntry("Proyecto Agisoft"))
+    assert rules.prune(FakeEntry("TMP_2024"))
+    assert not rules.prune(FakeEntry("FOTOS"))
+    # Un nombre exacto no es un prefijo
+    assert not rules.prune(FakeEntry("PROYECTO AGISOFT 2"))
+
+
+def test_include_and_exclude_files():
+    rules = RuleSet(include_files=["*.jpg", "leeme.txt"], exclude_files=["*_prev.jpg"])
+
+    assert rules.accept(FakeEntry("a.JPG"))
+    assert rules.accept(FakeEntry("LEEME.TXT"))
+    assert not rules.accept(FakeEntry("otro.txt"))
+    assert not rules.accept(FakeEntry("a_prev.jpg"))
+
+
+def test_extensions_with_or_without_dot():
+    rules = RuleSet(include_extensions=["jpg", ".TIF"])
+    assert rules.accept(FakeEntry("a.jpg"))
+    assert rules.accept(FakeEntry("b.tif"))
+    assert not rules.accept(FakeEntry("c.png"))
+    assert not rules.accept(FakeEntry("sin_extension"))
+
+    rules = RuleSet(exclude_extensions=[".tmp"])
+    assert not rules.accept(FakeEntry("x.TMP"))
+    assert rules.accept(FakeEntry("sin_extension"))
+
+
+def test_sizes_only_stat_when_needed():
+    rules = RuleSet(min_size=10, max_size=100)
+    assert not rules.accept(FakeEntry("a.jpg", size=9))
+    assert rules.accept(FakeEntry("a.jpg", size=10))
+    assert rules.accept(FakeEntry("a.jpg", size=100))
+    assert not rules.accept(FakeEntry("a.jpg", size=101))
+
+    entry = FakeEntry("a.jpg", size=5)
+    assert RuleSet().accept(entry)
+    assert entry.stats == 0
+    # Un archivo ya descartado por nombre tampoco hace stat
+    entry = FakeEntry("a.tmp", size=50)
+    assert not RuleSet(exclude_extensions=["tmp"], min_size=10).accept(entry)
+    assert entry.stats == 0
+
+
+@pytest.mark.parametrize("mode", sorted(DEFAULT_RULES))
+def test_from_config_defaults(mode):
+    rules = RuleSet.from_config(DEFAULT_RULES[mode])
+
+    assert rules.prune(FakeEntry("PROYECTO AGISOFT"))
+    assert rules.accept(FakeEntry("a.jpg"))
+    assert rules.min_size is None and rules.max_size is None
+
+
+def test_from_config_ignores_unknown_keys_and_nulls():
+    rules = RuleSet.from_config({"exclude_files": ["*.tmp"], "max_size": None, "comentario": "x"})
+
+    assert not rules.accept(FakeEntry("a.tmp"))
+    assert rules.accept(FakeEntry("a.jpg", size=10 ** 12))
@@ -0,0 +1,114 @@
+import os
+
+import pytest
+
+from indice import IndiceArbol
+from scan_plan import ScanPlan
+
+RULES = {"exclude_dirs": ["PROYECTO AGISOFT"]}
+
+
+def _arbol(tmp_path):
+    origen = tmp_path / "origen"
+    for rel in ("T1_00001/a.jpg", "T1_00001/FOTOS/b.jpg", "T1_00001/PROYECTO AGISOFT/p.psx", "otra/c.jpg"):
+        ruta = origen / rel
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        ruta.write_bytes(b"x" * 10)
+    return origen
+
+
+@pytest.fixture
+def sin_permiso(monkeypatch):
+    """Las carpetas que se agreguen al set no se pueden listar (como sin permiso)."""
+    bloqueadas = set()
+    scandir = os.scandir
+
+    def scandir_con_bloqueo(ruta="."):
+        if os.fspath(ruta) in bloqueadas:
+            raise PermissionError(13, "Permission denied", os.fspath(ruta))
+        return scandir(ruta)
+
+    monkeypatch.setattr(os, "scandir", scandir_con_bloqueo)
+    return bloqueadas
+
+
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_plan_aplica_las_reglas(tmp_path, con_indice):
+    origen = _arbol(tmp_path)
+    index = IndiceArbol(str(tmp_path / "indice.sqlite")) if con_indice else None
+    plan = ScanPlan.build([origen], "respaldo", RULES, index=index)
+
+    rels = sorted(rel for _, rel, _, _ in plan.files[str(origen)])
+    assert rels == [os.path.join("T1_00001", "FOTOS", "b.jpg"), os.path.join("T1_00001", "a.jpg")]
+    assert plan.monuments[str(origen)] == ["T1_00001"]
+    assert plan.total_bytes == 20
+    assert not plan.scan_errors
+
+
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_carpeta_ilegible_queda_como_error(tmp_path, sin_permiso, con_indice):
+    # Lo que no se pudo listar falta en el plan: el espejo no debe borrar
+    # su respaldo, así que el plan lo anota
+    origen = _arbol(tmp_path)
+    fotos = str(origen / "T1_00001" / "FOTOS")
+    sin_permiso.add(fotos)
+    index = IndiceArbol(str(tmp_path / "indice.sqlite")) if con_indice else None
+
+    plan = ScanPlan.build([origen], "respaldo", RULES, index=index)
+
+    assert [rel for _, rel, _, _ in plan.files[str(origen)]] == [os.path.join("T1_00001", "a.jpg")]
+    assert len(plan.scan_errors) == 1 and plan.scan_errors[0].startswith(fotos)
+    # Un plan con errores no se reutiliza: se vuelve a recorrer
+    assert not plan.is_fresh()
+
+
+def _en_el_pasado(origen):
+    """Atrasa el mtime de las carpetas: el índice no confía en las recién modificadas."""
+    for carpeta, _, _ in os.walk(origen):
+        os.utime(carpeta, (1_000_000_000, 1_000_000_000))
+
+
+def test_plan_con_indice_no_confia_en_carpetas_recien_modificadas(tmp_path):
+    origen = _arbol(tmp_path)
+    plan = ScanPlan.build([origen], "respaldo", RULES, index=IndiceArbol(str(tmp_path / "indice.sqlite")))
+
+    assert not plan.is_fresh()
+
+
+@pytest.mark.parametrize("con_indice", [False, True])
+def test_plan_fresco_hasta_que_cambia_una_carpeta(tmp_path, con_indice):
+    origen = _arbol(tmp_path)
+    _en_el_pasado(origen)
+    index = IndiceArbol(str(tmp_path / "indice.sqlite")) if con_indice else None
+    plan = ScanPlan.build([origen], "respaldo", RULES, index=index)
+    assert plan.is_fresh()
+
+    # Lo que pasa en una carpeta podada no cuenta: no forma parte del plan
+    (origen / "T1_00001" / "PROYECTO AGISOFT" / "q.psx").write_bytes(b"x")
+    assert plan.is_fresh()
+
+    (origen / "T1_00001" / "FOTOS" / "nueva.jpg").write_bytes(b"x")
+    assert not plan.is_fresh()
+
+
+def test_plan_viejo_si_se_renombra_o_desaparece(tmp_path):
+    origen = _arbol(tmp_path)
+    plan = ScanPlan.build([origen], "respaldo", RULES)
+
+    os.rename(origen / "T1_00001" / "a.jpg", origen / "T1_00001" / "b.jpg")
+    assert not plan.is_fresh()
+
+    plan = ScanPlan.build([origen], "respaldo", RULES)
+    assert plan.is_fresh()
+    os.rename(origen / "T1_00001" / "FOTOS", tmp_path / "FOTOS")
+    assert not plan.is_fresh()
+
+
+def test_matches_compara_origenes_modo_y_reglas(tmp_path):
+    origen = _arbol(tmp_path)
+    plan = ScanPlan.build([origen], "respaldo", RULES)
+
+    assert plan.matches([str(origen)], "respaldo", {"exclude_dirs": ["PROYECTO AGISOFT"]})
+    assert not plan.matches([origen], "informes", RULES)
+    assert not plan.matches([origen], "respaldo", {"exclude_dirs": []})
+    assert not plan.matches([origen, tmp_path], "respaldo", RULES)
@@ -0,0 +1,164 @@
+import os
+
+import pytest
+
+from snapshot import (CATALOG_FILE, Snapshot, expired, latest_complete, link_or_copy,
+                      load_catalog, prune, save_catalog)
+
+SOLO_ULTIMAS = {"keep_last": 2, "keep_daily": 0, "keep_monthly": 0}
+
+
+def _snap(started, complete=True):
+    return {"name": started.replace(":", ""), "started": started, "complete": complete}
+
+
+def _nombres(snapshots):
+    return [s["name"] for s in snapshots]
+
+
+# =================================================
+# Retención
+# =================================================
+def test_keep_last():
+    snapshots = [_snap(f"2025-01-0{d}T10:00:00") for d in range(1, 6)]
+
+    assert _nombres(expired(snapshots, SOLO_ULTIMAS)) == _nombres(snapshots[:3])
+
+
+def test_keep_daily_keeps_the_newest_of_each_day():
+    snapshots = [_snap(f"2025-01-0{d}T{h}:00:00") for d in (1, 2, 3) for h in (10, 18)]
+
+    vencidas = expired(snapshots, {"keep_last": 1, "keep_daily": 2, "keep_monthly": 0})
+
+    # Quedan la última del día 3 y la última del día 2
+    assert _nombres(vencidas) == _nombres([snapshots[0], snapshots[1], snapshots[2], snapshots[4]])
+
+
+def test_keep_monthly_keeps_the_newest_of_each_month():
+    snapshots = [_snap(f"2025-0{m}-{d}T10:00:00") for m in (1, 2, 3) for d in (10, 20)]
+
+    vencidas = expired(snapshots, {"keep_last": 1, "keep_daily": 1, "keep_monthly": 2})
+
+    # Quedan la última de marzo y la última de febrero
+    assert _nombres(vencidas) == _nombres([snapshots[0], snapshots[1], snapshots[2], snapshots[4]])
+
+
+def test_default_retention_keeps_everything_recent():
+    snapshots = [_snap(f"2025-01-0{d}T10:00:00") for d in range(1, 6)]
+
+    assert expired(snapshots, None) == []
+
+
+def test_last_complete_is_always_kept():
+    snapshots = [_snap("2025-01-01T10:00:00"), _snap("2025-01-02T10:00:00")]
+
+    assert _nombres(expired(snapshots, {"keep_last": 0, "keep_daily": 0, "keep_monthly": 0})) == \
+        _nombres(snapshots[:1])
+
+
+def test_incomplete_expire_once_a_newer_complete_exists():
+    cortada = _snap("2025-01-01T10:00:00", complete=False)
+    completa = _snap("2025-01-02T10:00:00")
+    en_curso = _snap("2025-01-03T10:00:00", complete=False)
+
+    assert _nombres(expired([cortada, completa, en_curso], SOLO_ULTIMAS)) == _nombres([cortada])
+    # Sin ninguna completa no se borra nada
+    assert expired([cortada, en_curso], SOLO_ULTIMAS) == []
+
+
+def test_prune_removes_folders_and_catalog_entries(tmp_path):
+    snapshots = [_snap(f"2025-01-0{d}T10:00:00") for d in range(1, 5)]
+    for s in snapshots:
+        (tmp_path / s["name"]).mkdir()
+        (tmp_path / s["name"] / "a.jpg").write_bytes(b"x")
+    save_catalog(tmp_path, snapshots)
+
+    removed = prune(tmp_path, SOLO_ULTIMAS)
+
+    assert removed == _nombres(snapshots[:2])
+    assert sorted(p.name for p in tmp_path.iterdir()) == sorted(_nombres(snapshots[2:]) + [CATALOG_FILE])
+    assert _nombres(load_catalog(tmp_path)) == _nombres(snapshots[2:])
+
+
+# =================================================
+# Catálogo
+# =================================================
+def test_load_catalog_skips_missing_folders(tmp_path):
+    snapshots = [_snap("2025-01-01T10:00:00"), _snap("2025-01-02T10:00:00", complete=False)]
+    (tmp_path / snapshots[1]["name"]).mkdir()
+    save_catalog(tmp_path, snapshots)
+
+    assert _nombres(load_catalog(tmp_path)) == _nombres(snapshots[1:])
+    # Una incompleta no es base de nada
+    assert latest_complete(load_catalog(tmp_path)) is None
+
+
+def test_load_catalog_without_or_with_broken_file(tmp_path):
+    assert load_catalog(tmp_path) == []
+    (tmp_path / CATALOG_FILE).write_text("{roto")
+    assert load_catalog(tmp_path) == []
+
+
+def test_snapshot_uses_the_latest_complete_as_base(tmp_path):
+    primera = Snapshot(tmp_path, ["origen"], "respaldo")
+    primera.start()
+    assert primera.base is None
+    primera.finish(files=1)
+
+    cortada = Snapshot(tmp_path, ["origen"], "respaldo")
+    cortada.start()
+    assert cortada.name != primera.name
+
+    nueva = Snapshot(tmp_path, ["origen"], "respaldo")
+    assert nueva.base["name"] == primera.name
+    assert nueva.previous("a.jpg") == os.path.join(str(tmp_path), primera.name, "a.jpg")
+    assert [s["complete"] for s in load_catalog(tmp_path)] == [True, False]
+
+
+# =================================================
+# Enlaces
+# =================================================
+@pytest.fixture
+def origen(tmp_path):
+    ruta = tmp_path / "a.jpg"
+    ruta.write_bytes(b"x" * 1000)
+    return ruta
+
+
+def test_link_or_copy_links_unchanged_files(tmp_path, origen):
+    anterior, nuevo = tmp_path / "anterior.jpg", tmp_path / "nuevo.jpg"
+    assert link_or_copy(origen, anterior) == ("copied", 1000)
+
+    progreso = []
+    assert link_or_copy(origen, nuevo, previous=str(anterior), progreso=progreso.append) == ("linked", 0)
+    assert os.path.samefile(anterior, nuevo)
+    # El progreso avanza igual, aunque no se escriba nada
+    assert sum(progreso) == 1000
+
+
+def test_link_or_copy_copies_changed_files(tmp_path, origen):
+    anterior, nuevo = tmp_path / "anterior.jpg", tmp_path / "nuevo.jpg"
+    link_or_copy(origen, anterior)
+    origen.write_bytes(b"y" * 1200)
+
+    assert link_or_copy(origen, nuevo, previous=str(anterior)) == ("copied", 1200)
+    assert not os.path.samefile(anterior, nuevo)
+    assert anterior.read_bytes() == b"x" * 1000
+
+
+def test_link_or_copy_copies_when_links_fail(tmp_path, origen, monkeypatch):
+    anterior, nuevo = tmp_path / "anterior.jpg", tmp_path / "nuevo.jpg"
+    link_or_copy(origen, anterior)
+
+    def sin_enlaces(*args):
+        raise OSError(1, "Operation not permitted")
+
+    monkeypatch.setattr(os, "link", sin_enlaces)
+
+    assert link_or_copy(origen, nuevo, previous=str(anterior)) == ("copied", 1000)
+    assert nuevo.read_bytes() == origen.read_bytes()
+
+
+def test_link_or_copy_copies_without_previous(tmp_path, origen):
+    assert link_or_copy(origen, tmp_path / "nuevo.jpg", previous=str(tmp_path / "no_existe.jpg")) == \
+        ("copied", 1000)
@@ -0,0 +1,107 @@
+import os
+
+import pytest
+
+import sync
+from rules import RuleSet
+
+
+@pytest.fixture
+def delta_siempre(monkeypatch):
+    # Los archivos de prueba son chicos: el delta se usa con cualquier tamaño
+    monkeypatch.setattr(sync, "DELTA_MIN_BYTES", 0)
+
+
+def _escribir(ruta, datos, mtime):
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    ruta.write_bytes(bytes(datos))
+    os.utime(ruta, (mtime, mtime))
+
+
+def _par(tmp_path, tamano=3 * sync.DELTA_PROBE_BYTES):
+    datos = bytearray(os.urandom(tamano))
+    src, dst = tmp_path / "src.tif", tmp_path / "dst.tif"
+    _escribir(dst, datos, 1_000)
+    return datos, src, dst
+
+
+# =================================================
+# Espejo: sync_file
+# =================================================
+def test_sin_cambios_no_escribe(tmp_path):
+    datos, src, dst = _par(tmp_path, 1000)
+    _escribir(src, datos, 1_001)
+    assert sync.sync_file(str(src), str(dst)) == ("unchanged", 0)
+
+
+def test_edicion_en_su_lugar_usa_delta(tmp_path, delta_siempre):
+    datos, src, dst = _par(tmp_path)
+    datos[-10] ^= 0xFF
+    _escribir(src, datos, 2_000)
+
+    accion, escritos = sync.sync_file(str(src), str(dst))
+    assert accion == "delta"
+    assert escritos == sync.BLOCK_SIZE
+    assert dst.read_bytes() == bytes(datos)
+    assert os.stat(dst).st_mtime == 2_000
+
+
+def test_tamano_distinto_copia_completo(tmp_path, delta_siempre):
+    # Un byte insertado desplaza todo: el delta por posición no sirve
+    datos, src, dst = _par(tmp_path)
+    nuevos = b"x" + bytes(datos)
+    _escribir(src, nuevos, 2_000)
+
+    assert sync.sync_file(str(src), str(dst)) == ("copied", len(nuevos))
+    assert dst.read_bytes() == nuevos
+
+
+def test_distinto_desde_el_comienzo_copia_completo(tmp_path, delta_siempre):
+    datos, src, dst = _par(tmp_path)
+    datos[0] ^= 0xFF
+    _escribir(src, datos, 2_000)
+
+    assert sync.sync_file(str(src), str(dst)) == ("copied", len(datos))
+    assert dst.read_bytes() == bytes(datos)
+
+
+def test_enlace_duro_no_se_modifica(tmp_path, delta_siempre):
+    # El destino comparte datos con una instantánea: se reemplaza, no se pisa
+    datos, src, dst = _par(tmp_path)
+    instantanea = tmp_path / "instantanea.tif"
+    os.link(dst, instantanea)
+    anterior = instantanea.read_bytes()
+    datos[-1] ^= 0xFF
+    _escribir(src, datos, 2_000)
+
+    accion, _ = sync.sync_file(str(src), str(dst))
+    assert accion == "copied"
+    assert dst.read_bytes() == bytes(datos)
+    assert instantanea.read_bytes() == anterior
+
+
+def test_delta_recorta_el_final(tmp_path):
+    datos, src, dst = _par(tmp_path, 5 * sync.BLOCK_SIZE // 2)
+    _escribir(src, datos[:sync.BLOCK_SIZE], 2_000)
+    sync.delta_copy(str(src), str(dst))
+    assert dst.read_bytes() == bytes(datos[:sync.BLOCK_SIZE])
+
+
+# =================================================
+# Espejo: delete_extraneous
+# =================================================
+def test_borra_sobrantes_solo_en_los_monumentos_respaldados(tmp_path):
+    for rel in ("T1_00001/a.jpg", "T1_00001/b.jpg", "T1_00001/vieja/c.jpg",
+                "T1_00001/PROYECTO AGISOFT/p.psx", "T1_00002/d.jpg"):
+        _escribir(tmp_path / rel, b"x", 1_000)
+    rules = RuleSet(exclude_dirs=["PROYECTO AGISOFT"])
+
+    borrados = sync.delete_extraneous(str(tmp_path), ["T1_00001"], {os.path.join("T1_00001", "a.jpg")},
+                                      {"T1_00001"}, rules)
+
+    assert sorted(borrados) == sorted([str(tmp_path / "T1_00001" / "b.jpg"),
+                                       str(tmp_path / "T1_00001" / "vieja")])
+    assert (tmp_path / "T1_00001" / "a.jpg").exists()
+    # Lo excluido por las reglas y los otros monumentos no se tocan
+    assert (tmp_path / "T1_00001" / "PROYECTO AGISOFT" / "p.psx").exists()
+    assert (tmp_path / "T1_00002" / "d.jpg").exists()
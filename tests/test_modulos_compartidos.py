@@ -0,0 +1,30 @@
+# test_modulos_compartidos.py
+# Litica y Procesamiento se empaquetan por separado (cada uno con su
+# ui.spec / PyInstaller e imports de script), así que los módulos comunes
+# viven copiados en las dos carpetas. Esta prueba evita que se desfasen.
+import os
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COMPARTIDOS = (
+    "copiador.py",
+    "empaquetado.py",
+    "indice.py",
+    "planificador.py",
+    "recorrido.py",
+    "verificacion.py",
+)
+
+
+@pytest.mark.parametrize("modulo", COMPARTIDOS)
+def test_copias_identicas(modulo):
+    with open(os.path.join(RAIZ, "Litica", modulo), "rb") as f:
+        litica = f.read()
+    with open(os.path.join(RAIZ, "Procesamiento", modulo), "rb") as f:
+        procesamiento = f.read()
+    assert litica == procesamiento, (
+        f"{modulo} difiere entre Litica/ y Procesamiento/: "
+        "los cambios a un módulo compartido se copian en las dos carpetas"
+    )